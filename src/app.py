@@ -1,44 +1,365 @@
+import hmac
+import json
+import logging
+import os
+import shutil
+import threading
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from flask import Flask, request, jsonify
+from tempfile import mkdtemp
+from typing import Dict, Iterator, List, Optional, Tuple
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context, url_for
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
+from src import metrics
+from src.cache.classification_cache import ClassificationCache
+from src.cache.ocr_cache import OCRCache
 from src.classifier.zero_shot_classifier import ZeroShotClassifier
+from src.constants import OCR_CACHE_DIR, PROFILE_DIR
+from src.jobs.job_manager import JobManager, JobQueueFullError
+from src.serving.memory import process_memory, serving_memory
+from src.serving.profiling import ARTIFACTS, ProfilerBusyError, RequestProfiler
 from src.types.classifier_input import ClassifierInput
 from src.types.classifier_output import ClassifierOutput
+from src.types.extraction_options import ExtractionOptions
+from src.types.in_memory_document import InMemoryDocument
+from src.types.inference_backend import InferenceBackend
+from src.types.model_state import ModelState
+from src.types.pdf_profile import PdfProfile
+
+_log = logging.getLogger(__name__)
+
 app = Flask(__name__)
+# Profiling runs a request without caches or batching, so it is off unless the deployment opts in.
+# With a token set, clients must also send it in the X-Profile-Token header
+app.config['PROFILING_ENABLED'] = os.environ.get('CLASSIFIER_PROFILING', '').lower() in ('1', 'true', 'yes')
+app.config['PROFILING_TOKEN'] = os.environ.get('CLASSIFIER_PROFILING_TOKEN') or None
 
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg'}
 
-DEFAULT_CLASSIFIER = ZeroShotClassifier()
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Upper bound on a /classify_file request. Clients may ask for less with `timeout_s`
+MAX_REQUEST_TIME_BUDGET_S = 120.0
+# Seconds tesseract may spend on one image or PDF page, and the model on one request's texts
+OCR_TIMEOUT_S = 30.0
+INFERENCE_TIMEOUT_S = 30.0
+
+INFERENCE_BACKEND = InferenceBackend.TORCH
+
+# The model is loaded lazily so importing the app (and binding the server) stays fast;
+# call start_warmup() to load it in the background ahead of the first request. Requests
+# and jobs share one scheduler, so concurrent texts are batched into the same forward pass.
+DEFAULT_CLASSIFIER = ZeroShotClassifier(
+    ocr_cache=OCRCache(cache_dir=Path(OCR_CACHE_DIR)),
+    extraction_options=ExtractionOptions(ocr_timeout_s=OCR_TIMEOUT_S),
+    result_cache=ClassificationCache(),
+    backend=INFERENCE_BACKEND,
+    lazy=True,
+    scheduled=True,
+    inference_timeout_s=INFERENCE_TIMEOUT_S,
+)
+
+JOB_MANAGER = JobManager(DEFAULT_CLASSIFIER)
+
+# The model loads lazily, so torch is imported up front for the first profiled request to trace it
+PROFILER = RequestProfiler(Path(PROFILE_DIR), torch_trace=INFERENCE_BACKEND != InferenceBackend.ONNX)
+
+def start_warmup() -> threading.Thread:
+    """Loads and warms up the default classifier on a background thread."""
+
+    def warmup():
+        try:
+            DEFAULT_CLASSIFIER.warmup()
+        except Exception:
+            _log.exception("Failed to warm up classifier")
+
+    thread = threading.Thread(target=warmup, name="classifier-warmup", daemon=True)
+    thread.start()
+    return thread
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def validate_uploads() -> Optional[str]:
+    """Checks the request's uploaded files, returning an error message if they are invalid."""
+
+    if 'file' not in request.files:
+        return "No file part in the request"
+
+    for file in request.files.getlist('file'):
+        if not file.filename:
+            return "No selected file"
+
+        if not allowed_file(file.filename):
+            return "File type not allowed"
+
+    return None
+
+def parse_pdf_profile() -> Tuple[Optional[PdfProfile], Optional[str]]:
+    """Reads the optional `pdf_profile` query or form parameter.
+
+    Returns the profile, or an error message if the value is not a known profile.
+    """
+
+    value = request.values.get('pdf_profile')
+    if not value:
+        return None, None
+
+    try:
+        return PdfProfile(value), None
+    except ValueError:
+        return None, f"Unknown pdf_profile {value}, expected one of {[profile.value for profile in PdfProfile]}"
+
+def parse_time_budget() -> Tuple[float, Optional[str]]:
+    """Reads the optional `timeout_s` query or form parameter, capped at MAX_REQUEST_TIME_BUDGET_S.
+
+    Returns the request's time budget, or an error message if the value is not a positive number.
+    """
+
+    value = request.values.get('timeout_s')
+    if not value:
+        return MAX_REQUEST_TIME_BUDGET_S, None
+
+    try:
+        timeout_s = float(value)
+    except ValueError:
+        timeout_s = 0.0
+    if not 0 < timeout_s < float('inf'):
+        return MAX_REQUEST_TIME_BUDGET_S, f"Invalid timeout_s {value}, expected a positive number of seconds"
+
+    return min(timeout_s, MAX_REQUEST_TIME_BUDGET_S), None
+
+def wants_stream() -> bool:
+    """Whether the client asked for NDJSON results, with `?stream=true` or an NDJSON Accept header."""
+
+    if request.values.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+def wants_profile() -> bool:
+    """Whether the client asked for the request to be profiled, with `?profile=true` or an `X-Profile: true` header."""
+
+    value = request.values.get('profile') or request.headers.get('X-Profile', '')
+    return value.lower() in ('1', 'true', 'yes')
+
+def authorize_profiling() -> Optional[str]:
+    """Checks that profiling is enabled and the client sent the profiling token, if one is configured.
+
+    Returns an error message if the client may not profile.
+    """
+
+    if not app.config['PROFILING_ENABLED']:
+        return "Profiling is disabled"
+
+    token = app.config['PROFILING_TOKEN']
+    if token is not None and not hmac.compare_digest(request.headers.get('X-Profile-Token', ''), token):
+        return "Invalid profiling token"
+
+    return None
+
+def stream_predictions(input: ClassifierInput) -> Iterator[str]:
+    """Yields one NDJSON line per file as the classifier completes it."""
+
+    try:
+        for prediction in DEFAULT_CLASSIFIER.classify_iter(input):
+            metrics.PREDICTIONS.labels(document_type=prediction.document_type.value).inc()
+            line = {
+                "file": str(prediction.path),
+                "file_class": prediction.document_type.value,
+                "score": prediction.score,
+            }
+            if prediction.error is not None:
+                line["error"] = prediction.error
+            yield json.dumps(line) + "\n"
+    except Exception:
+        # The status line has already been sent, so report the failure in the stream
+        _log.exception("Failed to stream classification results")
+        yield json.dumps({"error": "Classification failed"}) + "\n"
+
+def save_uploads(dir_path: Path) -> Optional[str]:
+    """Validates the uploaded files and saves them to dir_path.
+
+    Returns an error message if the request is invalid.
+    """
+
+    error = validate_uploads()
+    if error:
+        return error
+
+    # Jobs outlive the request, so their uploads are kept on disk until the job finishes
+    for file in request.files.getlist('file'):
+        file.save(dir_path / file.filename)
+
+    return None
+
 @app.route('/classify_file', methods=['POST'])
 def classify_file_route():
 
-    if 'file' not in request.files:
-        return jsonify({"error": "No file part in the request"}), 400
+    # Accessing request.files parses the multipart body, so it counts as upload time
+    with metrics.timed(metrics.UPLOAD_SECONDS):
+        error = validate_uploads()
+        if error:
+            return jsonify({"error": error}), 400
+
+        pdf_profile, error = parse_pdf_profile()
+        if error:
+            return jsonify({"error": error}), 400
+
+        time_budget_s, error = parse_time_budget()
+        if error:
+            return jsonify({"error": error}), 400
+
+        profile = wants_profile()
+        if profile:
+            error = authorize_profiling()
+            if error:
+                return jsonify({"error": error}), 403
+            if wants_stream():
+                return jsonify({"error": "Streamed responses cannot be profiled"}), 400
+
+        # Hand the upload streams straight to the classifier instead of saving them to a
+        # temp dir; the extractor only spools documents above its in-memory size limit
+        documents = [
+            InMemoryDocument(name=Path(file.filename), data=file.stream)
+            for file in request.files.getlist('file')
+        ]
+        record_upload_metrics(documents)
+
+    # A profiled request runs on this thread, where the profiler can see all of its work
+    input = ClassifierInput(files=None, documents=documents, pdf_profile=pdf_profile, time_budget_s=time_budget_s, inline=profile)
+
+    # Streamed responses keep the request context, and so the upload streams, open until the last line
+    if wants_stream():
+        return Response(stream_with_context(stream_predictions(input)), mimetype=NDJSON_MIMETYPE)
+
+    profile_id: Optional[str] = None
+    if profile:
+        try:
+            with PROFILER.profile() as profile_id:
+                output: ClassifierOutput = DEFAULT_CLASSIFIER.classify(input)
+        except ProfilerBusyError as error:
+            return jsonify({"error": str(error)}), 409
+    else:
+        output = DEFAULT_CLASSIFIER.classify(input)
+
+    for result_class in output.output_per_file.values():
+        metrics.PREDICTIONS.labels(document_type=result_class.value).inc()
+
+    with metrics.timed(metrics.SERIALIZATION_SECONDS):
+        body = {"file_classes": {str(filename): result_class.value for filename, result_class in output.output_per_file.items()}}
+        # Files that failed are still listed as `other`; this says why
+        if output.errors_per_file:
+            body["errors"] = {str(filename): reason for filename, reason in output.errors_per_file.items()}
+        if profile_id is not None:
+            body["profile"] = {"id": profile_id, "artifacts": profile_artifact_urls(profile_id)}
+            skipped = PROFILER.skipped_artifacts(profile_id)
+            if skipped:
+                body["profile"]["skipped"] = skipped
+        response = jsonify(body)
+
+    return response, 200
+
+def profile_artifact_urls(profile_id: str) -> Dict[str, str]:
+    return {
+        name: url_for('profile_artifact_route', profile_id=profile_id, name=name)
+        for name in ARTIFACTS
+        if PROFILER.artifact_path(profile_id, name) is not None
+    }
+
+def record_upload_metrics(documents: List[InMemoryDocument]) -> None:
+    for document in documents:
+        metrics.FILES.labels(kind=metrics.file_kind(document.name.suffix)).inc()
+
+        # Measure the stream without reading it
+        stream = document.data
+        stream.seek(0, os.SEEK_END)
+        metrics.BYTES.inc(stream.tell())
+        stream.seek(0)
+
+@app.route('/jobs', methods=['POST'])
+def submit_job_route():
+
+    pdf_profile, error = parse_pdf_profile()
+    if error:
+        return jsonify({"error": error}), 400
+
+    # The upload dir outlives the request and is removed once the job finishes
+    job_dir = Path(mkdtemp())
+    with metrics.timed(metrics.UPLOAD_SECONDS):
+        error = save_uploads(job_dir)
+    if error:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        return jsonify({"error": error}), 400
+
+    files: List[Path] = sorted(path for path in job_dir.iterdir() if path.is_file())
+    for file_path in files:
+        metrics.FILES.labels(kind=metrics.file_kind(file_path.suffix)).inc()
+        metrics.BYTES.inc(file_path.stat().st_size)
+
+    try:
+        job = JOB_MANAGER.submit(
+            files,
+            on_finished=lambda: shutil.rmtree(job_dir, ignore_errors=True),
+            pdf_profile=pdf_profile,
+        )
+    except JobQueueFullError:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        return jsonify({"error": "Too many pending jobs, retry later"}), 503
+
+    return jsonify({"job_id": job.job_id, "status": job.status.value}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status_route(job_id):
+
+    job = JOB_MANAGER.describe(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(job), 200
+
+@app.route('/profiles/<profile_id>/<name>', methods=['GET'])
+def profile_artifact_route(profile_id, name):
+
+    error = authorize_profiling()
+    if error:
+        return jsonify({"error": error}), 403
+
+    path = PROFILER.artifact_path(profile_id, name)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+
+    return send_file(path.resolve(), as_attachment=True)
+
+@app.route('/healthz', methods=['GET'])
+def healthz_route():
+
+    return jsonify({"status": "ok"}), 200
+
+@app.route('/readyz', methods=['GET'])
+def readyz_route():
+
+    state = DEFAULT_CLASSIFIER.state
+    status_code = 200 if state == ModelState.READY else 503
+
+    return jsonify({"status": state.value}), status_code
+
+@app.route('/memz', methods=['GET'])
+def memz_route():
 
-    with TemporaryDirectory() as temp_dir:
-        files = request.files.getlist('file')
-        for file in files:
-            if not file.filename:
-                return jsonify({"error": "No selected file"}), 400
+    return jsonify(serving_memory()), 200
 
-            if not allowed_file(file.filename):
-                return jsonify({"error": f"File type not allowed"}), 400
-            
-            # In order to pass filepaths through the system instead of file objs,
-            # we save the file to a local tmp dir for processing
-            file.save(Path(temp_dir) / file.filename)
+@app.route('/metrics', methods=['GET'])
+def metrics_route():
 
-        # Invoke classifier with input filepath
-        input = ClassifierInput(files=None, dir_path=Path(temp_dir))
-        output: ClassifierOutput = DEFAULT_CLASSIFIER.classify(input)
+    for kind, size in process_memory().items():
+        metrics.PROCESS_MEMORY_BYTES.labels(kind=kind).set(size)
 
-    return jsonify({"file_classes": {str(filename): result_class.value for filename, result_class in output.output_per_file.items()}}), 200
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
 
 
 if __name__ == '__main__':
+    # In debug mode the reloader's watcher process runs this too, but only its child serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warmup()
     app.run(debug=True)
@@ -0,0 +1,319 @@
+import argparse
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from src.cache.ocr_cache import OCRCache
+from src.classifier import Classifier
+from src.constants import LINEAR_MODEL_PATH, OCR_CACHE_DIR
+from src.feature_extraction.ocr_extractor import OCRExtractor
+from src.local_eval import CLASSIFIERS, DEFAULT_BATCH_SIZE, build_classifier
+from src.resource_scheduler import ResourceScheduler
+from src.types.classifier_input import ClassifierInput
+from src.types.inference_backend import InferenceBackend
+from src.types.pdf_profile import PdfProfile
+
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_CHECKPOINT_EVERY = 100
+
+
+@dataclass
+class BatchRecord:
+    """One line of the JSONL results file."""
+
+    path: str
+    content_hash: str
+    size: int
+    mtime_ns: int
+    document_type: str
+    score: Optional[float] = None
+    # Why the file could not be classified. Failed files are classified again on the next run
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchSummary:
+    """Counts and timing of a batch run. `files` counts every file found, including skipped ones."""
+
+    files: int = 0
+    classified: int = 0
+    # Unchanged since the previous run, by path, size and modification time
+    skipped: int = 0
+    # New paths whose content was already classified under another path
+    reused: int = 0
+    # Classified as UNKNOWN because of an error, and left for the next run to retry
+    failed: int = 0
+    elapsed_s: float = 0.0
+    per_type: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **asdict(self),
+            'elapsed_s': round(self.elapsed_s, 3),
+            'classified_per_sec': round(self.classified / self.elapsed_s, 3) if self.elapsed_s else 0.0,
+        }
+
+
+class BatchCheckpoint:
+    """Appends results to a JSONL file and remembers what earlier runs already classified.
+
+    The results file doubles as the checkpoint: each record is flushed as soon as
+    it is written and fsynced every `checkpoint_every` records, so an interrupted
+    run loses at most the files in flight. On start-up the existing file is read
+    back, and the latest record per path and per content hash decide what to skip.
+    Records of failed files are kept for reference but never skip or reuse
+    anything, so those files are retried. A torn last line from a crash is ignored.
+
+    Args:
+        output_path (Path): JSONL results file, created if missing.
+        checkpoint_every (int): Records written between fsyncs.
+    """
+
+    def __init__(self, output_path: Path, checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY):
+        self._output_path = output_path
+        self._checkpoint_every = checkpoint_every
+        self._unsynced = 0
+
+        self._by_path: Dict[str, BatchRecord] = {}
+        self._by_hash: Dict[str, BatchRecord] = {}
+        self._load()
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._output: TextIO = open(output_path, 'a')
+
+        # Terminate a torn last line so the next record starts on a line of its own
+        if self._output.tell() > 0 and not self._ends_with_newline():
+            self._output.write('\n')
+
+    def _load(self) -> None:
+        if not self._output_path.exists():
+            return
+
+        with open(self._output_path) as output:
+            for line_number, line in enumerate(output, start=1):
+                try:
+                    record = BatchRecord(**json.loads(line))
+                except (ValueError, TypeError):
+                    _log.warning(f"Ignoring malformed line {line_number} of {self._output_path}")
+                    continue
+
+                self._remember(record)
+
+        _log.info(f"Resuming from {len(self._by_path)} classified files in {self._output_path}")
+
+    def _remember(self, record: BatchRecord) -> None:
+        self._by_path[record.path] = record
+        # A failure must not shadow an earlier success for the same content
+        if record.error is None:
+            self._by_hash[record.content_hash] = record
+
+    def _ends_with_newline(self) -> bool:
+        with open(self._output_path, 'rb') as output:
+            output.seek(-1, os.SEEK_END)
+            return output.read(1) == b'\n'
+
+    def unchanged(self, file_path: Path, stat: os.stat_result) -> bool:
+        """Whether the file was classified successfully before and its size and modification time still match."""
+
+        record = self._by_path.get(str(file_path))
+        return (
+            record is not None
+            and record.error is None
+            and record.size == stat.st_size
+            and record.mtime_ns == stat.st_mtime_ns
+        )
+
+    def lookup_hash(self, content_hash: str) -> Optional[BatchRecord]:
+        return self._by_hash.get(content_hash)
+
+    def write(self, record: BatchRecord) -> None:
+        self._remember(record)
+
+        self._output.write(json.dumps(asdict(record)) + '\n')
+        self._output.flush()
+
+        self._unsynced += 1
+        if self._unsynced >= self._checkpoint_every:
+            self.sync()
+
+    def sync(self) -> None:
+        os.fsync(self._output.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        self.sync()
+        self._output.close()
+
+
+# A file to classify, with its stat and content hash taken before classification
+PendingFile = Tuple[Path, os.stat_result, str]
+
+
+def _chunks(items: Iterator[PendingFile], size: int) -> Iterator[List[PendingFile]]:
+    chunk: List[PendingFile] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def classify_directory(
+    classifier: Classifier,
+    dir_path: Path,
+    checkpoint: BatchCheckpoint,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    pdf_profile: Optional[PdfProfile] = None,
+) -> BatchSummary:
+    """Classifies every file under a directory, skipping those already in the checkpoint.
+
+    The directory is walked lazily. Files are checked against the checkpoint first:
+    unchanged files are skipped without being read, and files whose content hash was
+    already classified reuse that result. The rest are classified in chunks of
+    `chunk_size` files through `Classifier.classify_iter`, and each result is written
+    as soon as the classifier yields it.
+
+    Args:
+        classifier (Classifier): Any classifier. Those that stream, such as the
+            zero-shot classifier, overlap OCR and inference within each chunk.
+        dir_path (Path): Directory to classify, recursively.
+        checkpoint (BatchCheckpoint): Results file and resume state.
+        chunk_size (int): Files handed to the classifier per call.
+        pdf_profile (PdfProfile): Optional PDF extraction profile.
+
+    Returns:
+        BatchSummary: Counts and timing of the run.
+    """
+
+    summary = BatchSummary()
+    start = time.perf_counter()
+
+    def record(
+        file_path: Path,
+        stat: os.stat_result,
+        content_hash: str,
+        document_type: str,
+        score: Optional[float],
+        error: Optional[str] = None,
+    ) -> None:
+        checkpoint.write(BatchRecord(
+            path=str(file_path),
+            content_hash=content_hash,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            document_type=document_type,
+            score=score,
+            error=error,
+        ))
+        summary.per_type[document_type] = summary.per_type.get(document_type, 0) + 1
+
+    def pending_files() -> Iterator[PendingFile]:
+        for file_path in OCRExtractor.iter_sources(dir_path=dir_path):
+            summary.files += 1
+
+            stat = file_path.stat()
+            if checkpoint.unchanged(file_path, stat):
+                summary.skipped += 1
+                continue
+
+            content_hash = OCRCache.hash_file(file_path)
+            previous = checkpoint.lookup_hash(content_hash)
+            if previous is not None:
+                record(file_path, stat, content_hash, previous.document_type, previous.score)
+                summary.reused += 1
+                continue
+
+            # Stat and hash before classifying, so a file edited mid-run is classified again next time
+            yield file_path, stat, content_hash
+
+    for chunk in _chunks(pending_files(), chunk_size):
+        pending: Dict[Path, PendingFile] = {pending_file[0]: pending_file for pending_file in chunk}
+
+        for prediction in classifier.classify_iter(ClassifierInput(files=list(pending), pdf_profile=pdf_profile)):
+            file_path, stat, content_hash = pending[Path(prediction.path)]
+            record(file_path, stat, content_hash, prediction.document_type.value, prediction.score, prediction.error)
+            summary.classified += 1
+            if prediction.error is not None:
+                summary.failed += 1
+
+        elapsed_s = time.perf_counter() - start
+        _log.info(
+            f"Classified {summary.classified} files ({summary.skipped} skipped, {summary.reused} reused, {summary.failed} failed) "
+            f"in {elapsed_s:.1f}s, {summary.classified / elapsed_s:.2f} files/sec"
+        )
+
+    summary.elapsed_s = time.perf_counter() - start
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify every file under a directory, writing results as JSON lines.")
+    parser.add_argument('dir', type=Path, help="Directory to classify, recursively")
+    parser.add_argument('--output', type=Path, default=Path('batch_results.jsonl'), help="JSONL results file. Rerunning with the same file resumes")
+    parser.add_argument('--classifier', choices=CLASSIFIERS, default='zero_shot')
+    parser.add_argument('--ocr-workers', type=int, default=None, help="OCR worker processes. Defaults to the thread budget's, or the CPU count")
+    parser.add_argument('--thread-budget', type=Path, default=None, help="JSON thread budget, e.g. from `python -m src.resource_scheduler`")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Texts per model batch, each scored against every label")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Files handed to the classifier per call")
+    parser.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY, help="Results written between fsyncs")
+    parser.add_argument('--linear-model', type=Path, default=Path(LINEAR_MODEL_PATH), help="Linear model for the cascade classifier")
+    parser.add_argument(
+        '--backend',
+        choices=[backend.value for backend in InferenceBackend],
+        default=InferenceBackend.TORCH.value,
+        help="Inference backend for the zero-shot classifier",
+    )
+    parser.add_argument(
+        '--pdf-profile',
+        choices=[profile.value for profile in PdfProfile],
+        default=PdfProfile.RICH.value,
+        help="PDF extraction profile",
+    )
+    args = parser.parse_args()
+
+    if not args.dir.is_dir():
+        parser.error(f"Not a directory: {args.dir}")
+
+    ocr_workers = args.ocr_workers
+    if args.thread_budget is not None:
+        ResourceScheduler.apply(ResourceScheduler.load(args.thread_budget), InferenceBackend(args.backend))
+    elif ocr_workers is None:
+        ocr_workers = os.cpu_count() or 1
+
+    classifier = build_classifier(
+        args.classifier,
+        OCRCache(cache_dir=Path(OCR_CACHE_DIR)),
+        linear_model_path=args.linear_model,
+        backend=InferenceBackend(args.backend),
+        batch_size=args.batch_size,
+        ocr_workers=ocr_workers,
+    )
+
+    checkpoint = BatchCheckpoint(args.output, checkpoint_every=args.checkpoint_every)
+    try:
+        summary = classify_directory(
+            classifier,
+            args.dir,
+            checkpoint,
+            chunk_size=args.chunk_size,
+            pdf_profile=PdfProfile(args.pdf_profile),
+        )
+    finally:
+        checkpoint.close()
+        OCRExtractor.shutdown_workers()
+
+    _log.info(f"Batch classification summary: {json.dumps(summary.to_dict())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.classifier.onnx_backend import HYPOTHESIS_TEMPLATE
+from src.classifier.zero_shot_classifier import DEFAULT_BATCH_SIZE, ZeroShotClassifier
+from src.constants import SUPPORTED_IMAGE_TYPES
+from src.dataset.manifest import DatasetManifest
+from src.feature_extraction.ocr_extractor import OCRExtractor
+from src.types.document_type import DocumentType
+from src.types.extraction_options import DEFAULT_IMAGE_MAX_DIMENSION, DEFAULT_IMAGE_TARGET_DPI, ExtractionOptions
+from src.types.inference_backend import InferenceBackend
+from src.types.pdf_profile import PdfProfile
+
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = "MoritzLaurer/deberta-v3-large-zeroshot-v2.0"
+DEFAULT_SAMPLES_PER_DATASET = 10
+DEFAULT_SEED = 0
+SAMPLE_FILES_DIR = Path('files')
+
+STAGES = ('image_ocr', 'pdf_extraction', 'tokenization', 'model_inference')
+
+
+class _PeakRSSSampler:
+    """Tracks the peak resident set size of this process while a stage runs.
+
+    `ru_maxrss` only ever grows over the life of the process, so a background thread
+    samples /proc/self/statm to attribute a peak to each stage. On platforms without
+    /proc it falls back to the process-wide high-water mark.
+    """
+
+    def __init__(self, interval_s: float = 0.01):
+        self._interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.peak_bytes = 0
+
+    def __enter__(self) -> '_PeakRSSSampler':
+        self.peak_bytes = _current_rss_bytes()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, _current_rss_bytes())
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self._interval_s):
+            self.peak_bytes = max(self.peak_bytes, _current_rss_bytes())
+
+
+def _current_rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return _max_rss_bytes(resource.RUSAGE_SELF)
+
+
+def _max_rss_bytes(who: int) -> int:
+    # ru_maxrss is reported in KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(who).ru_maxrss
+    return max_rss if platform.system() == 'Darwin' else max_rss * 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Returns the linearly interpolated percentile of a list of values."""
+
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize_stage(latencies_s: List[float], wall_time_s: float, peak_rss_bytes: int, files: Optional[int] = None) -> Dict[str, Any]:
+    latencies_ms = [latency * 1000 for latency in latencies_s]
+    files = len(latencies_ms) if files is None else files
+
+    return {
+        'files': files,
+        'wall_time_s': round(wall_time_s, 4),
+        'files_per_sec': round(files / wall_time_s, 4) if wall_time_s > 0 else 0.0,
+        'latency_ms': {
+            'mean': round(sum(latencies_ms) / len(latencies_ms), 3) if latencies_ms else 0.0,
+            'p50': round(percentile(latencies_ms, 50), 3),
+            'p95': round(percentile(latencies_ms, 95), 3),
+            'p99': round(percentile(latencies_ms, 99), 3),
+        },
+        'peak_rss_mb': round(peak_rss_bytes / (1024 * 1024), 2),
+    }
+
+
+def run_stage(
+    name: str,
+    items: List[Any],
+    fn: Callable[[Any], Any],
+    files_per_item: Optional[Callable[[Any], int]] = None,
+) -> Dict[str, Any]:
+    """Times `fn` over every item, recording per-item latency and the stage's peak RSS.
+
+    Items are single files unless `files_per_item` says how many files each one
+    holds, e.g. for a stage timed per batch.
+    """
+
+    _log.info(f"Running stage {name} over {len(items)} items")
+
+    latencies_s: List[float] = []
+    with _PeakRSSSampler() as sampler:
+        start = time.perf_counter()
+        for item in items:
+            item_start = time.perf_counter()
+            fn(item)
+            latencies_s.append(time.perf_counter() - item_start)
+        wall_time_s = time.perf_counter() - start
+
+    files = sum(files_per_item(item) for item in items) if files_per_item is not None else None
+    summary = summarize_stage(latencies_s, wall_time_s, sampler.peak_bytes, files)
+    _log.info(f"Stage {name}: {summary['files_per_sec']} files/sec, p50 {summary['latency_ms']['p50']}ms")
+
+    return summary
+
+
+def collect_files(samples_per_dataset: int, seed: int = DEFAULT_SEED) -> List[Path]:
+    """Samples files from each bundled dataset plus every file in files/."""
+
+    entries = DatasetManifest.load_or_build().sample(samples_per_dataset, seed=seed)
+
+    file_paths: List[Path] = [entry.path for entry in entries]
+    file_paths += sorted(path for path in SAMPLE_FILES_DIR.glob('*') if path.is_file())
+
+    return file_paths
+
+
+def _torch_version(backend: InferenceBackend) -> str:
+    """Returns the installed torch version, or "not installed" when the ONNX backend runs without it."""
+
+    try:
+        import torch
+    except ImportError:
+        if backend != InferenceBackend.ONNX:
+            raise
+        return "not installed"
+
+    return torch.__version__
+
+
+def _versions(backend: InferenceBackend) -> Dict[str, str]:
+    import pymupdf4llm
+    import pytesseract
+    import transformers
+
+    try:
+        tesseract_version = str(pytesseract.get_tesseract_version())
+    except Exception:
+        tesseract_version = "unknown"
+
+    return {
+        'python': platform.python_version(),
+        'torch': _torch_version(backend),
+        'transformers': transformers.__version__,
+        'pymupdf4llm': pymupdf4llm.__version__,
+        'tesseract': tesseract_version,
+    }
+
+
+def run_benchmark(
+    samples_per_dataset: int = DEFAULT_SAMPLES_PER_DATASET,
+    seed: int = DEFAULT_SEED,
+    model_name: str = DEFAULT_MODEL_NAME,
+    stages: Optional[List[str]] = None,
+    backend: InferenceBackend = InferenceBackend.TORCH,
+    pdf_profile: PdfProfile = PdfProfile.RICH,
+    extraction_options: Optional[ExtractionOptions] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """Runs every requested stage and returns a machine-readable report."""
+
+    stages = stages or list(STAGES)
+
+    random.seed(seed)
+    if backend != InferenceBackend.ONNX:
+        import torch
+
+        torch.manual_seed(seed)
+
+    file_paths = collect_files(samples_per_dataset, seed)
+    image_paths = [path for path in file_paths if path.suffix.lower() in SUPPORTED_IMAGE_TYPES]
+    pdf_paths = [path for path in file_paths if path.suffix.lower() == '.pdf']
+
+    report: Dict[str, Any] = {
+        'metadata': {
+            'seed': seed,
+            'samples_per_dataset': samples_per_dataset,
+            'model_name': model_name,
+            'backend': backend.value,
+            'batch_size': batch_size,
+            'pdf_profile': pdf_profile.value,
+            'image_settings': (extraction_options or ExtractionOptions()).image_settings_id(),
+            'cpu_count': os.cpu_count(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'versions': _versions(backend),
+            'files': [str(path) for path in file_paths],
+        },
+        'stages': {},
+    }
+
+    # Later stages run on the text extracted here, so OCR always runs
+    texts: Dict[Path, str] = {}
+    extraction_options = (extraction_options or ExtractionOptions()).with_pdf_profile(pdf_profile)
+
+    def extract(file_path: Path) -> None:
+        texts[file_path] = OCRExtractor.extract_text(file_path, options=extraction_options)
+
+    image_summary = run_stage('image_ocr', image_paths, extract)
+    pdf_summary = run_stage('pdf_extraction', pdf_paths, extract)
+
+    if 'image_ocr' in stages:
+        report['stages']['image_ocr'] = image_summary
+    if 'pdf_extraction' in stages:
+        report['stages']['pdf_extraction'] = pdf_summary
+
+    non_empty_texts_per_file = {file_path: text for file_path, text in texts.items() if text}
+    non_empty_texts = list(non_empty_texts_per_file.values())
+    labels = [doc_type.value for doc_type in DocumentType]
+
+    if 'tokenization' in stages:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        def tokenize(text: str) -> None:
+            tokenizer(
+                [text] * len(labels),
+                [HYPOTHESIS_TEMPLATE.format(label) for label in labels],
+                truncation='only_first',
+            )
+
+        report['stages']['tokenization'] = run_stage('tokenization', non_empty_texts, tokenize)
+
+    if 'model_inference' in stages:
+        # Batches go through classify_texts, which groups, length-sorts and batches texts as
+        # serving does. Latency is per batch; there is no result cache, so every batch runs the model
+        classifier = ZeroShotClassifier(model_name=model_name, batch_size=batch_size, backend=backend)
+        file_paths_with_text = list(non_empty_texts_per_file)
+        batches = [
+            {file_path: non_empty_texts_per_file[file_path] for file_path in file_paths_with_text[start:start + batch_size]}
+            for start in range(0, len(file_paths_with_text), batch_size)
+        ]
+        report['stages']['model_inference'] = run_stage('model_inference', batches, classifier.classify_texts, files_per_item=len)
+
+    # Tesseract runs as a subprocess, so its memory shows up under the children's usage
+    report['metadata']['peak_child_rss_mb'] = round(_max_rss_bytes(resource.RUSAGE_CHILDREN) / (1024 * 1024), 2)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the classification pipeline.")
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES_PER_DATASET, help="Files sampled from each dataset")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--model-name', default=DEFAULT_MODEL_NAME)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--backend', choices=[backend.value for backend in InferenceBackend], default=InferenceBackend.TORCH.value)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Texts per model batch, each scored against every label")
+    parser.add_argument('--pdf-profile', choices=[profile.value for profile in PdfProfile], default=PdfProfile.RICH.value)
+    parser.add_argument('--image-max-dimension', type=int, default=DEFAULT_IMAGE_MAX_DIMENSION, help="0 disables the limit")
+    parser.add_argument('--image-target-dpi', type=int, default=DEFAULT_IMAGE_TARGET_DPI, help="0 disables the limit")
+    parser.add_argument('--no-grayscale', action='store_true')
+    parser.add_argument('--autocrop', action='store_true')
+    parser.add_argument('--tesseract-psm', type=int, default=None)
+    parser.add_argument('--output', type=Path, default=Path('benchmark_report.json'), help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        samples_per_dataset=args.samples,
+        seed=args.seed,
+        model_name=args.model_name,
+        stages=args.stages,
+        backend=InferenceBackend(args.backend),
+        pdf_profile=PdfProfile(args.pdf_profile),
+        extraction_options=ExtractionOptions(
+            image_max_dimension=args.image_max_dimension or None,
+            image_target_dpi=args.image_target_dpi or None,
+            image_grayscale=not args.no_grayscale,
+            image_autocrop=args.autocrop,
+            tesseract_psm=args.tesseract_psm,
+        ),
+        batch_size=args.batch_size,
+    )
+
+    args.output.write_text(json.dumps(report, indent=2))
+    _log.info(f"Wrote benchmark report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from src.cache.lru_cache import LRUCache
+from src.types.document_type import DocumentType
+
+
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class ClassificationCache:
+    """Memoizes classification results for previously seen document text.
+
+    Entries are keyed on a hash of the text together with everything that affects
+    the prediction: model name, candidate labels and classification threshold.
+    Each entry only holds a fixed-size key, a `DocumentType` and its score, so
+    bounding the entry count also bounds memory use.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._entries: LRUCache[str, Tuple[DocumentType, Optional[float]]] = LRUCache(max_entries)
+
+    @staticmethod
+    def make_key(text: str, model_name: str, labels: List[str], threshold: float) -> str:
+        digest = hashlib.sha256()
+        digest.update(model_name.encode())
+        digest.update(b'\0')
+        digest.update('\0'.join(labels).encode())
+        digest.update(b'\0')
+        digest.update(repr(threshold).encode())
+        digest.update(b'\0')
+        digest.update(text.encode())
+
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[DocumentType]:
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def get_scored(self, key: str) -> Optional[Tuple[DocumentType, Optional[float]]]:
+        """Returns the cached document type together with its score."""
+
+        return self._entries.get(key)
+
+    def put(self, key: str, document_type: DocumentType, score: Optional[float] = None) -> None:
+        self._entries.put(key, (document_type, score))
+
+    def stats(self) -> Dict[str, int]:
+        return self._entries.stats()
@@ -0,0 +1,179 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import BinaryIO, Dict, Optional
+
+from src.cache.lru_cache import LRUCache
+
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class OCRCache:
+    """Content-addressed cache for extracted document text.
+
+    Entries are keyed on a hash of the file bytes plus the extractor backend and
+    version, so renamed or re-uploaded copies of a file share an entry while an OCR
+    upgrade invalidates it. Lookups go through an in-memory LRU tier first and then
+    an optional on-disk tier, which is capped at `max_disk_bytes` and evicts the
+    least recently used files when full.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+    ):
+        self._memory: LRUCache[str, str] = LRUCache(max_memory_entries)
+        self._cache_dir: Optional[Path] = cache_dir
+        self._max_disk_bytes = max_disk_bytes
+
+        # Disk entry sizes in least-recently-used order
+        self._disk_index: OrderedDict[str, int] = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+
+        self.disk_hits = 0
+        self.disk_evictions = 0
+
+        if self._cache_dir is not None:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def hash_file(file_path: Path) -> str:
+        """Returns the SHA-256 hex digest of a file's contents."""
+
+        with open(file_path, 'rb') as file:
+            return OCRCache.hash_stream(file)
+
+    @staticmethod
+    def hash_stream(stream: BinaryIO) -> str:
+        """Returns the SHA-256 hex digest of a stream, read from its current position."""
+
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: stream.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def make_key(content_hash: str, backend_id: str) -> str:
+        return hashlib.sha256(f"{backend_id}:{content_hash}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        text = self._memory.get(key)
+        if text is not None:
+            return text
+
+        text = self._read_disk(key)
+        if text is not None:
+            self.disk_hits += 1
+            self._memory.put(key, text)
+
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        self._memory.put(key, text)
+        self._write_disk(key, text)
+
+    def stats(self) -> Dict[str, int]:
+        memory_stats = self._memory.stats()
+
+        return {
+            'memory_entries': memory_stats['entries'],
+            'memory_hits': memory_stats['hits'],
+            'memory_evictions': memory_stats['evictions'],
+            'disk_entries': len(self._disk_index),
+            'disk_bytes': self._disk_bytes,
+            'disk_hits': self.disk_hits,
+            'disk_evictions': self.disk_evictions,
+            'misses': memory_stats['misses'] - self.disk_hits,
+        }
+
+    def _entry_path(self, key: str) -> Path:
+        return self._cache_dir / key[:2] / f"{key}.txt"
+
+    def _load_disk_index(self) -> None:
+        entries = []
+        for entry_path in self._cache_dir.glob('*/*.txt'):
+            try:
+                stat = entry_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, entry_path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._disk_index[key] = size
+            self._disk_bytes += size
+
+        _log.info(f"Loaded OCR cache index with {len(self._disk_index)} entries ({self._disk_bytes} bytes)")
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if self._cache_dir is None:
+            return None
+
+        entry_path = self._entry_path(key)
+        try:
+            text = entry_path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+
+        # Bump mtime so on-disk eviction order tracks recency, even across restarts
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            pass
+
+        with self._disk_lock:
+            if key in self._disk_index:
+                self._disk_index.move_to_end(key)
+
+        return text
+
+    def _write_disk(self, key: str, text: str) -> None:
+        if self._cache_dir is None:
+            return
+
+        data = text.encode('utf-8')
+        if len(data) > self._max_disk_bytes:
+            return
+
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file and rename so concurrent readers never see partial entries
+        with NamedTemporaryFile(dir=entry_path.parent, delete=False) as temp_file:
+            temp_file.write(data)
+        os.replace(temp_file.name, entry_path)
+
+        with self._disk_lock:
+            self._disk_bytes -= self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(data)
+            self._disk_bytes += len(data)
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        while self._disk_bytes > self._max_disk_bytes and self._disk_index:
+            key, size = self._disk_index.popitem(last=False)
+            self._disk_bytes -= size
+            self.disk_evictions += 1
+
+            try:
+                self._entry_path(key).unlink()
+            except FileNotFoundError:
+                pass
@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 from src.types.classifier_input import ClassifierInput
 from src.types.classifier_output import ClassifierOutput
+from src.types.file_prediction import FilePrediction
 
 
 class Classifier(ABC):
@@ -14,4 +16,15 @@ class Classifier(ABC):
     @abstractmethod
     def classify(self, input: ClassifierInput) -> ClassifierOutput:
         """Takes an input payload with filename and classifies its type."""
-        pass
\ No newline at end of file
+        pass
+
+    def classify_iter(self, input: ClassifierInput) -> Iterator[FilePrediction]:
+        """Yields each file's prediction as soon as it is available.
+
+        The default implementation classifies every file with `classify` before
+        yielding, without scores. Subclasses that can stream results override it.
+        """
+
+        output = self.classify(input)
+        for file_path, document_type in output.output_per_file.items():
+            yield FilePrediction(file_path, document_type, error=output.errors_per_file.get(file_path))
@@ -0,0 +1,232 @@
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Pattern, Tuple, Union
+
+from src import metrics
+from src.cache.ocr_cache import OCRCache
+from src.classifier import Classifier
+from src.classifier.embedding_classifier import EmbeddingClassifier
+from src.classifier.linear_text_model import LinearTextModel
+from src.classifier.zero_shot_classifier import ZeroShotClassifier
+from src.feature_extraction.ocr_extractor import OCRExtractor, error_reason
+from src.resource_scheduler import ResourceScheduler
+from src.types.classifier_input import ClassifierInput
+from src.types.classifier_output import ClassifierOutput
+from src.types.document_type import DocumentType
+from src.types.extraction_options import ExtractionOptions
+
+
+_log = logging.getLogger(__name__)
+
+CONFIDENCE_THRESHOLD = 0.9
+MIN_RULE_MATCHES = 2
+
+STAGES = ('empty', 'rules', 'linear', 'fallback')
+
+# Phrases that rarely appear outside their document type. A file is decided by rules
+# only when enough of one type's patterns match and few of any other's do
+KEYWORD_RULES: Dict[DocumentType, List[str]] = {
+    DocumentType.INVOICE: [
+        r"\binvoice\b",
+        r"\binvoice\s*(no|number|#|date)\b",
+        r"\bbill(ed)?\s+to\b",
+        r"\b(amount|balance|total)\s+due\b",
+        r"\bpayment\s+terms\b",
+    ],
+    DocumentType.BANK_STATEMENT: [
+        r"\bstatement\s+of\s+account\b",
+        r"\b(bank|account)\s+statement\b",
+        r"\b(opening|closing|beginning|ending)\s+balance\b",
+        r"\bstatement\s+period\b",
+        r"\b(deposits|withdrawals)\b",
+    ],
+    DocumentType.DRIVERS_LICENSE: [
+        r"\bdriver'?s?\s+licen[cs]e\b",
+        r"\b(dob|date\s+of\s+birth)\b",
+        r"\b(endorsements?|restrictions?)\b",
+        r"\b(dl|lic)\s*(no|number|#)",
+        r"\bdonor\b",
+    ],
+}
+
+FallbackClassifier = Union[ZeroShotClassifier, EmbeddingClassifier]
+
+
+class CascadeClassifier(Classifier):
+    """Classifies with cheap stages first and escalates only uncertain documents.
+
+    Text is extracted once. Each file then goes through these stages in order and
+    stops at the first one that is confident enough:
+
+    1. Keyword rules: regexes over the extracted text. The confidence is the share
+       of matched patterns that belong to the winning type.
+    2. Linear model: hashed n-gram logistic regression (`LinearTextModel`). The
+       confidence is its predicted probability. Skipped if no model is given.
+    3. Fallback: a transformer classifier, by default a lazily loaded
+       `ZeroShotClassifier`. Its prediction is final.
+
+    Files with no extracted text are UNKNOWN without running any stage. `stats`
+    reports how many files each stage decided.
+
+    Args:
+        linear_model (LinearTextModel): Optional trained linear model.
+        fallback (FallbackClassifier): Classifier for files the cheap stages are unsure of.
+        confidence_threshold (float): Minimum cheap-stage confidence to skip the fallback.
+        rules (Dict[DocumentType, List[str]]): Regex patterns per document type, matched
+            case-insensitively.
+        min_rule_matches (int): Patterns of one type that must match before rules decide.
+        ocr_workers (int): Worker processes used for OCR. Defaults to the applied
+            `ThreadBudget`'s, or 1 when none is.
+        ocr_cache (OCRCache): Optional cache of extracted text.
+        extraction_options (ExtractionOptions): Extraction settings, e.g. the PDF profile.
+            A request's `pdf_profile` overrides the profile set here.
+    """
+
+    def __init__(
+        self,
+        linear_model: Optional[LinearTextModel] = None,
+        fallback: Optional[FallbackClassifier] = None,
+        confidence_threshold: float = CONFIDENCE_THRESHOLD,
+        rules: Dict[DocumentType, List[str]] = KEYWORD_RULES,
+        min_rule_matches: int = MIN_RULE_MATCHES,
+        ocr_workers: Optional[int] = None,
+        ocr_cache: Optional[OCRCache] = None,
+        extraction_options: Optional[ExtractionOptions] = None,
+    ):
+        self._linear_model = linear_model
+        self._fallback: FallbackClassifier = fallback or ZeroShotClassifier(ocr_cache=ocr_cache, lazy=True)
+        self._confidence_threshold = confidence_threshold
+        self._rules: Dict[DocumentType, List[Pattern]] = {
+            doc_type: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+            for doc_type, patterns in rules.items()
+        }
+        self._min_rule_matches = min_rule_matches
+        self._ocr_workers = ocr_workers
+        self._ocr_cache = ocr_cache
+        self._extraction_options = extraction_options or ExtractionOptions()
+
+        self._stage_counts: Dict[str, int] = {stage: 0 for stage in STAGES}
+        self._stats_lock = threading.Lock()
+
+    def classify(self, input: ClassifierInput) -> ClassifierOutput:
+        _log.info(f"Classifying files {input.files}")
+
+        deadline = input.deadline()
+        errors: Dict[Path, str] = {}
+
+        # Use OCR to get text from files
+        try:
+            text_per_file: Dict[Path, str] = OCRExtractor.extract_all_documents(
+                paths_list=input.files,
+                dir_path=input.dir_path,
+                num_workers=ResourceScheduler.ocr_workers(self._ocr_workers),
+                cache=self._ocr_cache,
+                documents=input.documents,
+                options=self._extraction_options.with_pdf_profile(input.pdf_profile),
+                errors=errors,
+                deadline=deadline,
+            )
+        except Exception as error:
+            _log.exception(f"Failed to run OCR extraction on file {input.files}. Returning UNKNOWN")
+            files: List[Path] = input.files or [document.name for document in input.documents or []]
+            return ClassifierOutput(
+                output_per_file={file: DocumentType.UNKNOWN for file in files},
+                errors_per_file={file: error_reason(error) for file in files},
+            )
+
+        outputs_per_file: Dict[Path, DocumentType] = self.classify_texts(text_per_file, deadline=deadline, errors=errors)
+
+        _log.info(f"Completed classifying {len(outputs_per_file)} files")
+        return ClassifierOutput(output_per_file=outputs_per_file, errors_per_file=errors)
+
+    def classify_texts(
+        self,
+        text_per_file: Dict[Path, str],
+        deadline: Optional[float] = None,
+        errors: Optional[Dict[Path, str]] = None,
+    ) -> Dict[Path, DocumentType]:
+        """Runs each extracted text through the cascade.
+
+        Args:
+            text_per_file (Dict[Path, str]): Extracted text keyed by file path.
+            deadline (float): Optional `time.monotonic()` time by which the fallback's
+                inference must end.
+            errors (Dict[Path, str]): Optional dict filled with the reason each file the
+                fallback could not classify is UNKNOWN.
+
+        Returns:
+            Dict[Path, DocumentType]: Predicted document type per file, in input order.
+        """
+
+        outputs_per_file: Dict[Path, DocumentType] = {}
+        undecided: Dict[Path, str] = {}
+
+        for file_path, text in text_per_file.items():
+            if not text:
+                _log.warning(f"No text extracted from file {file_path}. Returning UNKNOWN")
+                outputs_per_file[file_path] = DocumentType.UNKNOWN
+                self._record('empty')
+                continue
+
+            document_type, confidence = self._match_rules(text)
+            if document_type is not None and confidence >= self._confidence_threshold:
+                _log.info(f"Rules classified {file_path} as {document_type.value} with confidence {confidence}")
+                outputs_per_file[file_path] = document_type
+                self._record('rules')
+                continue
+
+            undecided[file_path] = text
+
+        if undecided and self._linear_model is not None:
+            predictions = self._linear_model.predict(list(undecided.values()))
+
+            for file_path, (document_type, confidence) in zip(list(undecided), predictions):
+                if confidence >= self._confidence_threshold:
+                    _log.info(f"Linear model classified {file_path} as {document_type.value} with confidence {confidence}")
+                    outputs_per_file[file_path] = document_type
+                    self._record('linear')
+                    del undecided[file_path]
+
+        if undecided:
+            _log.info(f"Escalating {len(undecided)} files to the fallback classifier")
+            outputs_per_file.update(self._fallback.classify_texts(undecided, deadline=deadline, errors=errors))
+            self._record('fallback', len(undecided))
+
+        return {file_path: outputs_per_file[file_path] for file_path in text_per_file}
+
+    def stats(self) -> Dict[str, float]:
+        """Returns how many files each stage decided, and its share of all files."""
+
+        with self._stats_lock:
+            counts = dict(self._stage_counts)
+
+        total = sum(counts.values())
+        stats: Dict[str, float] = {'total': total}
+        for stage, count in counts.items():
+            stats[stage] = count
+            stats[f'{stage}_rate'] = count / total if total else 0.0
+
+        return stats
+
+    def _match_rules(self, text: str) -> Tuple[Optional[DocumentType], float]:
+        matches_per_type: Dict[DocumentType, int] = {
+            doc_type: sum(1 for pattern in patterns if pattern.search(text))
+            for doc_type, patterns in self._rules.items()
+        }
+
+        total_matches = sum(matches_per_type.values())
+        if total_matches == 0:
+            return None, 0.0
+
+        document_type = max(matches_per_type, key=matches_per_type.get)
+        if matches_per_type[document_type] < self._min_rule_matches:
+            return None, 0.0
+
+        return document_type, matches_per_type[document_type] / total_matches
+
+    def _record(self, stage: str, count: int = 1) -> None:
+        with self._stats_lock:
+            self._stage_counts[stage] += count
+        metrics.CASCADE_DECISIONS.labels(stage=stage).inc(count)
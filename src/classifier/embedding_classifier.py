@@ -0,0 +1,298 @@
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.cache.ocr_cache import OCRCache
+from src.classifier import Classifier
+from src.dataset.labeled_texts import load_labeled_texts
+from src.feature_extraction.ocr_extractor import DEADLINE_EXCEEDED, OCRExtractor, error_reason
+from src.resource_scheduler import ResourceScheduler
+from src.types.classifier_input import ClassifierInput
+from src.types.classifier_output import ClassifierOutput
+from src.types.document_type import DocumentType
+from src.types.extraction_options import ExtractionOptions
+from src.types.model_state import ModelState
+
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_MAX_LENGTH = 512
+
+# Cosine similarity below which the closest label is not trusted
+SIMILARITY_THRESHOLD = 0.25
+
+# Short descriptions embedded for each label. UNKNOWN has none: it is predicted when
+# no other label is similar enough
+LABEL_DESCRIPTIONS: Dict[DocumentType, str] = {
+    DocumentType.DRIVERS_LICENSE: "A driver's license identity card with a license number, date of birth, address and expiry date.",
+    DocumentType.BANK_STATEMENT: "A bank account statement listing the opening and closing balance, deposits, withdrawals and transactions.",
+    DocumentType.INVOICE: "An invoice billing a customer, with an invoice number, line items, tax, total amount due and payment terms.",
+}
+
+Encoder = Callable[[List[str]], np.ndarray]
+
+
+def load_encoder(model_name: str, batch_size: int = DEFAULT_BATCH_SIZE, max_length: int = DEFAULT_MAX_LENGTH) -> Encoder:
+    """Loads a HuggingFace bi-encoder, importing transformers (and torch) on first use.
+
+    Args:
+        model_name (str): HuggingFace model to load with `AutoModel`.
+        batch_size (int): Maximum texts per forward pass.
+        max_length (int): Token limit per text. Longer texts are truncated.
+
+    Returns:
+        Encoder: Maps a list of texts to a matrix of L2-normalized, mean-pooled embeddings.
+    """
+
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    def encode(texts: List[str]) -> np.ndarray:
+        embeddings: List[np.ndarray] = []
+
+        for start in range(0, len(texts), batch_size):
+            tokens = tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=max_length,
+                return_tensors='pt',
+            )
+
+            with torch.inference_mode():
+                hidden_states = model(**tokens).last_hidden_state
+
+            # Mean-pool over real tokens only, so padding does not dilute the embedding
+            mask = tokens['attention_mask'].unsqueeze(-1).to(hidden_states.dtype)
+            pooled = (hidden_states * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+
+            embeddings.append(pooled.cpu().numpy())
+
+        return np.concatenate(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+
+    return encode
+
+
+class EmbeddingClassifier(Classifier):
+    """Classifies documents by embedding similarity with a bi-encoder.
+
+    The zero-shot NLI pipeline runs one cross-encoder pass per candidate label. This
+    classifier instead encodes each document once and compares it with one prototype
+    embedding per label. So the cost per document does not grow as labels are added.
+
+    Each label prototype is the normalized mean of its description embedding and the
+    embeddings of any few-shot `prototype_texts` for that label. Prototypes are
+    computed once when the model loads and reused for every request. If the best
+    cosine similarity falls below `similarity_threshold`, the result is UNKNOWN.
+
+    Args:
+        model_name (str): HuggingFace bi-encoder model. Embeddings are mean-pooled.
+        batch_size (int): Maximum texts per forward pass.
+        similarity_threshold (float): Minimum cosine similarity for a label to be predicted.
+        prototype_texts (Dict[DocumentType, List[str]]): Optional example texts per label,
+            e.g. from `build_prototype_texts`.
+        ocr_workers (int): Worker processes used for OCR. Defaults to the applied
+            `ThreadBudget`'s, or 1 when none is.
+        ocr_cache (OCRCache): Optional cache of extracted text.
+        extraction_options (ExtractionOptions): Extraction settings, e.g. the PDF profile.
+            A request's `pdf_profile` overrides the profile set here.
+        lazy (bool): Defer loading the model until `load`, `warmup` or the first classification.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+        prototype_texts: Optional[Dict[DocumentType, List[str]]] = None,
+        ocr_workers: Optional[int] = None,
+        ocr_cache: Optional[OCRCache] = None,
+        extraction_options: Optional[ExtractionOptions] = None,
+        lazy: bool = False,
+    ):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+
+        self._model_name = model_name
+        self._batch_size = batch_size
+        self._similarity_threshold = similarity_threshold
+        self._prototype_texts: Dict[DocumentType, List[str]] = prototype_texts or {}
+        self._ocr_workers = ocr_workers
+        self._ocr_cache = ocr_cache
+        self._extraction_options = extraction_options or ExtractionOptions()
+
+        self._encoder: Optional[Encoder] = None
+        self._labels: List[DocumentType] = list(LABEL_DESCRIPTIONS)
+        self._label_embeddings: Optional[np.ndarray] = None
+        self._state = ModelState.NOT_LOADED
+        self._load_lock = threading.Lock()
+
+        if not lazy:
+            self.load()
+
+    @property
+    def state(self) -> ModelState:
+        return self._state
+
+    def load(self) -> None:
+        """Loads the encoder and embeds the label prototypes. Safe to call from multiple threads."""
+
+        with self._load_lock:
+            if self._encoder is not None:
+                return
+
+            _log.info(f"Loading embedding model {self._model_name}")
+            self._state = ModelState.LOADING
+            try:
+                encoder = load_encoder(self._model_name, batch_size=self._batch_size)
+                self._label_embeddings = self._embed_prototypes(encoder)
+            except Exception:
+                self._state = ModelState.FAILED
+                raise
+
+            self._encoder = encoder
+            self._state = ModelState.READY
+            _log.info(f"Loaded embedding model {self._model_name} with {len(self._labels)} label prototypes")
+
+    def warmup(self) -> None:
+        """Loads the model and runs a dummy encoding to pay one-off start-up costs."""
+
+        self.load()
+
+        _log.info("Warming up embedding model")
+        self._encoder([LABEL_DESCRIPTIONS[DocumentType.INVOICE]])
+
+    def _embed_prototypes(self, encoder: Encoder) -> np.ndarray:
+        prototypes: List[np.ndarray] = []
+
+        for doc_type in self._labels:
+            texts = [LABEL_DESCRIPTIONS[doc_type]] + [text for text in self._prototype_texts.get(doc_type, []) if text]
+            _log.info(f"Embedding {len(texts)} prototype texts for label {doc_type.value}")
+
+            prototype = np.asarray(encoder(texts)).mean(axis=0)
+            prototypes.append(prototype / max(np.linalg.norm(prototype), 1e-12))
+
+        return np.stack(prototypes)
+
+    def classify(self, input: ClassifierInput) -> ClassifierOutput:
+        _log.info(f"Classifying files {input.files}")
+
+        deadline = input.deadline()
+        errors: Dict[Path, str] = {}
+
+        # Use OCR to get text from files
+        try:
+            text_per_file: Dict[Path, str] = OCRExtractor.extract_all_documents(
+                paths_list=input.files,
+                dir_path=input.dir_path,
+                num_workers=ResourceScheduler.ocr_workers(self._ocr_workers),
+                cache=self._ocr_cache,
+                documents=input.documents,
+                options=self._extraction_options.with_pdf_profile(input.pdf_profile),
+                errors=errors,
+                deadline=deadline,
+            )
+        except Exception as error:
+            _log.exception(f"Failed to run OCR extraction on file {input.files}. Returning UNKNOWN")
+            files: List[Path] = input.files or [document.name for document in input.documents or []]
+            return ClassifierOutput(
+                output_per_file={file: DocumentType.UNKNOWN for file in files},
+                errors_per_file={file: error_reason(error) for file in files},
+            )
+
+        outputs_per_file: Dict[Path, DocumentType] = self.classify_texts(text_per_file, deadline=deadline, errors=errors)
+
+        _log.info(f"Completed classifying {len(outputs_per_file)} files")
+        return ClassifierOutput(output_per_file=outputs_per_file, errors_per_file=errors)
+
+    def classify_texts(
+        self,
+        text_per_file: Dict[Path, str],
+        deadline: Optional[float] = None,
+        errors: Optional[Dict[Path, str]] = None,
+    ) -> Dict[Path, DocumentType]:
+        """Embeds every distinct non-empty text, a batch at a time, and picks the closest label.
+
+        The deadline is checked before each batch. Texts in batches not started by
+        then are UNKNOWN.
+
+        Args:
+            text_per_file (Dict[Path, str]): Extracted text keyed by file path.
+            deadline (float): Optional `time.monotonic()` time by which inference must end.
+            errors (Dict[Path, str]): Optional dict filled with the reason each file that
+                missed the deadline is UNKNOWN.
+
+        Returns:
+            Dict[Path, DocumentType]: Predicted document type per file, in input order.
+        """
+
+        outputs_per_file: Dict[Path, DocumentType] = {}
+        # Files grouped by text, so copies of a document are embedded once
+        files_per_text: Dict[str, List[Path]] = {}
+
+        for file_path, text in text_per_file.items():
+            outputs_per_file[file_path] = DocumentType.UNKNOWN
+            if text:
+                files_per_text.setdefault(text, []).append(file_path)
+            else:
+                _log.warning(f"No text extracted from file {file_path}. Returning UNKNOWN")
+
+        if not files_per_text:
+            return outputs_per_file
+
+        self.load()
+
+        pending: List[str] = list(files_per_text)
+        _log.info(f"Embedding {len(pending)} texts with batch size {self._batch_size}")
+
+        for start in range(0, len(pending), self._batch_size):
+            if deadline is not None and time.monotonic() >= deadline:
+                _log.warning(f"Deadline exceeded before embedding {len(pending) - start} texts, returning UNKNOWN")
+                if errors is not None:
+                    for text in pending[start:]:
+                        errors.update((file_path, DEADLINE_EXCEEDED) for file_path in files_per_text[text])
+                break
+
+            self._classify_batch(pending[start:start + self._batch_size], files_per_text, outputs_per_file)
+
+        return outputs_per_file
+
+    def _classify_batch(self, batch: List[str], files_per_text: Dict[str, List[Path]], outputs_per_file: Dict[Path, DocumentType]) -> None:
+        embeddings = np.asarray(self._encoder(batch))
+
+        # Embeddings and prototypes are unit length, so the dot product is the cosine similarity
+        similarities = embeddings @ self._label_embeddings.T
+
+        for text, scores in zip(batch, similarities):
+            best_index = int(np.argmax(scores))
+            best_score = float(scores[best_index])
+
+            if best_score < self._similarity_threshold:
+                document_type = DocumentType.UNKNOWN
+            else:
+                document_type = self._labels[best_index]
+
+            _log.info(f"Classified doc as {document_type.value} with similarity {best_score}")
+            for file_path in files_per_text[text]:
+                outputs_per_file[file_path] = document_type
+
+    @staticmethod
+    def build_prototype_texts(
+        samples_per_type: int,
+        ocr_cache: Optional[OCRCache] = None,
+        num_workers: int = 1,
+    ) -> Dict[DocumentType, List[str]]:
+        """Extracts few-shot prototype texts from the bundled datasets."""
+
+        return load_labeled_texts(samples_per_type, ocr_cache=ocr_cache, num_workers=num_workers)
@@ -8,7 +8,12 @@ from src.types.classifier_output import ClassifierOutput
 
 class FilenameClassifier(Classifier):
     def classify(self, input: ClassifierInput) -> ClassifierOutput:
-        file_list: List[Path] = input.files if input.files else list(input.dir_path.glob("*"))
+        if input.files:
+            file_list: List[Path] = input.files
+        elif input.documents:
+            file_list = [document.name for document in input.documents]
+        else:
+            file_list = list(input.dir_path.glob("*"))
 
         output_per_file: Dict[Path, DocumentType] = {}
         for file in file_list:
@@ -0,0 +1,228 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src import metrics
+
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 16
+DEFAULT_MAX_WAIT_MS = 10.0
+DEFAULT_MAX_QUEUE_SIZE = 1024
+
+_SHUTDOWN = object()
+
+
+class SchedulerShutdownError(Exception):
+    """Raised for texts submitted to, or still queued in, a scheduler that has shut down."""
+
+
+class InferenceScheduler:
+    """Coalesces texts from concurrent callers into shared model batches.
+
+    Callers submit texts from any thread and get one future per text. A single
+    scheduler thread takes the first queued text, then keeps collecting until it
+    has `max_batch_size` texts or `max_wait_ms` has passed, and runs them through
+    `run_batch` in one call. Each result is routed back to its own future, so
+    concurrent requests share forward passes instead of competing for the same
+    torch threads with batches of one.
+
+    The queue holds at most `max_queue_size` texts. When it is full, `submit`
+    blocks, which pushes back on callers instead of growing memory.
+
+    Args:
+        run_batch (Callable): Runs the model over a list of texts and returns one
+            result per text, in order.
+        max_batch_size (int): Maximum texts per model call.
+        max_wait_ms (float): How long to wait for a batch to fill once it has at
+            least one text.
+        max_queue_size (int): Maximum texts waiting for the model.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[str]], List[Any]],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be positive, got {max_batch_size}")
+        if max_wait_ms < 0:
+            raise ValueError(f"max_wait_ms must not be negative, got {max_wait_ms}")
+
+        self._run_batch = run_batch
+        self._max_batch_size = max_batch_size
+        self._max_wait_s = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+
+        self._batches = 0
+        self._batched_texts = 0
+        self._stats_lock = threading.Lock()
+
+        # The thread starts on first use, so constructing a scheduler before forking
+        # worker processes does not leave a running thread in the parent
+        self._shutdown = False
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, texts: List[str]) -> List[Future]:
+        """Queues texts for inference.
+
+        Args:
+            texts (List[str]): Texts to classify.
+
+        Returns:
+            List[Future]: One future per text, resolving to its `run_batch` result.
+        """
+
+        self._ensure_started()
+
+        futures: List[Future] = []
+        for text in texts:
+            future: Future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+
+        metrics.SCHEDULER_QUEUE_DEPTH.set(self._queue.qsize())
+        return futures
+
+    def run(self, texts: List[str], timeout_s: Optional[float] = None) -> List[Any]:
+        """Queues texts for inference and waits for all of their results.
+
+        Args:
+            texts (List[str]): Texts to classify.
+            timeout_s (float): Optional limit on the total wait.
+
+        Raises:
+            TimeoutError: If the results are not all ready in time. Texts that have not
+                reached the model yet are cancelled, so they do not use a batch slot.
+        """
+
+        futures = self.submit(texts)
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+
+        try:
+            return [
+                future.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+                for future in futures
+            ]
+        except TimeoutError:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            batches, batched_texts = self._batches, self._batched_texts
+
+        return {
+            'queue_depth': self.queue_depth,
+            'batches': batches,
+            'texts': batched_texts,
+            'mean_batch_size': batched_texts / batches if batches else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """Stops the scheduler thread after the batch in progress. Queued texts fail."""
+
+        with self._thread_lock:
+            self._shutdown = True
+            if self._thread is None:
+                return
+
+        self._queue.put(_SHUTDOWN)
+        self._thread.join()
+
+    def _ensure_started(self) -> None:
+        with self._thread_lock:
+            if self._shutdown:
+                raise SchedulerShutdownError("Inference scheduler has shut down")
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="inference-scheduler", daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            batch, shutting_down = self._next_batch()
+            if batch:
+                self._run(batch)
+            if shutting_down:
+                break
+
+        self._fail_queued()
+
+    def _next_batch(self) -> Tuple[List[Tuple[str, Future]], bool]:
+        item = self._queue.get()
+        if item is _SHUTDOWN:
+            return [], True
+
+        batch: List[Tuple[str, Future]] = [item]
+
+        # The fill window starts when the first text arrives, so an idle scheduler adds no delay
+        deadline = time.monotonic() + self._max_wait_s
+        while len(batch) < self._max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            if item is _SHUTDOWN:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _run(self, batch: List[Tuple[str, Future]]) -> None:
+        # Skip texts whose caller cancelled while they were queued
+        batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        metrics.SCHEDULER_QUEUE_DEPTH.set(self._queue.qsize())
+        if not batch:
+            return
+
+        # Sort by length so the model's sub-batches hold similarly sized sequences
+        batch.sort(key=lambda item: len(item[0]))
+
+        _log.info(f"Running scheduled batch of {len(batch)} texts")
+        metrics.SCHEDULER_BATCH_SIZE.observe(len(batch))
+        with self._stats_lock:
+            self._batches += 1
+            self._batched_texts += len(batch)
+
+        try:
+            results = self._run_batch([text for text, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Model returned {len(results)} results for a batch of {len(batch)} texts")
+        except Exception as error:
+            _log.exception(f"Scheduled batch of {len(batch)} texts failed")
+            for _, future in batch:
+                future.set_exception(error)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _fail_queued(self) -> None:
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if item is not _SHUTDOWN and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(SchedulerShutdownError("Inference scheduler has shut down"))
+
+        metrics.SCHEDULER_QUEUE_DEPTH.set(0)
@@ -0,0 +1,163 @@
+import argparse
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from src.cache.ocr_cache import OCRCache
+from src.constants import LINEAR_MODEL_PATH, OCR_CACHE_DIR
+from src.dataset.labeled_texts import load_labeled_texts
+from src.types.document_type import DocumentType
+
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_TRAINING_SAMPLES = 50
+
+# Hashing needs no fitted vocabulary, so the saved model is just the regression weights
+# and the in-domain check's class centroids
+_N_FEATURES = 2 ** 18
+
+# A text is out of domain when it is less than half as similar to its predicted type's
+# centroid as all but 5% of that type's training texts. Training texts are part of the
+# centroid, so unseen documents of the type score lower than they do
+DEFAULT_OUT_OF_DOMAIN_QUANTILE = 0.05
+OUT_OF_DOMAIN_MARGIN = 0.5
+
+
+class LinearTextModel:
+    """Logistic regression over hashed word n-grams of extracted text.
+
+    Takes well under a millisecond per document on CPU, so it can answer the easy
+    cases before any transformer runs. Train it from the bundled datasets with
+    `python -m src.classifier.linear_text_model`.
+
+    The regression has no class for other documents, and softmax makes it
+    confident about them anyway. So each prediction is also checked against the
+    centroid of the predicted type's training texts: a text far less similar to
+    it than that type's training texts is out of domain, and is predicted
+    UNKNOWN with confidence 0.
+    """
+
+    def __init__(
+        self,
+        model: Optional[LogisticRegression] = None,
+        centroids: Optional[np.ndarray] = None,
+        min_similarities: Optional[np.ndarray] = None,
+    ):
+        self._vectorizer = HashingVectorizer(
+            n_features=_N_FEATURES,
+            ngram_range=(1, 2),
+            alternate_sign=False,
+            norm='l2',
+        )
+        self._model = model
+        # One row per class, in the order of the model's classes_
+        self._centroids = centroids
+        self._min_similarities = min_similarities
+
+    @classmethod
+    def train(
+        cls,
+        texts_per_type: Dict[DocumentType, List[str]],
+        out_of_domain_quantile: float = DEFAULT_OUT_OF_DOMAIN_QUANTILE,
+    ) -> 'LinearTextModel':
+        """Fits a model on labeled texts.
+
+        Args:
+            texts_per_type (Dict[DocumentType, List[str]]): Training texts per document type.
+            out_of_domain_quantile (float): Quantile of each type's training similarities
+                that, less the margin, a text must reach to count as in domain.
+
+        Returns:
+            LinearTextModel: The fitted model.
+        """
+
+        texts: List[str] = []
+        labels: List[str] = []
+        for doc_type, type_texts in texts_per_type.items():
+            texts += type_texts
+            labels += [doc_type.value] * len(type_texts)
+
+        if len(set(labels)) < 2:
+            raise ValueError(f"Training needs texts for at least 2 document types, got {sorted(set(labels))}")
+
+        linear_model = cls()
+        features = linear_model._vectorizer.transform(texts)
+        model = LogisticRegression(max_iter=1000)
+        model.fit(features, labels)
+        linear_model._model = model
+
+        label_array = np.array(labels)
+        centroids = np.zeros((len(model.classes_), _N_FEATURES))
+        min_similarities = np.zeros(len(model.classes_))
+        for index, label in enumerate(model.classes_):
+            class_features = features[label_array == label]
+            centroid = np.asarray(class_features.mean(axis=0)).ravel()
+            centroids[index] = centroid / (np.linalg.norm(centroid) or 1.0)
+            min_similarities[index] = OUT_OF_DOMAIN_MARGIN * np.quantile(class_features @ centroids[index], out_of_domain_quantile)
+        linear_model._centroids = centroids
+        linear_model._min_similarities = min_similarities
+
+        _log.info(f"Trained linear text model on {len(texts)} texts")
+        return linear_model
+
+    @classmethod
+    def load(cls, model_path: Path) -> 'LinearTextModel':
+        saved = joblib.load(model_path)
+
+        if isinstance(saved, LogisticRegression):
+            _log.warning(f"Linear model {model_path} has no in-domain check and may be trained on evaluation files, retrain it")
+            return cls(model=saved)
+
+        return cls(model=saved['model'], centroids=saved['centroids'], min_similarities=saved['min_similarities'])
+
+    def save(self, model_path: Path) -> None:
+        model_path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({'model': self._model, 'centroids': self._centroids, 'min_similarities': self._min_similarities}, model_path)
+
+    def predict(self, texts: List[str]) -> List[Tuple[DocumentType, float]]:
+        """Predicts the most likely document type and its probability for each text.
+
+        Out-of-domain texts are predicted UNKNOWN with confidence 0.
+        """
+
+        if self._model is None:
+            raise ValueError("Linear text model has not been trained")
+        if not texts:
+            return []
+
+        features = self._vectorizer.transform(texts)
+        probabilities = self._model.predict_proba(features)
+        classes: List[DocumentType] = [DocumentType(label) for label in self._model.classes_]
+        similarities = features @ self._centroids.T if self._centroids is not None else None
+
+        predictions: List[Tuple[DocumentType, float]] = []
+        for row_index, row in enumerate(probabilities):
+            best_index = int(row.argmax())
+            if similarities is not None and similarities[row_index, best_index] < self._min_similarities[best_index]:
+                predictions.append((DocumentType.UNKNOWN, 0.0))
+                continue
+            predictions.append((classes[best_index], float(row[best_index])))
+
+        return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the linear text model on the bundled datasets.")
+    parser.add_argument('--samples', type=int, default=DEFAULT_TRAINING_SAMPLES, help="Files sampled from each dataset")
+    parser.add_argument('--output', type=Path, default=Path(LINEAR_MODEL_PATH))
+    args = parser.parse_args()
+
+    texts_per_type = load_labeled_texts(args.samples, ocr_cache=OCRCache(cache_dir=Path(OCR_CACHE_DIR)))
+
+    LinearTextModel.train(texts_per_type).save(args.output)
+    _log.info(f"Saved linear text model to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import argparse
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+import numpy as np
+
+from src import metrics
+from src.constants import ONNX_MODEL_DIR
+from src.resource_scheduler import ResourceScheduler
+
+
+_log = logging.getLogger(__name__)
+
+ONNX_FILE_NAME = "model.onnx"
+DEFAULT_OPSET = 17
+
+# Matches the HuggingFace zero-shot pipeline's default hypothesis
+HYPOTHESIS_TEMPLATE = "This example is {}."
+
+
+def default_onnx_dir(model_name: str) -> Path:
+    return Path(ONNX_MODEL_DIR, model_name.replace('/', '--'))
+
+
+def export_onnx(model_name: str, output_dir: Path, opset: int = DEFAULT_OPSET) -> Path:
+    """Exports a sequence classification model to ONNX from the local HuggingFace cache.
+
+    Runs fully offline: the weights must already have been downloaded, e.g. by
+    running the classifier once. The tokenizer and config are saved next to the
+    graph so that inference does not need the original checkpoint.
+
+    Args:
+        model_name (str): HuggingFace model name, resolved from the local cache only.
+        output_dir (Path): Directory to write the graph, tokenizer and config to.
+        opset (int): ONNX opset version.
+
+    Returns:
+        Path: Path of the exported graph.
+    """
+
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, local_files_only=True)
+    model.eval()
+
+    sample = tokenizer(["An example premise."], [HYPOTHESIS_TEMPLATE.format("invoice")], return_tensors='pt')
+    input_names: List[str] = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    onnx_path = output_dir / ONNX_FILE_NAME
+
+    _log.info(f"Exporting {model_name} to {onnx_path}")
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(onnx_path),
+            input_names=input_names,
+            output_names=['logits'],
+            dynamic_axes={
+                **{name: {0: 'batch', 1: 'sequence'} for name in input_names},
+                'logits': {0: 'batch'},
+            },
+            opset_version=opset,
+        )
+
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+
+    return onnx_path
+
+
+class OnnxZeroShotPipeline:
+    """Runs NLI zero-shot classification on an exported ONNX graph with ONNX Runtime.
+
+    A drop-in replacement for the HuggingFace zero-shot pipeline's call signature
+    and output format. Each text is paired with one hypothesis per label, and a
+    softmax over the entailment logits across labels gives the scores, sorted in
+    descending order. Unlike the HuggingFace pipeline, whose `batch_size` counts
+    premise/hypothesis pairs, `batch_size` here counts texts.
+
+    Args:
+        session: ONNX Runtime inference session.
+        tokenizer: HuggingFace tokenizer saved with the graph.
+        entailment_id (int): Index of the entailment class in the model's logits.
+    """
+
+    def __init__(self, session: Any, tokenizer: Any, entailment_id: int):
+        self._session = session
+        self._tokenizer = tokenizer
+        self._entailment_id = entailment_id
+        self._input_names: List[str] = [model_input.name for model_input in session.get_inputs()]
+
+    @classmethod
+    def load(cls, model_dir: Path) -> 'OnnxZeroShotPipeline':
+        """Loads a graph written by `export_onnx`, importing onnxruntime on first use."""
+
+        import onnxruntime
+        from transformers import AutoConfig, AutoTokenizer
+
+        onnx_path = model_dir / ONNX_FILE_NAME
+        if not onnx_path.exists():
+            raise FileNotFoundError(f"No ONNX model at {onnx_path}. Export one with `python -m src.classifier.onnx_backend`")
+
+        config = AutoConfig.from_pretrained(model_dir)
+        entailment_ids = [index for label, index in config.label2id.items() if label.lower().startswith('entail')]
+        if not entailment_ids:
+            raise ValueError(f"Model config at {model_dir} has no entailment label: {config.label2id}")
+
+        # ONNX Runtime sizes its thread pool when the session is created, for all cores unless budgeted
+        session_options = onnxruntime.SessionOptions()
+        budget = ResourceScheduler.budget()
+        if budget is not None:
+            session_options.intra_op_num_threads = budget.model_threads
+            session_options.inter_op_num_threads = budget.model_interop_threads
+
+        session = onnxruntime.InferenceSession(str(onnx_path), sess_options=session_options, providers=['CPUExecutionProvider'])
+        tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        return cls(session, tokenizer, entailment_ids[0])
+
+    def __call__(
+        self,
+        texts: Union[str, List[str]],
+        candidate_labels: List[str],
+        batch_size: int = 1,
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        # Each model batch holds whole texts, so every label of a text is scored together
+        texts_per_batch = max(1, batch_size)
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(texts), texts_per_batch):
+            results += self._run_batch(texts[start:start + texts_per_batch], candidate_labels)
+
+        return results[0] if single else results
+
+    def _run_batch(self, texts: List[str], candidate_labels: List[str]) -> List[Dict[str, Any]]:
+        premises = [text for text in texts for _ in candidate_labels]
+        hypotheses = [HYPOTHESIS_TEMPLATE.format(label) for _ in texts for label in candidate_labels]
+
+        with metrics.timed(metrics.TOKENIZATION_SECONDS):
+            tokens = self._tokenizer(
+                premises,
+                hypotheses,
+                padding=True,
+                truncation='only_first',
+                return_tensors='np',
+            )
+
+        feed = {name: np.asarray(tokens[name], dtype=np.int64) for name in self._input_names}
+
+        with metrics.timed(metrics.MODEL_FORWARD_SECONDS):
+            logits = self._session.run(None, feed)[0]
+
+        # Softmax over labels of each text's entailment logits, as the pipeline does for single-label
+        entailment_logits = np.asarray(logits)[:, self._entailment_id].reshape(len(texts), len(candidate_labels))
+        exp_logits = np.exp(entailment_logits - entailment_logits.max(axis=1, keepdims=True))
+        scores = exp_logits / exp_logits.sum(axis=1, keepdims=True)
+
+        results: List[Dict[str, Any]] = []
+        for text, text_scores in zip(texts, scores):
+            order = np.argsort(-text_scores)
+            results.append({
+                'sequence': text,
+                'labels': [candidate_labels[index] for index in order],
+                'scores': [float(text_scores[index]) for index in order],
+            })
+
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a cached zero-shot model to ONNX for the onnx backend.")
+    parser.add_argument('--model-name', default="MoritzLaurer/deberta-v3-large-zeroshot-v2.0")
+    parser.add_argument('--output-dir', type=Path, default=None, help="Defaults to a per-model directory under models/onnx")
+    parser.add_argument('--opset', type=int, default=DEFAULT_OPSET)
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or default_onnx_dir(args.model_name)
+    onnx_path = export_onnx(args.model_name, output_dir, opset=args.opset)
+    _log.info(f"Exported ONNX model to {onnx_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_MAX_WAIT_S = 0.05
+
+_END_OF_STREAM = object()
+
+
+class _StageError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class StagedPipeline:
+    """Runs OCR and model inference as concurrent stages.
+
+    An extraction thread pulls `(path, text)` pairs from `extract_stage` and pushes
+    them onto a bounded queue. The calling thread drains that queue in micro-batches
+    of up to `micro_batch_size` files and hands each one to `classify_stage`. When
+    the model falls behind, the queue fills up and extraction blocks, so memory stays
+    flat no matter how many files are streamed through.
+
+    Args:
+        extract_stage (Callable): Returns an iterator of extracted `(path, text)` pairs.
+        classify_stage (Callable): Classifies a micro-batch of extracted texts, returning
+            one result per file, e.g. its `DocumentType`.
+        micro_batch_size (int): Maximum files per model call.
+        queue_size (int): Maximum extracted texts waiting for the model.
+        max_wait_s (float): How long to wait for a micro-batch to fill once it has
+            at least one file.
+    """
+
+    def __init__(
+        self,
+        extract_stage: Callable[[], Iterator[Tuple[Path, str]]],
+        classify_stage: Callable[[Dict[Path, str]], Dict[Path, Any]],
+        micro_batch_size: int,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        max_wait_s: float = DEFAULT_MAX_WAIT_S,
+    ):
+        if micro_batch_size < 1:
+            raise ValueError(f"micro_batch_size must be positive, got {micro_batch_size}")
+        if queue_size < 1:
+            raise ValueError(f"queue_size must be positive, got {queue_size}")
+
+        self._extract_stage = extract_stage
+        self._classify_stage = classify_stage
+        self._micro_batch_size = micro_batch_size
+        self._queue_size = queue_size
+        self._max_wait_s = max_wait_s
+
+    def run(self) -> Iterator[Tuple[Path, Any]]:
+        """Streams classification results as each micro-batch completes.
+
+        Yields:
+            Tuple[Path, Any]: File path and its `classify_stage` result.
+        """
+
+        texts: queue.Queue = queue.Queue(maxsize=self._queue_size)
+        stop = threading.Event()
+
+        producer = threading.Thread(target=self._produce, args=(texts, stop), name="ocr-stage", daemon=True)
+        producer.start()
+
+        try:
+            finished = False
+            while not finished:
+                batch, finished = self._next_batch(texts)
+                if batch:
+                    _log.info(f"Classifying micro-batch of {len(batch)} files")
+                    yield from self._classify_stage(batch).items()
+        finally:
+            # Unblocks the producer if the consumer stops early
+            stop.set()
+            producer.join()
+
+    def _produce(self, texts: queue.Queue, stop: threading.Event) -> None:
+        try:
+            for item in self._extract_stage():
+                if not self._put(texts, item, stop):
+                    return
+        except BaseException as error:
+            self._put(texts, _StageError(error), stop)
+            return
+
+        self._put(texts, _END_OF_STREAM, stop)
+
+    @staticmethod
+    def _put(texts: queue.Queue, item: object, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                texts.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _next_batch(self, texts: queue.Queue) -> Tuple[Dict[Path, str], bool]:
+        batch: Dict[Path, str] = {}
+        deadline: Optional[float] = None
+
+        while len(batch) < self._micro_batch_size:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = texts.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            if item is _END_OF_STREAM:
+                return batch, True
+            if isinstance(item, _StageError):
+                raise item.error
+
+            file_path, text = item
+            batch[file_path] = text
+
+            # Start the fill window once the batch has its first file
+            if deadline is None:
+                deadline = time.monotonic() + self._max_wait_s
+
+        return batch, False
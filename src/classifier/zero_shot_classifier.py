@@ -1,90 +1,527 @@
 import logging
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from src import metrics
+from src.cache.classification_cache import ClassificationCache
+from src.cache.ocr_cache import OCRCache
 from src.classifier import Classifier
-
-from transformers.pipelines import pipeline
-
-from src.feature_extraction.ocr_extractor import OCRExtractor
+from src.classifier.inference_scheduler import DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS, InferenceScheduler
+from src.classifier.onnx_backend import OnnxZeroShotPipeline, default_onnx_dir
+from src.classifier.staged_pipeline import DEFAULT_QUEUE_SIZE, StagedPipeline
+from src.feature_extraction.ocr_extractor import DEADLINE_EXCEEDED, DocumentSource, OCRExtractor, error_reason, source_name
+from src.resource_scheduler import ResourceScheduler
 from src.types.classifier_input import ClassifierInput
 from src.types.classifier_output import ClassifierOutput
 from src.types.document_type import DocumentType
+from src.types.extraction_options import ExtractionOptions
+from src.types.file_prediction import FilePrediction
+from src.types.inference_backend import InferenceBackend
+from src.types.model_state import ModelState
 
 
 _log = logging.getLogger(__name__)
 
 CLASSIFICATION_THRESHOLD = 0.6
 
+DEFAULT_BATCH_SIZE = 8
+
+WARMUP_TEXT = "INVOICE\nInvoice number: 0001\nTotal due: $100.00"
+
+INFERENCE_TIMED_OUT = "inference timed out"
+
+
+def pipeline(*args, **kwargs):
+    """Builds a HuggingFace pipeline, importing transformers (and torch) on first use."""
+
+    from transformers.pipelines import pipeline as hf_pipeline
+
+    return hf_pipeline(*args, **kwargs)
+
+
+def quantize_dynamic_int8(model):
+    """Returns a copy of a torch model with its linear layers dynamically quantized to int8."""
+
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+
+    return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
 class ZeroShotClassifier(Classifier):
     """Use zero-shot BERT classification to classify documents.
-    
+
     Initializes any HuggingFace Transformers model in aa zero-shot classification
     pipeline. By default, uses the DeBERTav3-zeroshot model (https://huggingface.co/MoritzLaurer/deberta-v3-large-zeroshot-v2.0).
+
+    All texts extracted from a request are sent to the model in a single pipeline
+    invocation. Texts are sorted by length before batching so that each batch holds
+    sequences of similar size, which keeps padding overhead low. `batch_size` counts
+    texts on every backend: each forward pass scores `batch_size` texts against
+    every label. OCR can be spread
+    over a pool of worker processes with `ocr_workers`, which defaults to the
+    `ResourceScheduler`'s thread budget, and repeated documents can skip OCR
+    entirely by passing an `ocr_cache`. A `result_cache` likewise skips the model
+    for text that has already been classified. `extraction_options` selects
+    the PDF profile and other extraction settings; a request's `pdf_profile`
+    overrides it.
+
+    Copies of a file within a request, such as one upload sent under several names,
+    go through OCR once and share its text, so they also share one model input
+    when they land in the same batch.
+
+    With `pipelined` enabled, OCR and inference run concurrently: extracted texts
+    stream through a bounded queue of `queue_size` entries into micro-batches of
+    `batch_size` texts, one per file, so end-to-end latency approaches the slower of the two
+    stages rather than their sum. `classify_iter` always runs this way and yields
+    each file's prediction and score as soon as its micro-batch completes.
+
+    With `lazy` enabled, the model is only loaded by `load`, `warmup` or the first
+    classification, so constructing the classifier does not import transformers.
+
+    `backend` selects how the model runs on CPU: eager fp32 PyTorch, PyTorch with
+    linear layers dynamically quantized to int8, or an ONNX graph in ONNX Runtime.
+    The ONNX graph is read from `onnx_dir` and must first be exported offline with
+    `python -m src.classifier.onnx_backend`.
+
+    With `scheduled` enabled, model calls go through a shared `InferenceScheduler`.
+    It coalesces texts from concurrent `classify` calls into batches of up to
+    `max_scheduled_batch_size` texts, waiting at most `max_wait_ms` for a batch to
+    fill. Use this when one classifier instance serves many concurrent requests.
+
+    Failures are isolated per file: a file whose extraction fails or times out is
+    UNKNOWN, with the reason in `ClassifierOutput.errors_per_file`, while the rest
+    of the request is classified normally. A request's `time_budget_s` bounds the
+    whole call. Extraction is cut off at the deadline (see
+    `OCRExtractor.iter_documents`), and the model wait is capped at the time left
+    and at `inference_timeout_s`. Model calls cannot be interrupted, so the
+    inference limit only applies with `scheduled`, where texts that miss it are
+    cancelled. Unscheduled calls skip the model once the deadline has passed.
+    Per-image tesseract limits are set with `ExtractionOptions.ocr_timeout_s`.
+
+    Inputs marked `inline` skip the OCR pool, both caches and the scheduler, so all of their work happens on the calling thread.
     """
 
-    def __init__(self, model_name: str = "MoritzLaurer/deberta-v3-large-zeroshot-v2.0"):
-        self._model_pipeline =  pipeline(
+    def __init__(
+        self,
+        model_name: str = "MoritzLaurer/deberta-v3-large-zeroshot-v2.0",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        ocr_workers: Optional[int] = None,
+        ocr_cache: Optional[OCRCache] = None,
+        extraction_options: Optional[ExtractionOptions] = None,
+        result_cache: Optional[ClassificationCache] = None,
+        pipelined: bool = False,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        lazy: bool = False,
+        backend: InferenceBackend = InferenceBackend.TORCH,
+        onnx_dir: Optional[Path] = None,
+        scheduled: bool = False,
+        max_scheduled_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        inference_timeout_s: Optional[float] = None,
+    ):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+
+        self._model_name = model_name
+        self._batch_size = batch_size
+        self._ocr_workers = ocr_workers
+        self._ocr_cache = ocr_cache
+        self._extraction_options = extraction_options or ExtractionOptions()
+        self._result_cache = result_cache
+        self._pipelined = pipelined
+        self._queue_size = queue_size
+        self._backend = backend
+        self._onnx_dir: Path = onnx_dir or default_onnx_dir(model_name)
+        self._inference_timeout_s = inference_timeout_s
+
+        self._scheduler: Optional[InferenceScheduler] = None
+        if scheduled:
+            self._scheduler = InferenceScheduler(
+                self._run_model,
+                max_batch_size=max_scheduled_batch_size,
+                max_wait_ms=max_wait_ms,
+            )
+
+        self._model_pipeline = None
+        self._state = ModelState.NOT_LOADED
+        self._load_lock = threading.Lock()
+
+        if not lazy:
+            self.load()
+
+    @property
+    def state(self) -> ModelState:
+        return self._state
+
+    @property
+    def scheduler(self) -> Optional[InferenceScheduler]:
+        return self._scheduler
+
+    def load(self) -> None:
+        """Loads the model pipeline if it is not loaded yet. Safe to call from multiple threads."""
+
+        with self._load_lock:
+            if self._model_pipeline is not None:
+                return
+
+            _log.info(f"Loading zero-shot model {self._model_name} with {self._backend.value} backend")
+            self._state = ModelState.LOADING
+            try:
+                self._model_pipeline = self._build_pipeline()
+            except Exception:
+                self._state = ModelState.FAILED
+                raise
+
+            self._state = ModelState.READY
+            _log.info(f"Loaded zero-shot model {self._model_name}")
+
+    def warmup(self) -> None:
+        """Loads the model and runs a dummy inference.
+
+        The first forward pass pays for one-off costs such as kernel selection and
+        thread-pool start-up, so running it here keeps them off the first request.
+        """
+
+        self.load()
+
+        _log.info("Warming up zero-shot model")
+        self._run_model([WARMUP_TEXT])
+
+    def _build_pipeline(self) -> Any:
+        # The ONNX pipeline records its own tokenization and forward-pass metrics
+        if self._backend == InferenceBackend.ONNX:
+            return OnnxZeroShotPipeline.load(self._onnx_dir)
+
+        model_pipeline = pipeline(
             "zero-shot-classification",
-            model=model_name,
+            model=self._model_name,
         )
-    
+
+        if self._backend == InferenceBackend.TORCH_INT8:
+            model_pipeline.model = quantize_dynamic_int8(model_pipeline.model)
+
+        self._instrument_pipeline(model_pipeline)
+        return model_pipeline
+
+    @staticmethod
+    def _instrument_pipeline(model_pipeline: Any) -> None:
+        # The pipeline tokenizes in `preprocess` (a generator yielding one premise/hypothesis
+        # pair per label) and runs the model in `_forward`, so wrapping both instance
+        # attributes splits tokenization time from forward-pass time
+        model_pipeline.preprocess = metrics.timed_generator(model_pipeline.preprocess, metrics.TOKENIZATION_SECONDS)
+        model_pipeline._forward = metrics.timed_function(model_pipeline._forward, metrics.MODEL_FORWARD_SECONDS)
+
     def classify(self, input: ClassifierInput) -> ClassifierOutput:
         _log.info(f"Classifying files {input.files}")
 
+        if self._pipelined and not input.inline:
+            return self._classify_pipelined(input)
+
+        deadline = input.deadline()
+        errors: Dict[Path, str] = {}
+
         # Use OCR to get text from files
         try:
             _log.info("Extracting text from file")
-            text_per_file: Dict[Path, str] = OCRExtractor.extract_all_documents(paths_list=input.files, dir_path=input.dir_path)
-        except Exception:
+            text_per_file: Dict[Path, str] = OCRExtractor.extract_all_documents(
+                paths_list=input.files,
+                dir_path=input.dir_path,
+                num_workers=1 if input.inline else ResourceScheduler.ocr_workers(self._ocr_workers),
+                cache=None if input.inline else self._ocr_cache,
+                documents=input.documents,
+                options=self._extraction_options.with_pdf_profile(input.pdf_profile),
+                errors=errors,
+                deadline=deadline,
+                in_process=input.inline,
+            )
+        except Exception as error:
             _log.exception(f"Failed to run OCR extraction on file {input.files}. Returning UNKNOWN")
-            return ClassifierOutput(output_per_file={
-                file: DocumentType.UNKNOWN
-                for file in input.files
-            } if input.files else {})
+            return self._unknown_output(input, error_reason(error))
+
+        outputs_per_file: Dict[Path, DocumentType] = self.classify_texts(text_per_file, deadline=deadline, errors=errors, inline=input.inline)
 
+        _log.info(f"Completed classifying {len(outputs_per_file)} files")
+        return ClassifierOutput(output_per_file=outputs_per_file, errors_per_file=errors)
+
+    @staticmethod
+    def _unknown_output(input: ClassifierInput, reason: str) -> ClassifierOutput:
+        files: List[Path] = input.files or [document.name for document in input.documents or []]
+        return ClassifierOutput(
+            output_per_file={file: DocumentType.UNKNOWN for file in files},
+            errors_per_file={file: reason for file in files},
+        )
+
+    def classify_iter(self, input: ClassifierInput) -> Iterator[FilePrediction]:
+        """Streams predictions, yielding each file as soon as its micro-batch is classified.
+
+        Directories are walked lazily and OCR overlaps with inference, so the first
+        results arrive before later files have been read. Files are yielded in
+        completion order. If extraction fails, the files not yet yielded are
+        reported as UNKNOWN.
+
+        Args:
+            input (ClassifierInput): Files, directory or in-memory documents to classify.
+
+        Yields:
+            FilePrediction: File path, predicted document type and its score.
+        """
+
+        _log.info(f"Streaming classification of files {input.files}")
+
+        yielded: Set[Path] = set()
+        try:
+            sources = OCRExtractor.iter_sources(
+                dir_path=input.dir_path,
+                paths_list=input.files,
+                documents=input.documents,
+            )
+            for prediction in self._stream(sources, input):
+                yielded.add(prediction.path)
+                yield prediction
+        except Exception as error:
+            _log.exception(f"Failed to stream classification of files {input.files}. Returning UNKNOWN")
+            unknown_output = self._unknown_output(input, error_reason(error))
+            for file_path, reason in unknown_output.errors_per_file.items():
+                if file_path not in yielded:
+                    yield FilePrediction(file_path, DocumentType.UNKNOWN, 0.0, reason)
+
+    def _stream(self, sources: Iterable[DocumentSource], input: ClassifierInput) -> Iterator[FilePrediction]:
+        deadline = input.deadline()
+        errors: Dict[Path, str] = {}
+
+        staged_pipeline = StagedPipeline(
+            extract_stage=lambda: OCRExtractor.iter_documents(
+                sources,
+                num_workers=ResourceScheduler.ocr_workers(self._ocr_workers),
+                cache=self._ocr_cache,
+                options=self._extraction_options.with_pdf_profile(input.pdf_profile),
+                errors=errors,
+                deadline=deadline,
+            ),
+            classify_stage=lambda batch: self.classify_texts_scored(batch, deadline=deadline, errors=errors),
+            micro_batch_size=self._batch_size,
+            queue_size=self._queue_size,
+        )
+
+        for file_path, (document_type, score) in staged_pipeline.run():
+            yield FilePrediction(file_path, document_type, score, errors.get(file_path))
+
+    def _classify_pipelined(self, input: ClassifierInput) -> ClassifierOutput:
+        try:
+            sources: List[DocumentSource] = OCRExtractor.list_documents(
+                dir_path=input.dir_path,
+                paths_list=input.files,
+                documents=input.documents,
+            )
+        except Exception as error:
+            _log.exception(f"Failed to list files {input.files}. Returning UNKNOWN")
+            return self._unknown_output(input, error_reason(error))
+
+        _log.info(f"Running pipelined OCR and classification on {len(sources)} files")
+        predictions: Dict[Path, FilePrediction] = {
+            prediction.path: prediction
+            for prediction in self._stream(sources, input)
+        }
+
+        _log.info(f"Completed classifying {len(predictions)} files")
+        return ClassifierOutput(
+            output_per_file={
+                source_name(source): predictions[source_name(source)].document_type
+                for source in sources
+            },
+            errors_per_file={
+                file_path: prediction.error
+                for file_path, prediction in predictions.items()
+                if prediction.error is not None
+            },
+        )
+
+    def classify_texts(
+        self,
+        text_per_file: Dict[Path, str],
+        deadline: Optional[float] = None,
+        errors: Optional[Dict[Path, str]] = None,
+        inline: bool = False,
+    ) -> Dict[Path, DocumentType]:
+        """Runs batched model inference over extracted texts.
+
+        Args:
+            text_per_file (Dict[Path, str]): Extracted text keyed by file path.
+            deadline (float): Optional `time.monotonic()` time by which inference must end.
+            errors (Dict[Path, str]): Optional dict filled with the reason each file that
+                missed the deadline or hit a model error is UNKNOWN.
+            inline (bool): Run the model on the calling thread, skipping the result
+                cache and the inference scheduler.
+
+        Returns:
+            Dict[Path, DocumentType]: Predicted document type per file, in input order.
+        """
+
+        return {
+            file_path: document_type
+            for file_path, (document_type, _) in self.classify_texts_scored(text_per_file, deadline, errors, inline).items()
+        }
+
+    def classify_texts_scored(
+        self,
+        text_per_file: Dict[Path, str],
+        deadline: Optional[float] = None,
+        errors: Optional[Dict[Path, str]] = None,
+        inline: bool = False,
+    ) -> Dict[Path, Tuple[DocumentType, Optional[float]]]:
+        """Like `classify_texts`, but also returns the score of each prediction.
+
+        The score is the model's probability for its top label, even when it falls
+        below the threshold and the file is classified as UNKNOWN. It is 0 for files
+        with no text or a failed model call, and None for results cached without one.
+
+        Args:
+            text_per_file (Dict[Path, str]): Extracted text keyed by file path.
+            deadline (float): Optional `time.monotonic()` time by which inference must end.
+            errors (Dict[Path, str]): Optional dict filled with the reason each file that
+                missed the deadline or hit a model error is UNKNOWN.
+            inline (bool): Run the model on the calling thread, skipping the result
+                cache and the inference scheduler.
+
+        Returns:
+            Dict[Path, Tuple[DocumentType, Optional[float]]]: Predicted document type and
+                score per file, in input order.
+        """
+
+        outputs_per_file: Dict[Path, Tuple[DocumentType, Optional[float]]] = {}
         labels: List[str] = [doc_type.value for doc_type in DocumentType]
+        result_cache: Optional[ClassificationCache] = None if inline else self._result_cache
 
-        outputs_per_file: Dict[Path, DocumentType] = {}
+        # Group files by text so identical documents only go through the model once
+        files_per_key: Dict[str, List[Path]] = {}
+        text_per_key: Dict[str, str] = {}
 
         for file_path, text in text_per_file.items():
             if not text:
-                _log.warning(f"No text extracted from file {input.files}. Returning UNKNOWN")
-                outputs_per_file[file_path] = DocumentType.UNKNOWN
+                _log.warning(f"No text extracted from file {file_path}. Returning UNKNOWN")
+                outputs_per_file[file_path] = (DocumentType.UNKNOWN, 0.0)
                 continue
 
-            _log.info(f"Got {len(text)} chars from file. Invoking zero-shot classification pipeline")
+            # Backends can disagree near the threshold, so each keeps its own cached results
+            key = ClassificationCache.make_key(text, f"{self._model_name}:{self._backend.value}", labels, CLASSIFICATION_THRESHOLD)
 
-            
-            # Call HF zero-shot pipeline
-            result = self._model_pipeline(
-                text,
-                candidate_labels=labels,
-            )
+            cached: Optional[Tuple[DocumentType, Optional[float]]] = None
+            if result_cache is not None:
+                cached = result_cache.get_scored(key)
+                metrics.CACHE_REQUESTS.labels(cache='classification', result='hit' if cached is not None else 'miss').inc()
 
-            if not result or 'scores' not in result or 'labels' not in result:
-                _log.error(f"Unknown error prevented model from generating outputs. Returning UNKNOWN")
-                outputs_per_file[file_path] = DocumentType.UNKNOWN
+            if cached is not None:
+                _log.info(f"Using cached classification {cached[0].value} for file {file_path}")
+                outputs_per_file[file_path] = cached
                 continue
 
+            files_per_key.setdefault(key, []).append(file_path)
+            text_per_key[key] = text
 
-            # Get the label with the highest confidence score to return as classification
-            scores: List[float] = result['scores']
-            labels: List[str] = result['labels']
+        # Sort by length so the pipeline's consecutive batches hold similarly sized sequences
+        pending: List[str] = sorted(text_per_key, key=lambda key: len(text_per_key[key]))
 
-            max_score_index = scores.index(max(scores))
-            if scores[max_score_index] < CLASSIFICATION_THRESHOLD:
-                pred_label = DocumentType.UNKNOWN.value
-                pred_score = scores[max_score_index]
-            else:
-                pred_label = labels[max_score_index]
-                pred_score = scores[max_score_index]
+        if pending:
+            _log.info(f"Invoking zero-shot classification pipeline on {len(pending)} texts with batch size {self._batch_size}")
 
-            _log.info(f"Classified doc as {pred_label} with score {pred_score}")
-            outputs_per_file[file_path] = DocumentType(pred_label)
+            texts: List[str] = [text_per_key[key] for key in pending]
+            results, reason = self._run_model_within(texts, deadline, inline)
 
+            for key, result in zip(pending, results):
+                document_type, score = self._result_to_prediction(result)
 
-        _log.info(f"Completed classifying {len(outputs_per_file)} files")
-        return ClassifierOutput(output_per_file=outputs_per_file)
+                # Model errors are not cached so the document is retried next time
+                valid = self._is_valid_result(result)
+                if result_cache is not None and valid:
+                    result_cache.put(key, document_type, score)
+
+                for file_path in files_per_key[key]:
+                    outputs_per_file[file_path] = (document_type, score)
+                    if not valid and errors is not None:
+                        errors[file_path] = reason or "inference failed"
+
+        return {file_path: outputs_per_file[file_path] for file_path in text_per_file}
+
+    def _run_model_within(self, texts: List[str], deadline: Optional[float], inline: bool = False) -> Tuple[List[Any], Optional[str]]:
+        """Runs the model, giving up at the deadline or the inference timeout.
+
+        Returns:
+            Tuple[List[Any], Optional[str]]: One result per text, None where there is
+                no result, and the reason if the whole call failed.
+        """
+
+        timeout_s = self._inference_timeout_s
+        if deadline is not None:
+            remaining_s = max(0.0, deadline - time.monotonic())
+            if remaining_s == 0:
+                _log.warning(f"Deadline exceeded before inference on {len(texts)} texts")
+                return [None] * len(texts), DEADLINE_EXCEEDED
+            timeout_s = remaining_s if timeout_s is None else min(timeout_s, remaining_s)
+
+        try:
+            if self._scheduler is not None and not inline:
+                return self._scheduler.run(texts, timeout_s=timeout_s), None
+            return self._run_model(texts), None
+        except TimeoutError:
+            _log.warning(f"Inference on {len(texts)} texts did not finish within {timeout_s:.2f}s")
+            missed_deadline = deadline is not None and time.monotonic() >= deadline
+            return [None] * len(texts), DEADLINE_EXCEEDED if missed_deadline else INFERENCE_TIMED_OUT
+        except Exception as error:
+            _log.exception(f"Inference failed on {len(texts)} texts")
+            return [None] * len(texts), f"inference failed: {type(error).__name__}: {error}"
+
+    def _run_model(self, texts: List[str]) -> List[Any]:
+        labels: List[str] = [doc_type.value for doc_type in DocumentType]
+
+        self.load()
+
+        # The HF pipeline batches premise/hypothesis pairs, one per label, while the
+        # ONNX pipeline batches texts, so both run `batch_size` texts per forward pass
+        batch_size = self._batch_size if self._backend == InferenceBackend.ONNX else self._batch_size * len(labels)
+
+        # Call HF zero-shot pipeline
+        results = self._model_pipeline(
+            texts,
+            candidate_labels=labels,
+            batch_size=batch_size,
+        )
+
+        # The pipeline returns a bare dict rather than a list when given a single sequence
+        if isinstance(results, dict):
+            results = [results]
+
+        if not isinstance(results, list) or len(results) != len(texts):
+            _log.error(f"Model returned an unexpected number of results for {len(texts)} inputs")
+            return [None] * len(texts)
+
+        return results
+
+    @staticmethod
+    def _is_valid_result(result: Any) -> bool:
+        return bool(result) and 'scores' in result and 'labels' in result
+
+    @classmethod
+    def _result_to_prediction(cls, result: Any) -> Tuple[DocumentType, float]:
+        if not cls._is_valid_result(result):
+            _log.error(f"Unknown error prevented model from generating outputs. Returning UNKNOWN")
+            return DocumentType.UNKNOWN, 0.0
+
+        # Get the label with the highest confidence score to return as classification
+        scores: List[float] = result['scores']
+        labels: List[str] = result['labels']
+
+        max_score_index = scores.index(max(scores))
+        if scores[max_score_index] < CLASSIFICATION_THRESHOLD:
+            pred_label = DocumentType.UNKNOWN.value
+            pred_score = scores[max_score_index]
+        else:
+            pred_label = labels[max_score_index]
+            pred_score = scores[max_score_index]
+
+        _log.info(f"Classified doc as {pred_label} with score {pred_score}")
+        return DocumentType(pred_label), float(pred_score)
 
 
 if __name__ == "__main__":
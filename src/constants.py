@@ -1,3 +1,14 @@
 SUPPORTED_IMAGE_TYPES = {'.png', '.jpg'}
 
-DATASET_DIR = "datasets"
\ No newline at end of file
+# In-memory documents larger than this are spooled to disk before extraction
+MAX_IN_MEMORY_DOCUMENT_BYTES = 32 * 1024 * 1024
+
+DATASET_DIR = "datasets"
+DATASET_MANIFEST_PATH = "datasets/manifest.jsonl"
+
+OCR_CACHE_DIR = ".cache/ocr"
+LINEAR_MODEL_PATH = "models/linear_text_model.joblib"
+
+ONNX_MODEL_DIR = "models/onnx"
+
+PROFILE_DIR = ".cache/profiles"
@@ -0,0 +1,46 @@
+import logging
+from typing import Dict, List, Optional
+
+from src.cache.ocr_cache import OCRCache
+from src.dataset.manifest import DATASET_DIRS, DatasetManifest
+from src.feature_extraction.ocr_extractor import OCRExtractor
+from src.types.document_type import DocumentType
+
+
+_log = logging.getLogger(__name__)
+
+
+def load_labeled_texts(
+    samples_per_type: int,
+    ocr_cache: Optional[OCRCache] = None,
+    num_workers: int = 1,
+) -> Dict[DocumentType, List[str]]:
+    """Extracts text from distinct files sampled out of the training part of each bundled dataset.
+
+    Files in the held-out part, which evaluation samples from, are never used.
+
+    Args:
+        samples_per_type (int): Files sampled from each dataset.
+        ocr_cache (OCRCache): Optional cache of extracted text.
+        num_workers (int): Worker processes used for OCR.
+
+    Returns:
+        Dict[DocumentType, List[str]]: Non-empty extracted texts per document type.
+    """
+
+    train, _ = DatasetManifest.load_or_build().split()
+    entries = train.sample(samples_per_type)
+
+    texts_per_type: Dict[DocumentType, List[str]] = {}
+    for doc_type in DATASET_DIRS:
+        file_paths = [entry.path for entry in entries if entry.label == doc_type]
+        text_per_file = OCRExtractor.extract_all_documents(
+            paths_list=file_paths,
+            num_workers=num_workers,
+            cache=ocr_cache,
+        )
+        texts_per_type[doc_type] = [text for text in text_per_file.values() if text]
+
+        _log.info(f"Loaded {len(texts_per_type[doc_type])} labeled texts for {doc_type.value}")
+
+    return texts_per_type
@@ -0,0 +1,258 @@
+import argparse
+import json
+import logging
+import mimetypes
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.cache.ocr_cache import OCRCache
+from src.constants import DATASET_DIR, DATASET_MANIFEST_PATH
+from src.types.document_type import DocumentType
+from src.types.manifest_entry import ManifestEntry
+
+
+_log = logging.getLogger(__name__)
+
+# Where each bundled dataset keeps its files
+DATASET_DIRS: Dict[DocumentType, Path] = {
+    DocumentType.INVOICE: Path(DATASET_DIR, 'invoice_data', 'data'),
+    DocumentType.DRIVERS_LICENSE: Path(DATASET_DIR, 'licenses', 'data'),
+    DocumentType.BANK_STATEMENT: Path(DATASET_DIR, 'bank_statements', 'data'),
+}
+
+DEFAULT_HASH_WORKERS = 8
+
+# Share of each label's files held out from training, for evaluation
+DEFAULT_HOLDOUT_FRACTION = 0.5
+DEFAULT_SPLIT_SEED = 0
+
+
+def _scan_files(base_dir: Path) -> Iterator[Path]:
+    """Yields every regular file under a directory, skipping hidden files and directories."""
+
+    for root, dir_names, file_names in os.walk(base_dir):
+        dir_names[:] = sorted(name for name in dir_names if not name.startswith('.'))
+        for file_name in sorted(file_names):
+            if not file_name.startswith('.'):
+                yield Path(root, file_name)
+
+
+class DatasetManifest:
+    """An index of labeled dataset files, with their size, content hash and mime type.
+
+    Building one walks and hashes every file once. Afterwards datasets load the
+    index instead of globbing their directories, so construction costs one read of
+    the manifest and each item is a list lookup. Entries are sorted by path, so a
+    given seed always samples the same files.
+
+    Manifests are stored as JSON lines, one entry per line.
+
+    Args:
+        entries (List[ManifestEntry]): Labeled files in the dataset.
+    """
+
+    def __init__(self, entries: List[ManifestEntry]):
+        self._entries: List[ManifestEntry] = sorted(entries, key=lambda entry: str(entry.path))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def entries(self) -> List[ManifestEntry]:
+        return self._entries
+
+    @classmethod
+    def build(
+        cls,
+        dirs_per_type: Dict[DocumentType, Path] = DATASET_DIRS,
+        num_workers: int = DEFAULT_HASH_WORKERS,
+    ) -> 'DatasetManifest':
+        """Indexes every file in each labeled directory.
+
+        Args:
+            dirs_per_type (Dict[DocumentType, Path]): Directory holding each type's files.
+            num_workers (int): Threads used to hash files.
+
+        Returns:
+            DatasetManifest: The index of all files found.
+        """
+
+        labeled_paths = [(file_path, doc_type) for doc_type, base_dir in dirs_per_type.items() for file_path in _scan_files(base_dir)]
+        _log.info(f"Indexing {len(labeled_paths)} dataset files")
+
+        def index(labeled_path) -> ManifestEntry:
+            file_path, doc_type = labeled_path
+            return ManifestEntry(
+                path=file_path,
+                size=file_path.stat().st_size,
+                content_hash=OCRCache.hash_file(file_path),
+                label=doc_type,
+                mime_type=mimetypes.guess_type(file_path.name)[0],
+            )
+
+        # Hashing is mostly file reads, which release the GIL
+        with ThreadPoolExecutor(max_workers=max(1, num_workers)) as executor:
+            entries = list(executor.map(index, labeled_paths))
+
+        return cls(entries)
+
+    @classmethod
+    def load(cls, manifest_path: Path) -> 'DatasetManifest':
+        with open(manifest_path) as manifest_file:
+            return cls([ManifestEntry.from_dict(json.loads(line)) for line in manifest_file if line.strip()])
+
+    @classmethod
+    def load_or_build(
+        cls,
+        manifest_path: Path = Path(DATASET_MANIFEST_PATH),
+        dirs_per_type: Dict[DocumentType, Path] = DATASET_DIRS,
+    ) -> 'DatasetManifest':
+        """Loads the manifest, building and saving it first if it does not exist yet."""
+
+        if manifest_path.exists():
+            return cls.load(manifest_path)
+
+        _log.info(f"No dataset manifest at {manifest_path}, building one")
+        manifest = cls.build(dirs_per_type)
+        manifest.save(manifest_path)
+
+        return manifest
+
+    @classmethod
+    def for_directory(cls, label: DocumentType, base_dir: Path) -> 'DatasetManifest':
+        """Returns the entries of one labeled directory.
+
+        The bundled datasets' directories are read from the shared manifest. Any
+        other directory is indexed on the spot.
+        """
+
+        if base_dir == DATASET_DIRS.get(label):
+            return cls.load_or_build().under(base_dir)
+
+        return cls.build({label: base_dir})
+
+    def save(self, manifest_path: Path) -> None:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial manifest
+        tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+        with open(tmp_path, 'w') as manifest_file:
+            for entry in self._entries:
+                manifest_file.write(json.dumps(entry.to_dict()) + '\n')
+        os.replace(tmp_path, manifest_path)
+
+        _log.info(f"Wrote {len(self._entries)} entries to dataset manifest {manifest_path}")
+
+    def counts(self) -> Dict[DocumentType, int]:
+        counts: Dict[DocumentType, int] = {}
+        for entry in self._entries:
+            counts[entry.label] = counts.get(entry.label, 0) + 1
+
+        return counts
+
+    def under(self, base_dir: Path) -> 'DatasetManifest':
+        """Returns the entries located under a directory."""
+
+        return DatasetManifest([entry for entry in self._entries if entry.path.is_relative_to(base_dir)])
+
+    def split(
+        self,
+        holdout_fraction: float = DEFAULT_HOLDOUT_FRACTION,
+        seed: int = DEFAULT_SPLIT_SEED,
+    ) -> Tuple['DatasetManifest', 'DatasetManifest']:
+        """Splits each label's entries into a training part and a held-out part.
+
+        Models are trained and few-shot prototypes drawn from the training part, and
+        evaluation samples from the held-out part, so accuracy is never measured on
+        a model's own training data. The same seed always gives the same split.
+
+        Args:
+            holdout_fraction (float): Share of each label's entries held out.
+            seed (int): Seed of the split.
+
+        Returns:
+            Tuple[DatasetManifest, DatasetManifest]: The training and held-out entries.
+        """
+
+        if not 0 < holdout_fraction < 1:
+            raise ValueError(f"holdout_fraction must be between 0 and 1, got {holdout_fraction}")
+
+        rng = random.Random(seed)
+
+        entries_per_type: Dict[DocumentType, List[ManifestEntry]] = {}
+        for entry in self._entries:
+            entries_per_type.setdefault(entry.label, []).append(entry)
+
+        train: List[ManifestEntry] = []
+        held_out: List[ManifestEntry] = []
+        for doc_type in sorted(entries_per_type, key=lambda doc_type: doc_type.value):
+            type_entries = list(entries_per_type[doc_type])
+            rng.shuffle(type_entries)
+            holdout_count = round(len(type_entries) * holdout_fraction)
+            held_out += type_entries[:holdout_count]
+            train += type_entries[holdout_count:]
+
+        return DatasetManifest(train), DatasetManifest(held_out)
+
+    def sample(
+        self,
+        samples_per_type: Optional[int] = None,
+        seed: Optional[int] = None,
+        labels: Optional[List[DocumentType]] = None,
+        shard_index: int = 0,
+        num_shards: int = 1,
+    ) -> List[ManifestEntry]:
+        """Samples entries per label without replacement, optionally keeping one shard.
+
+        Args:
+            samples_per_type (int): Entries drawn from each label, or all of them if None.
+                Labels with fewer entries contribute all of theirs.
+            seed (int): Seed of the sampling. If None, the global `random` state is used.
+            labels (List[DocumentType]): Labels to sample from. Defaults to every label.
+            shard_index (int): Which shard of the sample to return.
+            num_shards (int): Number of disjoint shards the sample is split into, e.g.
+                one per worker.
+
+        Returns:
+            List[ManifestEntry]: The sampled entries of this shard, shuffled.
+        """
+
+        if not 0 <= shard_index < num_shards:
+            raise ValueError(f"shard_index must be in [0, {num_shards}), got {shard_index}")
+        if num_shards > 1 and seed is None:
+            raise ValueError("A seed is required when sharding, so every shard draws the same sample")
+
+        rng = random.Random(seed) if seed is not None else random
+
+        entries_per_type: Dict[DocumentType, List[ManifestEntry]] = {}
+        for entry in self._entries:
+            if labels is None or entry.label in labels:
+                entries_per_type.setdefault(entry.label, []).append(entry)
+
+        sampled: List[ManifestEntry] = []
+        for doc_type in sorted(entries_per_type, key=lambda doc_type: doc_type.value):
+            type_entries = entries_per_type[doc_type]
+            count = len(type_entries) if samples_per_type is None else min(samples_per_type, len(type_entries))
+            sampled += rng.sample(type_entries, count)
+
+        rng.shuffle(sampled)
+        return sampled[shard_index::num_shards]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index the bundled datasets into a manifest.")
+    parser.add_argument('--output', type=Path, default=Path(DATASET_MANIFEST_PATH))
+    parser.add_argument('--workers', type=int, default=DEFAULT_HASH_WORKERS, help="Threads used to hash files")
+    args = parser.parse_args()
+
+    manifest = DatasetManifest.build(num_workers=args.workers)
+    manifest.save(args.output)
+
+    _log.info(f"Files per label: {({doc_type.value: count for doc_type, count in manifest.counts().items()})}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import logging
+from typing import List, Optional, Tuple
+
+from src.dataset.manifest import DatasetManifest
+from src.types.document_type import DOCUMENT_TO_INT_LABEL, DocumentType
+from src.types.manifest_entry import ManifestEntry
+
+from torch.utils.data import Dataset
+
+_log = logging.getLogger(__name__)
+
+
+class ManifestDataset(Dataset):
+    """Provides labeled files sampled from a dataset manifest.
+
+    Files are sampled per label without replacement, so every item is a distinct
+    file. With `num_shards` above 1, each worker passes its own `shard_index` and
+    gets a disjoint part of the same sample.
+
+    Items are `(file path, integer label)` tuples.
+
+    Args:
+        manifest (DatasetManifest): Index of the labeled files. Defaults to the bundled
+            datasets' manifest, built on first use.
+        samples_per_type (int): Files sampled from each label, or all of them if None.
+        seed (int): Seed of the sampling. If None, the global `random` state is used.
+        labels (List[DocumentType]): Labels to sample from. Defaults to every label.
+        shard_index (int): Which shard of the sample this dataset holds.
+        num_shards (int): Number of shards the sample is split into.
+    """
+
+    def __init__(
+        self,
+        manifest: Optional[DatasetManifest] = None,
+        samples_per_type: Optional[int] = None,
+        seed: Optional[int] = None,
+        labels: Optional[List[DocumentType]] = None,
+        shard_index: int = 0,
+        num_shards: int = 1,
+    ):
+        super().__init__()
+
+        manifest = manifest if manifest is not None else DatasetManifest.load_or_build()
+        self._entries: List[ManifestEntry] = manifest.sample(
+            samples_per_type,
+            seed=seed,
+            labels=labels,
+            shard_index=shard_index,
+            num_shards=num_shards,
+        )
+
+    @property
+    def entries(self) -> List[ManifestEntry]:
+        return self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, index) -> Tuple[str, int]:
+        entry = self._entries[index]
+        return str(entry.path), DOCUMENT_TO_INT_LABEL[entry.label]
@@ -1,34 +1,20 @@
-import logging
 from pathlib import Path
-import random
-from typing import List
 
-from src.types.document_type import DOCUMENT_TO_INT_LABEL, DocumentType
-from src.constants import DATASET_DIR
+from src.dataset.manifest import DATASET_DIRS, DatasetManifest
+from src.dataset.manifest_dataset import ManifestDataset
+from src.types.document_type import DocumentType
 
-from torch.utils.data import Dataset
 
-_log = logging.getLogger(__name__)
-
-
-class StatementsDataset(Dataset):
+class StatementsDataset(ManifestDataset):
     """Provides the Bank Statements dataset.
-    
-    By default, expects the dataset to be located in datasets/bank_statements/data.
-    However, this can be configured with the base_dir arg.
-    """
 
-    def __init__(self, num_samples=100, base_dir=Path(DATASET_DIR, 'bank_statements', 'data')):
-        super(StatementsDataset).__init__()
-
-        self._data_base_dir: Path = base_dir
+    By default, samples from the bundled manifest of datasets/bank_statements/data.
+    However, another directory can be indexed with the base_dir arg.
+    """
 
-        all_files: List[Path] = list(self._data_base_dir.glob('**/*'))
-        self._file_paths: List[Path] = random.choices(all_files, k=min(len(all_files),num_samples))
-        
-    
-    def __len__(self):
-        return len(self._file_paths)
-    
-    def __getitem__(self, index):
-        return str(self._file_paths[index]), DOCUMENT_TO_INT_LABEL[DocumentType.BANK_STATEMENT]
+    def __init__(self, num_samples=100, base_dir=DATASET_DIRS[DocumentType.BANK_STATEMENT]):
+        super().__init__(
+            DatasetManifest.for_directory(DocumentType.BANK_STATEMENT, Path(base_dir)),
+            samples_per_type=num_samples,
+            labels=[DocumentType.BANK_STATEMENT],
+        )
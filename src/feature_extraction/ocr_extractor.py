@@ -1,24 +1,128 @@
 import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import lru_cache
+from importlib.metadata import version
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Optional
+from tempfile import NamedTemporaryFile
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-import pymupdf4llm
 import pytesseract
 from PIL import Image
 
-from src.constants import SUPPORTED_IMAGE_TYPES
+from src import metrics
+from src.cache.ocr_cache import OCRCache
+from src.constants import MAX_IN_MEMORY_DOCUMENT_BYTES, SUPPORTED_IMAGE_TYPES
+from src.types.extraction_options import ExtractionOptions
+from src.types.in_memory_document import InMemoryDocument
+from src.types.pdf_profile import PdfProfile
 
 
 _log = logging.getLogger(__name__)
 
+# A document to extract, either a file on disk or an in-memory upload
+DocumentSource = Union[Path, InMemoryDocument]
+
+# Error reasons reported per file
+DEADLINE_EXCEEDED = "deadline exceeded"
+OCR_TIMED_OUT = "ocr timed out"
+WORKER_CRASHED = "ocr worker crashed"
+
+DEFAULT_OPTIONS = ExtractionOptions()
+
+# Resolution used to render PDF pages that have no text layer for OCR
+PDF_OCR_DPI = 200
+
+# Grayscale level below which a pixel counts as content when auto-cropping
+AUTOCROP_THRESHOLD = 200
+AUTOCROP_MARGIN = 10
+
+
+class OCRTimeoutError(Exception):
+    """Raised when tesseract exceeds `ExtractionOptions.ocr_timeout_s` and is killed, or extraction runs past `ocr_deadline`."""
+
+
+def error_reason(error: BaseException) -> str:
+    """Describes why a file failed extraction, for per-file error reporting."""
+
+    if isinstance(error, OCRTimeoutError):
+        return OCR_TIMED_OUT
+    return f"extraction failed: {type(error).__name__}: {error}"
+
+
+def _remaining_s(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _init_worker() -> None:
+    """Warms up an OCR worker process before it receives any files.
+
+    Each worker owns a single core, so tesseract's OpenMP threads are capped to
+    avoid oversubscribing the box, unless a `ThreadBudget` already set the cap.
+    Resolving the tesseract binary once here means the first file handled by the
+    worker does not pay for it.
+    """
+
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        _log.warning("Tesseract binary unavailable in OCR worker; image extraction will fail")
+
+
+@lru_cache(maxsize=1)
+def _tesseract_version() -> str:
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return "unknown"
+
+
+def _extract_text_worker(source: DocumentSource, options: ExtractionOptions = DEFAULT_OPTIONS) -> str:
+    if isinstance(source, InMemoryDocument):
+        return OCRExtractor.extract_document(source, options=options)
+    return OCRExtractor.extract_text(source, options=options)
+
+
+def _extract_text_timed_worker(source: DocumentSource, options: ExtractionOptions = DEFAULT_OPTIONS) -> Tuple[str, float]:
+    # Metrics recorded inside a pool worker never reach the serving process, so the
+    # worker reports its extraction time back for the parent to record
+    start = time.perf_counter()
+    text = _extract_text_worker(source, options)
+    return text, time.perf_counter() - start
+
+
+def source_name(source: DocumentSource) -> Path:
+    """Returns the path used to key results for a document source."""
+
+    return source.name if isinstance(source, InMemoryDocument) else source
+
 
 class OCRExtractor:
+    _executor: Optional[ProcessPoolExecutor] = None
+    _executor_workers: int = 0
+    _executor_lock = threading.Lock()
+
     @classmethod
-    def extract_text(cls, file_path: Path) -> str:
+    def extract_text(
+        cls,
+        file_path: Path,
+        cache: Optional[OCRCache] = None,
+        options: ExtractionOptions = DEFAULT_OPTIONS,
+    ) -> str:
         """Extracts text from a single file.
 
         Args:
             file_path (Path): Path to the file.
+            cache (OCRCache): Optional cache consulted before running OCR.
+            options (ExtractionOptions): Extraction settings, e.g. the PDF profile.
 
         Returns:
             str: Extracted text.
@@ -26,74 +130,706 @@ class OCRExtractor:
 
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
-        
-        _log.info(f"Extracting text from {file_path.name}")
+
+        return cls._extract(file_path, file_path, cache, options)
+
+    @classmethod
+    def extract_document(
+        cls,
+        document: InMemoryDocument,
+        cache: Optional[OCRCache] = None,
+        options: ExtractionOptions = DEFAULT_OPTIONS,
+    ) -> str:
+        """Extracts text from a document held in memory.
+
+        Documents up to MAX_IN_MEMORY_DOCUMENT_BYTES are decoded straight from memory;
+        larger ones are spooled to a temporary file first.
+
+        Args:
+            document (InMemoryDocument): The document bytes or stream, with its name.
+            cache (OCRCache): Optional cache consulted before running OCR.
+            options (ExtractionOptions): Extraction settings, e.g. the PDF profile.
+
+        Returns:
+            str: Extracted text.
+        """
+
+        # Fail on unsupported types before reading or spooling anything
+        cls.backend_id(document.name, options)
+
+        with cls._materialize(document) as payload:
+            return cls._extract(payload, document.name, cache, options)
+
+    @classmethod
+    def _extract(cls, payload: Union[Path, bytes], name: Path, cache: Optional[OCRCache], options: ExtractionOptions) -> str:
+        cache_key: Optional[str] = None
+        if cache is not None:
+            content_hash = OCRCache.hash_file(payload) if isinstance(payload, Path) else OCRCache.hash_bytes(payload)
+            cache_key = OCRCache.make_key(content_hash, cls.backend_id(name, options))
+
+            cached_text = cache.get(cache_key)
+            metrics.CACHE_REQUESTS.labels(cache='ocr', result='hit' if cached_text is not None else 'miss').inc()
+            if cached_text is not None:
+                _log.info(f"Using cached text for {name.name}")
+                return cached_text
+
+        _log.info(f"Extracting text from {name.name}")
+
+        with metrics.timed(metrics.OCR_SECONDS.labels(kind=metrics.file_kind(name.suffix))):
+            if name.suffix.lower() in SUPPORTED_IMAGE_TYPES:
+                text = cls._run_image_ocr_single_file(payload, name, options=options)
+            elif name.suffix.lower() == '.pdf':
+                text = cls._run_pdf_ocr_single_file(payload, name, options=options)
+            else:
+                raise ValueError(f"Unsupported file type: {name.suffix}")
+
+        if cache_key is not None and text:
+            cache.put(cache_key, text)
+
+        return text
+
+    @classmethod
+    def backend_id(cls, file_path: Path, options: ExtractionOptions = DEFAULT_OPTIONS) -> str:
+        """Identifies the extractor backend, version and settings used for a file type.
+
+        Args:
+            file_path (Path): Path to the file.
+            options (ExtractionOptions): Extraction settings, e.g. the PDF profile.
+
+        Returns:
+            str: Backend identifier, e.g. "tesseract-5.3.0".
+        """
 
         if file_path.suffix.lower() in SUPPORTED_IMAGE_TYPES:
-            return cls._run_image_ocr_single_file(file_path)
+            return f"tesseract-{_tesseract_version()}-{options.image_settings_id()}"
         elif file_path.suffix.lower() == '.pdf':
-            return cls._run_pdf_ocr_single_file(file_path)
+            if options.pdf_profile == PdfProfile.FAST:
+                return f"pymupdf-{version('pymupdf')}-fast-{options.max_pdf_pages}-tesseract-{_tesseract_version()}-{options.image_settings_id()}"
+            return f"pymupdf4llm-{version('pymupdf4llm')}"
         else:
             raise ValueError(f"Unsupported file type: {file_path.suffix}")
 
     @classmethod
-    def extract_all_documents(cls, dir_path: Optional[Path] = None, paths_list: Optional[List[Path]] = None) -> Dict[Path, str]:
+    def cache_key(cls, source: DocumentSource, options: ExtractionOptions = DEFAULT_OPTIONS) -> str:
+        """Builds the OCR cache key from the document contents and extractor backend."""
+
+        return OCRCache.make_key(cls.content_hash(source), cls.backend_id(source_name(source), options))
+
+    @staticmethod
+    def content_hash(source: DocumentSource) -> str:
+        """Returns the SHA-256 hex digest of a document's bytes, leaving streams rewound."""
+
+        if isinstance(source, Path):
+            return OCRCache.hash_file(source)
+        elif isinstance(source.data, bytes):
+            return OCRCache.hash_bytes(source.data)
+
+        source.data.seek(0)
+        content_hash = OCRCache.hash_stream(source.data)
+        source.data.seek(0)
+
+        return content_hash
+
+    @classmethod
+    def extract_all_documents(
+        cls,
+        dir_path: Optional[Path] = None,
+        paths_list: Optional[List[Path]] = None,
+        num_workers: int = 1,
+        cache: Optional[OCRCache] = None,
+        documents: Optional[List[InMemoryDocument]] = None,
+        options: ExtractionOptions = DEFAULT_OPTIONS,
+        timings: Optional[Dict[Path, float]] = None,
+        errors: Optional[Dict[Path, str]] = None,
+        deadline: Optional[float] = None,
+        in_process: bool = False,
+    ) -> Dict[Path, str]:
         """Extracts text from all documents in a directory.
 
+        A file that fails extraction is logged and mapped to an empty string so the
+        rest of the batch still completes. When a cache is given, only cache misses
+        are sent to OCR. Duplicate files go through OCR once, see `iter_documents`,
+        which also describes how `deadline` bounds the batch.
+
+        Args:
+            dir_path (Path): Path to the directory.
+            paths_list (List[Path]): Explicit list of files, used when dir_path is not set.
+            num_workers (int): Number of OCR worker processes. Runs in-process when 1 and
+                there is no deadline.
+            cache (OCRCache): Optional cache consulted before running OCR.
+            documents (List[InMemoryDocument]): In-memory documents, used when neither
+                dir_path nor paths_list is set.
+            options (ExtractionOptions): Extraction settings, e.g. the PDF profile.
+            timings (Dict[Path, float]): Optional dict filled with the extraction time in
+                seconds of each file that was not served from the cache.
+            errors (Dict[Path, str]): Optional dict filled with the reason each failed file
+                has empty text.
+            deadline (float): Optional `time.monotonic()` time by which extraction must end.
+            in_process (bool): Extract every file on the calling thread, even with a deadline.
+
+        Returns:
+            Dict[Path, str]: Dictionary with file paths as keys and extracted text as values,
+                in the same order as the input files.
+        """
+
+        sources: List[DocumentSource] = cls.list_documents(dir_path=dir_path, paths_list=paths_list, documents=documents)
+
+        _log.info(f"Found {len(sources)} files to extract")
+
+        extracted: Dict[Path, str] = dict(cls.iter_documents(
+            sources,
+            num_workers=num_workers,
+            cache=cache,
+            options=options,
+            timings=timings,
+            errors=errors,
+            deadline=deadline,
+            in_process=in_process,
+        ))
+        result: Dict[Path, str] = {source_name(source): extracted[source_name(source)] for source in sources}
+
+        _log.info(f"Extracted text from {len(result)} files")
+
+        return result
+
+    @classmethod
+    def list_documents(
+        cls,
+        dir_path: Optional[Path] = None,
+        paths_list: Optional[List[Path]] = None,
+        documents: Optional[List[InMemoryDocument]] = None,
+    ) -> List[DocumentSource]:
+        """Resolves the documents to extract from a directory, a file list or in-memory documents.
+
         Args:
             dir_path (Path): Path to the directory.
+            paths_list (List[Path]): Explicit list of files, used when dir_path is not set.
+            documents (List[InMemoryDocument]): In-memory documents, used when neither
+                dir_path nor paths_list is set.
 
         Returns:
-            Dict[Path, str]: Dictionary with file paths as keys and extracted text as values.
+            List[DocumentSource]: Documents to extract, sorted when read from a directory.
         """
 
-        file_paths: List[Path] = []
+        sources = cls.iter_sources(dir_path=dir_path, paths_list=paths_list, documents=documents)
+
+        return sorted(sources) if dir_path else list(sources)
+
+    @classmethod
+    def iter_sources(
+        cls,
+        dir_path: Optional[Path] = None,
+        paths_list: Optional[List[Path]] = None,
+        documents: Optional[List[InMemoryDocument]] = None,
+    ) -> Iterator[DocumentSource]:
+        """Lazily resolves the documents to extract, like `list_documents`.
+
+        A directory is walked as the iterator is consumed, one directory listing at a
+        time, so extraction can start before the whole tree has been read. Files are
+        yielded in sorted order within each directory. Invalid arguments raise on the
+        call itself rather than on first iteration.
+
+        Args:
+            dir_path (Path): Path to the directory.
+            paths_list (List[Path]): Explicit list of files, used when dir_path is not set.
+            documents (List[InMemoryDocument]): In-memory documents, used when neither
+                dir_path nor paths_list is set.
+
+        Returns:
+            Iterator[DocumentSource]: Documents to extract.
+        """
 
         if dir_path:
             if not dir_path.exists():
                 raise FileNotFoundError(f"Directory not found: {dir_path}")
             elif not dir_path.is_dir():
                 raise ValueError(f"Path is not a directory: {dir_path}")
-            
+
             _log.info(f"Extracting text from all documents in {dir_path.name}")
 
-            file_paths = list(dir_path.glob('**/*'))
+            return cls._walk_files(dir_path)
         elif paths_list:
-            file_paths = paths_list
+            return iter(paths_list)
+        elif documents:
+            return iter(documents)
         else:
-            raise ValueError("Either dir_path or paths_list must be provided")
+            raise ValueError("One of dir_path, paths_list or documents must be provided")
 
+    @staticmethod
+    def _walk_files(dir_path: Path) -> Iterator[Path]:
+        for root, dir_names, file_names in os.walk(dir_path):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                yield Path(root, file_name)
 
-        result: Dict[Path, str] = {}
+    @classmethod
+    def iter_documents(
+        cls,
+        sources: Iterable[DocumentSource],
+        num_workers: int = 1,
+        cache: Optional[OCRCache] = None,
+        max_in_flight: Optional[int] = None,
+        options: ExtractionOptions = DEFAULT_OPTIONS,
+        timings: Optional[Dict[Path, float]] = None,
+        errors: Optional[Dict[Path, str]] = None,
+        deadline: Optional[float] = None,
+        in_process: bool = False,
+    ) -> Iterator[Tuple[Path, str]]:
+        """Lazily extracts text, yielding each file as soon as it is done.
 
-        _log.info(f"Found {len(file_paths)} files to extract")
+        Files are yielded in completion order. `sources` is consumed lazily, so it can
+        be a generator such as `iter_sources`. With multiple workers, at most
+        `max_in_flight` files are queued on the pool at once, so a slow consumer
+        holds back OCR instead of letting extracted text pile up in memory. A file
+        that fails extraction yields an empty string, and its reason is recorded in
+        `errors`.
 
-        for file_path in file_paths:
-            result[file_path] = cls.extract_text(file_path)
+        With a `deadline`, files are extracted in worker processes even when there is
+        only one worker, since only those can be abandoned. Files not started by the
+        deadline are not extracted. Files still extracting at the deadline are
+        abandoned: those still queued are cancelled, and running ones finish in the
+        background with their results discarded. The shared pool is left alone, so
+        other batches using it are not affected. Workers stop soon after the deadline
+        too: tesseract's timeout is capped to the time left, and PDFs are checked
+        against the deadline before each page. With `in_process`, those checks are
+        all that bounds a file.
 
-        _log.info(f"Extracted text from {len(result)} files")
+        Files with the same contents, such as one upload sent under several names,
+        are extracted once: later copies are held back and yielded with the first
+        copy's text (and error) as soon as it is done. Every file is still yielded
+        under its own name.
 
-        return result
+        Args:
+            sources (Iterable[DocumentSource]): Files or in-memory documents to extract.
+            num_workers (int): Number of OCR worker processes. Runs in-process when 1 and
+                there is no deadline.
+            cache (OCRCache): Optional cache consulted before running OCR.
+            max_in_flight (int): Maximum files submitted to the pool but not yet
+                yielded. Defaults to twice the worker count.
+            options (ExtractionOptions): Extraction settings, e.g. the PDF profile.
+            timings (Dict[Path, float]): Optional dict filled with the extraction time in
+                seconds of each file that was not served from the cache.
+            errors (Dict[Path, str]): Optional dict filled with the reason each failed file
+                has empty text.
+            deadline (float): Optional `time.monotonic()` time by which extraction must end.
+            in_process (bool): Extract every file on the calling thread, even with a
+                deadline, e.g. so a profiler on that thread sees the extraction.
+
+        Yields:
+            Tuple[Path, str]: File path (or in-memory document name) and its extracted text.
+        """
+
+        if num_workers < 1:
+            raise ValueError(f"num_workers must be positive, got {num_workers}")
+
+        max_in_flight = max_in_flight or num_workers * 2
+        executor: Optional[ProcessPoolExecutor] = None
+        in_flight: Dict[Future, Path] = {}
+        spooled_paths: Dict[Future, Path] = {}
+        cache_keys: Dict[Path, str] = {}
+
+        # The first file seen with each content, the copies waiting on it, and its text once done
+        first_per_key: Dict[str, Path] = {}
+        copies: Dict[Path, List[Path]] = {}
+        finished: Dict[Path, str] = {}
+        duplicates = 0
+        total = 0
+
+        def fail(name: Path, reason: str) -> Tuple[Path, str]:
+            _log.warning(f"Returning empty text for {name.name}: {reason}")
+            if errors is not None:
+                errors[name] = reason
+            return name, ""
+
+        def finish(name: Path, text: str) -> Tuple[Path, str]:
+            if cache is not None and text and name in cache_keys:
+                cache.put(cache_keys[name], text)
+            return name, text
+
+        def release(future: Future) -> Path:
+            spooled_path = spooled_paths.pop(future, None)
+            if spooled_path is not None:
+                spooled_path.unlink(missing_ok=True)
+            return in_flight.pop(future)
+
+        def collect(future: Future) -> Tuple[Path, str]:
+            name = release(future)
+            text, elapsed_s, error = cls._collect(name, future, executor)
+            if timings is not None:
+                timings[name] = elapsed_s
+
+            return fail(name, error) if error is not None else finish(name, text)
+
+        def with_copies(name: Path, text: str) -> Iterator[Tuple[Path, str]]:
+            finished[name] = text
+            yield name, text
+            for copy in copies.pop(name, []):
+                yield copy_of(copy, name)
+
+        def copy_of(copy: Path, first: Path) -> Tuple[Path, str]:
+            if errors is not None and first in errors:
+                errors[copy] = errors[first]
+            return copy, finished[first]
+
+        def abandon_in_flight() -> Iterator[Tuple[Path, str]]:
+            _log.warning(f"Deadline exceeded with {len(in_flight)} files still extracting, abandoning them")
+            for future in list(in_flight):
+                future.cancel()
+                # A running worker may still be reading its spooled file, so remove it once the worker is done
+                spooled_path = spooled_paths.pop(future, None)
+                if spooled_path is not None:
+                    future.add_done_callback(lambda _, spooled_path=spooled_path: spooled_path.unlink(missing_ok=True))
+                yield from with_copies(*fail(in_flight.pop(future), DEADLINE_EXCEEDED))
+
+        for source in sources:
+            name = source_name(source)
+            total += 1
+
+            try:
+                content_hash = cls.content_hash(source)
+                backend_id = cls.backend_id(name, options)
+            except Exception:
+                # Let the extraction step surface the error for this file
+                content_hash = None
+
+            if content_hash is not None:
+                key = cache_keys[name] = OCRCache.make_key(content_hash, backend_id)
+
+                first = first_per_key.get(key)
+                if first is not None:
+                    _log.info(f"{name.name} is a duplicate of {first.name}, reusing its text")
+                    duplicates += 1
+                    if first in finished:
+                        yield copy_of(name, first)
+                    else:
+                        copies.setdefault(first, []).append(name)
+                    continue
+                first_per_key[key] = name
+
+                if cache is not None:
+                    cached_text = cache.get(key)
+                    metrics.CACHE_REQUESTS.labels(cache='ocr', result='hit' if cached_text is not None else 'miss').inc()
+                    if cached_text is not None:
+                        _log.info(f"Using cached text for {name.name}")
+                        yield from with_copies(name, cached_text)
+                        continue
+
+            if _remaining_s(deadline) == 0:
+                yield from with_copies(*fail(name, DEADLINE_EXCEEDED))
+                continue
+            file_options = options.with_ocr_deadline(deadline)
+
+            if in_process or (num_workers == 1 and deadline is None):
+                start = time.perf_counter()
+                text, error = cls._extract_text_or_error(source, file_options)
+                if timings is not None:
+                    timings[name] = time.perf_counter() - start
+
+                yield from with_copies(*(fail(name, error) if error is not None else finish(name, text)))
+                continue
+
+            try:
+                payload, spooled_path = cls._detach(source)
+            except Exception as error:
+                _log.exception(f"Failed to read {name.name}. Returning empty text")
+                yield from with_copies(*fail(name, error_reason(error)))
+                continue
+
+            if executor is None:
+                executor = cls._get_executor(num_workers)
+            future = executor.submit(_extract_text_timed_worker, payload, file_options)
+            in_flight[future] = name
+            if spooled_path is not None:
+                spooled_paths[future] = spooled_path
+
+            if len(in_flight) >= max_in_flight:
+                done, _ = wait(in_flight, timeout=_remaining_s(deadline), return_when=FIRST_COMPLETED)
+                if not done:
+                    yield from abandon_in_flight()
+                for future in done:
+                    yield from with_copies(*collect(future))
+
+        while in_flight:
+            done, _ = wait(in_flight, timeout=_remaining_s(deadline), return_when=FIRST_COMPLETED)
+            if not done:
+                yield from abandon_in_flight()
+            for future in done:
+                yield from with_copies(*collect(future))
+
+        metrics.DEDUPLICATED_FILES.labels(match='exact').inc(duplicates)
+        metrics.DEDUPLICATED_FILES.labels(match='none').inc(total - duplicates)
+        if duplicates:
+            _log.info(f"Skipped OCR for {duplicates} of {total} files ({duplicates / total:.1%}) with the same contents as another")
+
+    @classmethod
+    def shutdown_workers(cls) -> None:
+        """Stops the shared OCR worker pool, if one was started."""
+
+        with cls._executor_lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=True)
+                cls._executor = None
+                cls._executor_workers = 0
+
+    @classmethod
+    def _get_executor(cls, num_workers: int) -> ProcessPoolExecutor:
+        # Reuse warm workers across calls; only rebuild the pool when its size changes
+        with cls._executor_lock:
+            if cls._executor is None or cls._executor_workers != num_workers:
+                if cls._executor is not None:
+                    cls._executor.shutdown(wait=False)
+
+                _log.info(f"Starting OCR worker pool with {num_workers} processes")
+                cls._executor = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker)
+                cls._executor_workers = num_workers
+
+            return cls._executor
+
+    @classmethod
+    @contextmanager
+    def _materialize(cls, document: InMemoryDocument) -> Iterator[Union[Path, bytes]]:
+        """Yields the document bytes, or a spooled temp file when it is too large for memory."""
+
+        if isinstance(document.data, bytes):
+            yield document.data
+            return
+
+        head = cls._read_head(document.data)
+        if len(head) <= MAX_IN_MEMORY_DOCUMENT_BYTES:
+            yield head
+            return
+
+        _log.info(f"Spooling {document.name.name} to disk for extraction")
+        with NamedTemporaryFile(suffix=document.name.suffix) as spool:
+            spool.write(head)
+            shutil.copyfileobj(document.data, spool)
+            spool.flush()
+            yield Path(spool.name)
+
+    @classmethod
+    def _detach(cls, source: DocumentSource) -> Tuple[DocumentSource, Optional[Path]]:
+        """Converts a source into something that can be pickled to a worker process.
+
+        Returns the payload and, when a large stream had to be spooled to disk, the
+        temporary file the caller must delete once the worker is done.
+        """
+
+        if isinstance(source, Path) or isinstance(source.data, bytes):
+            return source, None
+
+        head = cls._read_head(source.data)
+        if len(head) <= MAX_IN_MEMORY_DOCUMENT_BYTES:
+            return InMemoryDocument(name=source.name, data=head), None
+
+        _log.info(f"Spooling {source.name.name} to disk for extraction")
+        with NamedTemporaryFile(suffix=source.name.suffix, delete=False) as spool:
+            spool.write(head)
+            shutil.copyfileobj(source.data, spool)
+
+        return Path(spool.name), Path(spool.name)
+
+    @staticmethod
+    def _read_head(stream: BinaryIO) -> bytes:
+        # Reading one byte past the limit tells us whether the document fits in memory
+        if stream.seekable():
+            stream.seek(0)
+        return stream.read(MAX_IN_MEMORY_DOCUMENT_BYTES + 1)
+
+    @classmethod
+    def _collect(cls, file_path: Path, future: Future, executor: ProcessPoolExecutor) -> Tuple[str, float, Optional[str]]:
+        """Returns a finished future's text, extraction seconds and error reason, if it failed."""
+
+        try:
+            text, elapsed_s = future.result()
+            metrics.OCR_SECONDS.labels(kind=metrics.file_kind(file_path.suffix)).observe(elapsed_s)
+            return text, elapsed_s, None
+        except BrokenProcessPool:
+            _log.exception(f"OCR worker died while extracting {file_path.name}. Returning empty text")
+            cls._discard_executor(executor)
+            return "", 0.0, WORKER_CRASHED
+        except Exception as error:
+            _log.exception(f"Failed to extract text from {file_path.name}. Returning empty text")
+            return "", 0.0, error_reason(error)
+
+    @classmethod
+    def _discard_executor(cls, executor: ProcessPoolExecutor) -> None:
+        # A crashed worker breaks the whole pool, so the next call must start a fresh one
+        with cls._executor_lock:
+            if cls._executor is executor:
+                cls._executor = None
+                cls._executor_workers = 0
+
+    @classmethod
+    def _extract_text_or_error(cls, source: DocumentSource, options: ExtractionOptions) -> Tuple[str, Optional[str]]:
+        try:
+            return _extract_text_worker(source, options), None
+        except Exception as error:
+            _log.exception(f"Failed to extract text from {source_name(source).name}. Returning empty text")
+            return "", error_reason(error)
     
     @classmethod
-    def _run_image_ocr_single_file(cls, file_path: Path) -> str:
+    def _run_image_ocr_single_file(cls, payload: Union[Path, bytes], name: Path, options: ExtractionOptions = DEFAULT_OPTIONS) -> str:
         _log.debug(f"Using image OCR extractor")
 
         try:
-            image = Image.open(file_path)
-            text: str = pytesseract.image_to_string(image)
-            return text
+            with Image.open(payload if isinstance(payload, Path) else BytesIO(payload)) as image:
+                return cls._ocr_image(image, options)
         except Exception:
-            _log.exception(f"Error extracting text from image {file_path.name}")
+            _log.exception(f"Error extracting text from image {name.name}")
+            raise
+
+    @classmethod
+    def _ocr_image(cls, image: Image.Image, options: ExtractionOptions) -> str:
+        image = cls._preprocess_image(image, options)
+        timeout_s = cls._ocr_timeout_s(options)
+
+        # pytesseract kills the tesseract subprocess when the timeout expires; 0 disables it
+        try:
+            text: str = pytesseract.image_to_string(image, config=options.tesseract_args(), timeout=timeout_s or 0)
+        except RuntimeError as error:
+            if 'timeout' in str(error).lower():
+                raise OCRTimeoutError(f"Tesseract did not finish within {timeout_s}s") from error
             raise
+
+        return text
+
+    @staticmethod
+    def _ocr_timeout_s(options: ExtractionOptions) -> Optional[float]:
+        """Returns how long the next tesseract call may run: the OCR timeout, capped to the time left.
+
+        Raises:
+            OCRTimeoutError: If the deadline has passed.
+        """
+
+        remaining_s = _remaining_s(options.ocr_deadline)
+        if remaining_s is None:
+            return options.ocr_timeout_s
+        if remaining_s <= 0:
+            raise OCRTimeoutError("Extraction ran past its deadline")
+
+        return remaining_s if options.ocr_timeout_s is None else min(options.ocr_timeout_s, remaining_s)
+
+    @classmethod
+    def _preprocess_image(cls, image: Image.Image, options: ExtractionOptions) -> Image.Image:
+        """Shrinks an image to what tesseract needs before it is decoded in full.
+
+        pytesseract writes the image to a temp file for the tesseract subprocess, so
+        a smaller grayscale image saves encoding time as well as memory.
+        """
+
+        target_size = cls._target_size(image, options)
+
+        # JPEG can decode straight to a power-of-two downscale (and to grayscale), so
+        # the full-resolution bitmap is never held in memory. Only works before loading
+        if image.format == 'JPEG' and target_size != image.size:
+            image.draft('L' if options.image_grayscale else 'RGB', target_size)
+
+        if options.image_grayscale and image.mode != 'L':
+            image = image.convert('L')
+
+        if target_size[0] < image.size[0] or target_size[1] < image.size[1]:
+            image.thumbnail(target_size, Image.Resampling.LANCZOS)
+
+        if options.image_autocrop:
+            image = cls._autocrop(image)
+
+        return image
+
+    @staticmethod
+    def _target_size(image: Image.Image, options: ExtractionOptions) -> Tuple[int, int]:
+        width, height = image.size
+        scale = 1.0
+
+        dpi = image.info.get('dpi')
+        if options.image_target_dpi and dpi:
+            try:
+                source_dpi = max(float(value) for value in dpi)
+            except (TypeError, ValueError):
+                source_dpi = 0.0
+            if source_dpi > options.image_target_dpi:
+                scale = min(scale, options.image_target_dpi / source_dpi)
+
+        if options.image_max_dimension and max(width, height) > options.image_max_dimension:
+            scale = min(scale, options.image_max_dimension / max(width, height))
+
+        return max(1, int(width * scale)), max(1, int(height * scale))
+
+    @staticmethod
+    def _autocrop(image: Image.Image) -> Image.Image:
+        grayscale = image if image.mode == 'L' else image.convert('L')
+        content_box = grayscale.point(lambda value: 255 if value < AUTOCROP_THRESHOLD else 0).getbbox()
+        if content_box is None:
+            return image
+
+        left, top, right, bottom = content_box
+        return image.crop((
+            max(0, left - AUTOCROP_MARGIN),
+            max(0, top - AUTOCROP_MARGIN),
+            min(image.width, right + AUTOCROP_MARGIN),
+            min(image.height, bottom + AUTOCROP_MARGIN),
+        ))
     
     @classmethod
-    def _run_pdf_ocr_single_file(cls, file_path: Path) -> str:
-        _log.debug(f"Using PDF OCR extractor")
+    def _run_pdf_ocr_single_file(cls, payload: Union[Path, bytes], name: Path, options: ExtractionOptions = DEFAULT_OPTIONS) -> str:
+        _log.debug(f"Using PDF OCR extractor with {options.pdf_profile.value} profile")
+
+        # Deferred so importing the extractor stays cheap for processes that never see a PDF
+        import pymupdf
+
+        with (pymupdf.open(payload) if isinstance(payload, Path) else pymupdf.open(stream=payload, filetype='pdf')) as doc:
+            if options.pdf_profile == PdfProfile.FAST:
+                return cls._read_pdf_pages(doc, name, options)
+            return cls._read_pdf_markdown(doc, name, options)
+
+    @classmethod
+    def _read_pdf_markdown(cls, doc, name: Path, options: ExtractionOptions) -> str:
+        """Converts a PDF to markdown, a page at a time when there is a deadline to check between pages."""
+
+        import pymupdf4llm
+
+        if options.ocr_deadline is None:
+            return pymupdf4llm.to_markdown(doc, filename=name.name)
+
+        # Header levels come from font sizes across the whole document, so they are
+        # measured once, as a single call would, and shared by the per-page calls
+        headers = pymupdf4llm.IdentifyHeaders(doc)
+
+        page_markdowns: List[str] = []
+        for page_number in range(doc.page_count):
+            # Raises once the deadline has passed
+            cls._ocr_timeout_s(options)
+            page_markdowns.append(pymupdf4llm.to_markdown(doc, pages=[page_number], hdr_info=headers, filename=name.name))
+
+        return "".join(page_markdowns)
+
+    @classmethod
+    def _read_pdf_pages(cls, doc, name: Path, options: ExtractionOptions) -> str:
+        """Reads the native text layer of the first pages, OCRing only pages without one.
+
+        Skips the markdown layout and table analysis, whose cost grows with page count
+        and which the classifier does not need: the first pages identify the document.
+        """
+
+        import pymupdf
+
+        page_texts: List[str] = []
+        for page_number in range(min(doc.page_count, options.max_pdf_pages)):
+            # Raises once the deadline has passed, rather than starting another page
+            cls._ocr_timeout_s(options)
+
+            page = doc[page_number]
+            text: str = page.get_text('text')
+
+            # Scanned pages have no text layer, so render them for tesseract
+            if not text.strip():
+                _log.debug(f"Page {page_number + 1} of {name.name} has no text layer, running OCR")
+                pixmap = page.get_pixmap(dpi=PDF_OCR_DPI, colorspace=pymupdf.csGRAY, alpha=False)
+                image = Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+                text = cls._ocr_image(image, options)
 
-        markdown_doc: str = pymupdf4llm.to_markdown(file_path)
+            page_texts.append(text)
 
-        return markdown_doc
+        return "\n".join(page_texts)
 
 
 if __name__ == '__main__':
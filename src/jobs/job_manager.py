@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.classifier import Classifier
+from src.types.classifier_input import ClassifierInput
+from src.types.classifier_output import ClassifierOutput
+from src.types.document_type import DocumentType
+from src.types.job_status import JobStatus
+from src.types.pdf_profile import PdfProfile
+
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_PENDING_JOBS = 64
+DEFAULT_JOB_TTL_S = 60 * 60
+DEFAULT_CHUNK_SIZE = 8
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the pending queue is at capacity."""
+
+
+@dataclass
+class Job:
+    job_id: str
+    files: List[Path]
+    status: JobStatus = JobStatus.PENDING
+    results: Dict[Path, DocumentType] = field(default_factory=dict)
+    # Why individual files were classified as UNKNOWN, e.g. an OCR timeout
+    file_errors: Dict[Path, str] = field(default_factory=dict)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    pdf_profile: Optional[PdfProfile] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status.value,
+            "total_files": len(self.files),
+            "completed_files": len(self.results),
+            "file_classes": {file_path.name: result_class.value for file_path, result_class in self.results.items()},
+            "file_errors": {file_path.name: reason for file_path, reason in self.file_errors.items()},
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Runs classification jobs in the background on a bounded worker pool.
+
+    Each job classifies its files in chunks of `chunk_size`, so results become
+    visible to pollers while the rest of the job is still running. Submissions are
+    rejected once `max_pending_jobs` jobs are waiting or running, and finished jobs
+    are dropped `ttl_s` seconds after they complete.
+    """
+
+    def __init__(
+        self,
+        classifier: Classifier,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_pending_jobs: int = DEFAULT_MAX_PENDING_JOBS,
+        ttl_s: float = DEFAULT_JOB_TTL_S,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self._classifier = classifier
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="classify-job")
+        self._max_pending_jobs = max_pending_jobs
+        self._ttl_s = ttl_s
+        self._chunk_size = chunk_size
+
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        files: List[Path],
+        on_finished: Optional[Callable[[], None]] = None,
+        pdf_profile: Optional[PdfProfile] = None,
+    ) -> Job:
+        """Queues a batch of files for classification.
+
+        Args:
+            files (List[Path]): Files to classify. They must stay on disk until the job finishes.
+            on_finished (Callable): Optional hook run once the job completes or fails,
+                e.g. to clean up uploaded files.
+            pdf_profile (PdfProfile): Optional PDF extraction profile overriding the classifier's.
+
+        Returns:
+            Job: The queued job.
+        """
+
+        with self._lock:
+            self._purge_expired()
+
+            active = sum(1 for job in self._jobs.values() if job.status in (JobStatus.PENDING, JobStatus.RUNNING))
+            if active >= self._max_pending_jobs:
+                raise JobQueueFullError(f"Job queue is full ({active} active jobs)")
+
+            job = Job(job_id=uuid.uuid4().hex, files=files, pdf_profile=pdf_profile)
+            self._jobs[job.job_id] = job
+
+        _log.info(f"Queued job {job.job_id} with {len(files)} files")
+        self._executor.submit(self._run, job, on_finished)
+
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def describe(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns a consistent snapshot of a job's status and results so far."""
+
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job is not None else None
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def _run(self, job: Job, on_finished: Optional[Callable[[], None]]) -> None:
+        with self._lock:
+            job.status = JobStatus.RUNNING
+        _log.info(f"Running job {job.job_id}")
+
+        try:
+            for start in range(0, len(job.files), self._chunk_size):
+                chunk = job.files[start:start + self._chunk_size]
+                output: ClassifierOutput = self._classifier.classify(ClassifierInput(files=chunk, pdf_profile=job.pdf_profile))
+
+                with self._lock:
+                    job.results.update(output.output_per_file)
+                    job.file_errors.update(output.errors_per_file)
+
+            status, error = JobStatus.COMPLETED, None
+        except Exception as exception:
+            _log.exception(f"Job {job.job_id} failed")
+            status, error = JobStatus.FAILED, str(exception)
+
+        if on_finished is not None:
+            try:
+                on_finished()
+            except Exception:
+                _log.exception(f"Cleanup failed for job {job.job_id}")
+
+        with self._lock:
+            job.status = status
+            job.error = error
+            job.finished_at = time.time()
+
+        _log.info(f"Finished job {job.job_id} with status {job.status.value}")
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self._ttl_s
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
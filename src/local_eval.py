@@ -1,52 +1,314 @@
+import argparse
+import json
 import logging
+import os
+import time
 from pathlib import Path
-from typing import List
-from src.classifier import Classifier
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.cache.ocr_cache import OCRCache
+from src.classifier.cascade_classifier import CascadeClassifier
+from src.classifier.embedding_classifier import EmbeddingClassifier
+from src.classifier.linear_text_model import DEFAULT_TRAINING_SAMPLES, LinearTextModel
 from src.classifier.zero_shot_classifier import ZeroShotClassifier
-from src.dataset.invoice_dataset import InvoiceDataset
-from src.dataset.license_dataset import LicenseDataset
-from src.dataset.statements_dataset import StatementsDataset
+from src.constants import LINEAR_MODEL_PATH, OCR_CACHE_DIR
+from src.dataset.labeled_texts import load_labeled_texts
+from src.dataset.manifest import DatasetManifest
+from src.feature_extraction.ocr_extractor import OCRExtractor
+from src.types.document_type import DocumentType
+from src.types.extraction_options import ExtractionOptions
+from src.types.inference_backend import InferenceBackend
+from src.types.pdf_profile import PdfProfile
+
 
-from src.types.classifier_input import ClassifierInput
-from src.types.classifier_output import ClassifierOutput
-from src.types.document_type import DOCUMENT_TO_INT_LABEL
+_log = logging.getLogger(__name__)
 
-import torch
-from torch.utils.data import ConcatDataset, DataLoader
-from torcheval.metrics.functional import multiclass_accuracy
+CLASSIFIERS = ('zero_shot', 'embedding', 'cascade')
 
+DEFAULT_SAMPLES_PER_CLASS = 100
+DEFAULT_SEED = 0
+DEFAULT_BATCH_SIZE = 16
+
+# Extracted text is the expensive feature, so the store is sized for whole corpora
+FEATURE_STORE_MAX_BYTES = 4 * 1024 * 1024 * 1024
+
+# Any classifier that can classify already-extracted text
+TextClassifier = Union[ZeroShotClassifier, EmbeddingClassifier, CascadeClassifier]
+
+Sample = Tuple[Path, DocumentType]
+
+
+def load_linear_model(model_path: Path, ocr_cache: OCRCache) -> LinearTextModel:
+    if model_path.exists():
+        return LinearTextModel.load(model_path)
+
+    _log.info(f"No linear model at {model_path}, training one from the bundled datasets")
+    linear_model = LinearTextModel.train(load_labeled_texts(DEFAULT_TRAINING_SAMPLES, ocr_cache=ocr_cache))
+    linear_model.save(model_path)
+
+    return linear_model
+
+
+def build_classifier(
+    name: str,
+    ocr_cache: OCRCache,
+    prototypes_per_type: int = 0,
+    linear_model_path: Path = Path(LINEAR_MODEL_PATH),
+    backend: InferenceBackend = InferenceBackend.TORCH,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    ocr_workers: Optional[int] = None,
+) -> TextClassifier:
+    if name == 'cascade':
+        return CascadeClassifier(
+            linear_model=load_linear_model(linear_model_path, ocr_cache),
+            fallback=ZeroShotClassifier(backend=backend, batch_size=batch_size, lazy=True),
+            ocr_workers=ocr_workers,
+            ocr_cache=ocr_cache,
+        )
+    elif name == 'embedding':
+        prototype_texts = None
+        if prototypes_per_type > 0:
+            prototype_texts = EmbeddingClassifier.build_prototype_texts(prototypes_per_type, ocr_cache=ocr_cache)
+        return EmbeddingClassifier(
+            prototype_texts=prototype_texts,
+            batch_size=batch_size,
+            ocr_workers=ocr_workers,
+            ocr_cache=ocr_cache,
+        )
+
+    return ZeroShotClassifier(backend=backend, batch_size=batch_size, ocr_workers=ocr_workers, ocr_cache=ocr_cache)
+
+
+def collect_samples(samples_per_class: int, seed: int) -> List[Sample]:
+    """Samples distinct labeled files from the manifest's held-out part, reproducibly for a given seed.
+
+    The trained stages never see the held-out part, so their accuracy is measured
+    on unseen documents.
+    """
+
+    _, held_out = DatasetManifest.load_or_build().split()
+    entries = held_out.sample(samples_per_class, seed=seed)
+    return [(entry.path, entry.label) for entry in entries]
+
+
+def extract_features(
+    samples: List[Sample],
+    feature_store: OCRCache,
+    num_workers: int,
+    options: ExtractionOptions,
+) -> Tuple[Dict[Path, str], Dict[Path, float]]:
+    """Extracts text for every sample, reusing the feature store across runs.
+
+    Returns:
+        Tuple[Dict[Path, str], Dict[Path, float]]: Text per file, and OCR seconds for the
+            files that were not already in the store.
+    """
+
+    ocr_seconds: Dict[Path, float] = {}
+
+    start = time.perf_counter()
+    text_per_file = OCRExtractor.extract_all_documents(
+        paths_list=[file_path for file_path, _ in samples],
+        num_workers=num_workers,
+        cache=feature_store,
+        options=options,
+        timings=ocr_seconds,
+    )
+    _log.info(
+        f"Extracted features for {len(text_per_file)} files in {time.perf_counter() - start:.1f}s "
+        f"({len(ocr_seconds)} extracted, {len(text_per_file) - len(ocr_seconds)} from the feature store)"
+    )
+
+    return text_per_file, ocr_seconds
+
+
+def run_inference(
+    classifier: TextClassifier,
+    text_per_file: Dict[Path, str],
+    batch_size: int,
+) -> Tuple[Dict[Path, DocumentType], Dict[Path, float]]:
+    """Classifies extracted texts in batches.
+
+    Returns:
+        Tuple[Dict[Path, DocumentType], Dict[Path, float]]: Prediction per file, and each
+            file's share of its batch's inference time.
+    """
+
+    predictions: Dict[Path, DocumentType] = {}
+    model_seconds: Dict[Path, float] = {}
+    file_paths = list(text_per_file)
+
+    for start in range(0, len(file_paths), batch_size):
+        batch = {file_path: text_per_file[file_path] for file_path in file_paths[start:start + batch_size]}
+        _log.info(f"Classifying files {start + 1}-{start + len(batch)} of {len(file_paths)}")
+
+        batch_start = time.perf_counter()
+        predictions.update(classifier.classify_texts(batch))
+        elapsed_s = time.perf_counter() - batch_start
+
+        for file_path in batch:
+            model_seconds[file_path] = elapsed_s / len(batch)
+
+    return predictions, model_seconds
+
+
+def confusion_matrix(samples: List[Sample], predictions: Dict[Path, DocumentType]) -> Dict[DocumentType, Dict[DocumentType, int]]:
+    """Counts predictions per true label. Rows are true labels, columns predictions."""
+
+    matrix = {true_type: {pred_type: 0 for pred_type in DocumentType} for true_type in DocumentType}
+    for file_path, true_type in samples:
+        matrix[true_type][predictions[file_path]] += 1
+
+    return matrix
+
+
+def format_confusion_matrix(matrix: Dict[DocumentType, Dict[DocumentType, int]]) -> str:
+    width = max(len(doc_type.value) for doc_type in DocumentType) + 2
+    lines = ["true \\ pred".ljust(width) + "".join(doc_type.value.rjust(width) for doc_type in DocumentType)]
+    for true_type, row in matrix.items():
+        lines.append(true_type.value.ljust(width) + "".join(str(count).rjust(width) for count in row.values()))
+
+    return "\n".join(lines)
+
+
+def _mean_ms(values: List[float]) -> Optional[float]:
+    return round(1000 * sum(values) / len(values), 3) if values else None
+
+
+def summarize(
+    samples: List[Sample],
+    predictions: Dict[Path, DocumentType],
+    ocr_seconds: Dict[Path, float],
+    model_seconds: Dict[Path, float],
+) -> Dict[str, Any]:
+    """Builds the report: overall accuracy, confusion matrix and per-class accuracy and latency."""
+
+    matrix = confusion_matrix(samples, predictions)
+    correct = sum(matrix[doc_type][doc_type] for doc_type in DocumentType)
+
+    per_class: Dict[str, Any] = {}
+    for doc_type in DocumentType:
+        class_files = [file_path for file_path, true_type in samples if true_type == doc_type]
+        if not class_files:
+            continue
+
+        per_class[doc_type.value] = {
+            'files': len(class_files),
+            'accuracy': round(matrix[doc_type][doc_type] / len(class_files), 4),
+            'mean_ocr_ms': _mean_ms([ocr_seconds[file_path] for file_path in class_files if file_path in ocr_seconds]),
+            'mean_model_ms': _mean_ms([model_seconds[file_path] for file_path in class_files if file_path in model_seconds]),
+        }
+
+    return {
+        'files': len(samples),
+        'accuracy': round(correct / len(samples), 4) if samples else 0.0,
+        'confusion_matrix': {
+            true_type.value: {pred_type.value: count for pred_type, count in row.items()}
+            for true_type, row in matrix.items()
+        },
+        'per_class': per_class,
+    }
 
-_log = logging.getLogger(__name__)
 
 def main():
-    # Set up eval datasets
-    invoice_dataset = InvoiceDataset()
-    license_dataset = LicenseDataset()
-    bank_statements_dataset = StatementsDataset()
-    dataset = ConcatDataset([invoice_dataset, license_dataset, bank_statements_dataset])
-
-    dataloader = DataLoader(dataset, batch_size=1,shuffle=True)
-
-    classifier: Classifier = ZeroShotClassifier()
-
-    # Populate predictions over each batch, and calculate accuracy metric
-    predictions: List[int] = []
-    labels: List[int] = []
-    i = 0
-    for batch_files, batch_labels in dataloader:
-        if i % 5 == 0:
-            _log.info(f"Batch {i}/{len(dataloader)}")
-        i += 1
-
-        # Invoke classifier with input file
-        input = ClassifierInput(files=[Path(file) for file in batch_files])
-        output: ClassifierOutput = classifier.classify(input)
-
-        predictions += [DOCUMENT_TO_INT_LABEL[output_class] for output_class in output.output_per_file.values()]
-        labels += batch_labels
-    
-    accuracy = multiclass_accuracy(torch.tensor(predictions), torch.tensor(labels))
-    _log.info(f"Accuracy: {accuracy}")
+    parser = argparse.ArgumentParser(description="Evaluate a classifier on the bundled datasets.")
+    parser.add_argument('--classifier', choices=CLASSIFIERS, default='zero_shot')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES_PER_CLASS, help="Files sampled per document type")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--ocr-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Texts per model batch, each scored against every label")
+    parser.add_argument(
+        '--prototypes',
+        type=int,
+        default=0,
+        help="Few-shot prototype files per type for the embedding classifier, sampled from the training split so they never overlap the held-out eval files",
+    )
+    parser.add_argument(
+        '--linear-model',
+        type=Path,
+        default=Path(LINEAR_MODEL_PATH),
+        help="Linear model for the cascade classifier. Trained from the bundled datasets if missing",
+    )
+    parser.add_argument(
+        '--backend',
+        choices=[backend.value for backend in InferenceBackend],
+        default=InferenceBackend.TORCH.value,
+        help="Inference backend for the zero-shot classifier",
+    )
+    parser.add_argument(
+        '--baseline-backend',
+        choices=[backend.value for backend in InferenceBackend],
+        default=None,
+        help="Also evaluate the zero-shot classifier with this backend on the same files and report the accuracy delta",
+    )
+    parser.add_argument(
+        '--pdf-profile',
+        choices=[profile.value for profile in PdfProfile],
+        default=PdfProfile.RICH.value,
+        help="PDF extraction profile",
+    )
+    parser.add_argument('--output', type=Path, default=None, help="Optionally write the report as JSON")
+    args = parser.parse_args()
+
+    extraction_options = ExtractionOptions(pdf_profile=PdfProfile(args.pdf_profile))
+
+    # OCR output is cached on disk by content hash, so reruns only pay for inference
+    feature_store = OCRCache(cache_dir=Path(OCR_CACHE_DIR), max_disk_bytes=FEATURE_STORE_MAX_BYTES)
+
+    samples = collect_samples(args.samples, args.seed)
+    _log.info(f"Evaluating {args.classifier} on {len(samples)} files with seed {args.seed}")
+
+    text_per_file, ocr_seconds = extract_features(samples, feature_store, args.ocr_workers, extraction_options)
+
+    classifier = build_classifier(
+        args.classifier,
+        feature_store,
+        args.prototypes,
+        args.linear_model,
+        backend=InferenceBackend(args.backend),
+        batch_size=args.batch_size,
+    )
+    predictions, model_seconds = run_inference(classifier, text_per_file, args.batch_size)
+
+    report: Dict[str, Any] = {
+        'classifier': args.classifier,
+        'backend': args.backend,
+        'seed': args.seed,
+        'pdf_profile': args.pdf_profile,
+        **summarize(samples, predictions, ocr_seconds, model_seconds),
+        'feature_store': feature_store.stats(),
+    }
+
+    _log.info(f"Accuracy ({args.classifier}): {report['accuracy']}")
+    _log.info(f"Confusion matrix (rows are true labels):\n{format_confusion_matrix(confusion_matrix(samples, predictions))}")
+    for doc_type, class_report in report['per_class'].items():
+        _log.info(f"{doc_type}: {class_report}")
+
+    if isinstance(classifier, CascadeClassifier):
+        report['cascade_stages'] = classifier.stats()
+        _log.info(f"Cascade stage stats: {report['cascade_stages']}")
+
+    if args.baseline_backend is not None:
+        baseline = build_classifier('zero_shot', feature_store, backend=InferenceBackend(args.baseline_backend), batch_size=args.batch_size)
+        baseline_predictions, baseline_model_seconds = run_inference(baseline, text_per_file, args.batch_size)
+        baseline_report = summarize(samples, baseline_predictions, ocr_seconds, baseline_model_seconds)
+
+        agreement = sum(1 for file_path, _ in samples if predictions[file_path] == baseline_predictions[file_path]) / max(len(samples), 1)
+        report['baseline'] = {
+            'backend': args.baseline_backend,
+            'accuracy': baseline_report['accuracy'],
+            'accuracy_delta': round(report['accuracy'] - baseline_report['accuracy'], 4),
+            'agreement': round(agreement, 4),
+            'per_class': baseline_report['per_class'],
+        }
+        _log.info(f"Baseline ({args.baseline_backend}): {report['baseline']}")
+
+    _log.info(f"Feature store stats: {report['feature_store']}")
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+        _log.info(f"Wrote evaluation report to {args.output}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,112 @@
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+
+
+T = TypeVar('T')
+
+# Buckets span sub-millisecond cache hits up to multi-second OCR and model calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+UPLOAD_SECONDS = Histogram(
+    'classifier_upload_seconds',
+    "Time spent reading or saving uploaded files for a request",
+    buckets=LATENCY_BUCKETS,
+)
+OCR_SECONDS = Histogram(
+    'classifier_ocr_seconds',
+    "Per-file text extraction time",
+    ['kind'],
+    buckets=LATENCY_BUCKETS,
+)
+TOKENIZATION_SECONDS = Histogram(
+    'classifier_tokenization_seconds',
+    "Per-document tokenization time in the zero-shot pipeline",
+    buckets=LATENCY_BUCKETS,
+)
+MODEL_FORWARD_SECONDS = Histogram(
+    'classifier_model_forward_seconds',
+    "Per-batch model forward pass time",
+    buckets=LATENCY_BUCKETS,
+)
+SERIALIZATION_SECONDS = Histogram(
+    'classifier_response_serialization_seconds',
+    "Time spent serializing classification responses",
+    buckets=LATENCY_BUCKETS,
+)
+SCHEDULER_BATCH_SIZE = Histogram(
+    'classifier_scheduler_batch_size',
+    "Texts per model batch formed by the inference scheduler",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+SCHEDULER_QUEUE_DEPTH = Gauge('classifier_scheduler_queue_depth', "Texts waiting for the inference scheduler")
+# Per process, so under the pre-fork server each worker reports its own
+PROCESS_MEMORY_BYTES = Gauge('classifier_process_memory_bytes', "Resident memory of the serving process, by how it is shared", ['kind'])
+
+FILES = Counter('classifier_files', "Files received for classification", ['kind'])
+BYTES = Counter('classifier_bytes', "Bytes received for classification")
+CACHE_REQUESTS = Counter('classifier_cache_requests', "Cache lookups", ['cache', 'result'])
+PREDICTIONS = Counter('classifier_predictions', "Classification outcomes, including UNKNOWN", ['document_type'])
+CASCADE_DECISIONS = Counter('classifier_cascade_decisions', "Files decided by each cascade stage", ['stage'])
+# Files matched to an earlier copy skip OCR; the share matched 'exact' is the dedupe ratio
+DEDUPLICATED_FILES = Counter('classifier_deduplicated_files', "Files checked for duplicates before OCR, by match", ['match'])
+
+
+def file_kind(suffix: str) -> str:
+    """Maps a file suffix to the metric label used for per-type breakdowns."""
+
+    suffix = suffix.lower()
+    if suffix == '.pdf':
+        return 'pdf'
+    elif suffix in ('.png', '.jpg'):
+        return 'image'
+    return 'other'
+
+
+@contextmanager
+def timed(histogram: Histogram) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+
+def timed_function(fn: Callable[..., T], histogram: Histogram) -> Callable[..., T]:
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with timed(histogram):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def timed_generator(fn: Callable[..., Iterable[T]], histogram: Histogram) -> Callable[..., Iterator[T]]:
+    """Wraps a generator function, observing the total time spent producing its items.
+
+    Time the consumer spends between items is excluded, so this measures only the
+    generator's own work.
+    """
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        iterator = iter(fn(*args, **kwargs))
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield item
+        finally:
+            histogram.observe(elapsed)
+
+    return wrapper
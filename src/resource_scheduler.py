@@ -0,0 +1,231 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.classifier import Classifier
+from src.feature_extraction.ocr_extractor import OCRExtractor
+from src.types.classifier_input import ClassifierInput
+from src.types.inference_backend import InferenceBackend
+from src.types.thread_budget import ThreadBudget
+
+
+_log = logging.getLogger(__name__)
+
+SAMPLE_FILES_DIR = Path('files')
+DEFAULT_THREAD_BUDGET_PATH = 'thread_budget.json'
+
+
+class ResourceScheduler:
+    """Applies a process-wide `ThreadBudget`, so OCR and the model share the cores instead of fighting over them.
+
+    Tesseract, torch and ONNX Runtime each size their thread pools for the whole
+    machine. Run side by side, as in a pipelined or scheduled classifier, they
+    oversubscribe the cores and spend their time context switching. `apply` caps
+    each of them:
+
+    - torch intra-op and inter-op threads, set directly.
+    - tesseract's OpenMP threads, through `OMP_THREAD_LIMIT`. Tesseract runs as a
+      subprocess and reads it from the environment it inherits.
+    - OCR worker processes, read by classifiers built without an explicit
+      `ocr_workers`.
+    - ONNX Runtime intra-op threads, read when an ONNX session is created.
+
+    `autotune` measures candidate budgets end to end and applies the fastest.
+    """
+
+    _budget: Optional[ThreadBudget] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def apply(cls, budget: ThreadBudget, backend: InferenceBackend = InferenceBackend.TORCH) -> None:
+        """Makes `budget` the process-wide thread budget.
+
+        Args:
+            budget (ThreadBudget): Threads per stage.
+            backend (InferenceBackend): Backend the model runs on. Torch is only
+                imported, and its threads only set, for the torch backends.
+        """
+
+        # Torch goes first: OpenMP reads OMP_THREAD_LIMIT once, when torch loads it, so
+        # setting the variable before torch is imported would cap the model as well
+        if backend != InferenceBackend.ONNX:
+            cls._set_torch_threads(budget)
+        os.environ['OMP_THREAD_LIMIT'] = str(budget.tesseract_threads)
+
+        with cls._lock:
+            previous, cls._budget = cls._budget, budget
+
+        # Pool workers copied the environment when they started, so they need replacing
+        if previous is not None and previous.tesseract_threads != budget.tesseract_threads:
+            OCRExtractor.shutdown_workers()
+
+        _log.info(f"Applied thread budget {budget.to_dict()}")
+
+    @classmethod
+    def budget(cls) -> Optional[ThreadBudget]:
+        """Returns the applied thread budget, or None if the defaults are in effect."""
+
+        with cls._lock:
+            return cls._budget
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forgets the applied budget. Threads already set stay as they are."""
+
+        with cls._lock:
+            cls._budget = None
+
+    @classmethod
+    def ocr_workers(cls, configured: Optional[int] = None) -> int:
+        """Resolves a classifier's OCR worker count: its own setting, else the budget's, else 1."""
+
+        if configured is not None:
+            return configured
+
+        budget = cls.budget()
+        return budget.ocr_workers if budget is not None else 1
+
+    @classmethod
+    def load(cls, budget_path: Path) -> ThreadBudget:
+        with open(budget_path) as budget_file:
+            return ThreadBudget.from_dict(json.load(budget_file))
+
+    @staticmethod
+    def save(budget: ThreadBudget, budget_path: Path, results: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Writes a budget as JSON, with the autotune measurements it was picked from if given."""
+
+        with open(budget_path, 'w') as budget_file:
+            json.dump({**budget.to_dict(), 'autotune': results or []}, budget_file, indent=2)
+
+    @staticmethod
+    def _set_torch_threads(budget: ThreadBudget) -> None:
+        try:
+            import torch
+        except ImportError:
+            _log.warning(f"torch is not installed, so the budget's {budget.model_threads} model threads were not applied to it")
+            return
+
+        torch.set_num_threads(budget.model_threads)
+
+        # Inter-op threads can only be set once, before any inter-op work has run
+        if torch.get_num_interop_threads() != budget.model_interop_threads:
+            try:
+                torch.set_num_interop_threads(budget.model_interop_threads)
+            except RuntimeError:
+                _log.warning(
+                    f"Keeping {torch.get_num_interop_threads()} torch inter-op threads; "
+                    f"they were already set before the budget asked for {budget.model_interop_threads}"
+                )
+
+    @staticmethod
+    def candidate_budgets(cpu_count: int) -> List[ThreadBudget]:
+        """Returns the splits of `cpu_count` cores that `autotune` tries.
+
+        OCR gets a power of two of single-threaded workers, up to all cores but one,
+        and the model the remaining cores. Tesseract's own threading scales poorly, so
+        more workers beat more threads per worker.
+        """
+
+        worker_counts = {1}
+        workers = 2
+        while workers < cpu_count:
+            worker_counts.add(workers)
+            workers *= 2
+        worker_counts.add(max(1, cpu_count - 1))
+
+        return [ThreadBudget.split(cpu_count, ocr_workers) for ocr_workers in sorted(worker_counts)]
+
+    @classmethod
+    def autotune(
+        cls,
+        classifier: Classifier,
+        files: List[Path],
+        candidates: List[ThreadBudget],
+        backend: InferenceBackend = InferenceBackend.TORCH,
+    ) -> Tuple[ThreadBudget, List[Dict[str, Any]]]:
+        """Classifies `files` under each candidate budget and applies the fastest.
+
+        Each candidate first runs a short untimed pass so worker start-up is not
+        counted, then classifies every file through `classify_iter`, which overlaps
+        OCR with inference the way serving does. The classifier must resolve its OCR
+        workers from the budget and must not cache extracted text, or later
+        candidates would skip OCR.
+
+        Args:
+            classifier (Classifier): A loaded classifier, built without `ocr_workers`
+                or an OCR cache.
+            files (List[Path]): Files to classify, e.g. the bundled samples.
+            candidates (List[ThreadBudget]): Budgets to try.
+            backend (InferenceBackend): Backend the classifier's model runs on.
+
+        Returns:
+            Tuple[ThreadBudget, List[Dict[str, Any]]]: The fastest budget, and the
+                files per second measured for each candidate.
+        """
+
+        if not files:
+            raise ValueError("Autotuning needs at least one file")
+        if not candidates:
+            raise ValueError("Autotuning needs at least one candidate budget")
+
+        results: List[Dict[str, Any]] = []
+        for budget in candidates:
+            cls.apply(budget, backend)
+            list(classifier.classify_iter(ClassifierInput(files=files[:budget.ocr_workers])))
+
+            start = time.perf_counter()
+            predictions = list(classifier.classify_iter(ClassifierInput(files=files)))
+            elapsed_s = time.perf_counter() - start
+
+            files_per_sec = len(predictions) / elapsed_s if elapsed_s else 0.0
+            _log.info(f"Budget {budget.to_dict()}: {files_per_sec:.2f} files/sec")
+            results.append({'budget': budget.to_dict(), 'elapsed_s': round(elapsed_s, 3), 'files_per_sec': round(files_per_sec, 3)})
+
+        best_index = max(range(len(candidates)), key=lambda index: results[index]['files_per_sec'])
+        best = candidates[best_index]
+        cls.apply(best, backend)
+
+        return best, results
+
+
+def main():
+    # Imported here because the classifiers read the scheduler's budget
+    from src.local_eval import CLASSIFIERS, DEFAULT_BATCH_SIZE, build_classifier
+
+    parser = argparse.ArgumentParser(description="Find the split of CPU cores between OCR and the model that classifies fastest.")
+    parser.add_argument('--files', type=Path, default=SAMPLE_FILES_DIR, help="Directory of sample files to classify")
+    parser.add_argument('--cpus', type=int, default=os.cpu_count() or 1, help="Cores to split")
+    parser.add_argument('--classifier', choices=CLASSIFIERS, default='zero_shot')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Texts per model batch, each scored against every label")
+    parser.add_argument(
+        '--backend',
+        choices=[backend.value for backend in InferenceBackend],
+        default=InferenceBackend.TORCH.value,
+        help="Inference backend for the zero-shot classifier",
+    )
+    parser.add_argument('--output', type=Path, default=Path(DEFAULT_THREAD_BUDGET_PATH), help="Where to write the chosen budget")
+    args = parser.parse_args()
+
+    files = sorted(path for path in OCRExtractor.iter_sources(dir_path=args.files) if isinstance(path, Path))
+
+    # No OCR cache, so every candidate pays for extraction
+    classifier = build_classifier(args.classifier, ocr_cache=None, backend=InferenceBackend(args.backend), batch_size=args.batch_size)
+    if hasattr(classifier, 'warmup'):
+        classifier.warmup()
+
+    try:
+        best, results = ResourceScheduler.autotune(classifier, files, ResourceScheduler.candidate_budgets(args.cpus), InferenceBackend(args.backend))
+    finally:
+        OCRExtractor.shutdown_workers()
+
+    ResourceScheduler.save(best, args.output, results)
+    _log.info(f"Fastest budget {best.to_dict()} written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Gunicorn settings for serving the classifier from pre-forked workers:
+#
+#     gunicorn -c python:src.serving.gunicorn_config
+#
+# The master loads and warms up the model before forking (`preload_app`), so the
+# workers share its weights copy-on-write instead of loading a copy each. See the
+# README for the environment variables read here and how to reload.
+
+import gc
+import logging
+import os
+from pathlib import Path
+
+from src.app import DEFAULT_CLASSIFIER, MAX_REQUEST_TIME_BUDGET_S, app
+from src.resource_scheduler import ResourceScheduler
+from src.serving.memory import PREFORK_MASTER_PID_ENV, process_memory
+from src.types.thread_budget import ThreadBudget
+
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_TORCH_THREADS = 2
+DEFAULT_REQUEST_THREADS = 4
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+# Threads of each worker. A budget file, e.g. from `python -m src.resource_scheduler`, takes precedence
+if os.environ.get('CLASSIFIER_THREAD_BUDGET'):
+    thread_budget = ResourceScheduler.load(Path(os.environ['CLASSIFIER_THREAD_BUDGET']))
+else:
+    thread_budget = ThreadBudget(model_threads=max(1, _env_int('CLASSIFIER_TORCH_THREADS', DEFAULT_TORCH_THREADS)))
+
+bind = os.environ.get('CLASSIFIER_BIND', '0.0.0.0:5000')
+workers = max(1, _env_int('WEB_CONCURRENCY', (os.cpu_count() or 1) // thread_budget.cores()))
+worker_class = 'gthread'
+threads = max(1, _env_int('CLASSIFIER_REQUEST_THREADS', DEFAULT_REQUEST_THREADS))
+
+preload_app = True
+wsgi_app = 'src.serving.gunicorn_config:load_application()'
+
+# Requests are bounded by their own time budget; this only catches stuck workers
+timeout = int(MAX_REQUEST_TIME_BUDGET_S) + 60
+graceful_timeout = int(MAX_REQUEST_TIME_BUDGET_S) + 30
+
+# Recycling workers gives back the pages they have copied from the master over time
+max_requests = 1000
+max_requests_jitter = 100
+
+
+def load_application():
+    """Imports the app and warms up its model. Runs once, in the master.
+
+    The warm-up runs single-threaded: an OpenMP thread pool started before fork is
+    not usable in the children, and each worker sets its own thread count anyway.
+    Afterwards `gc.freeze()` moves every existing object out of the garbage
+    collector's reach, so collections in the workers do not write to, and thereby
+    copy, the pages those objects live on.
+    """
+
+    os.environ[PREFORK_MASTER_PID_ENV] = str(os.getpid())
+    # HuggingFace tokenizers disable their thread pool in forked children, with a warning
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+
+    # Inter-op threads can only be set once, so the master sets the workers' count
+    ResourceScheduler.apply(ThreadBudget(model_interop_threads=thread_budget.model_interop_threads))
+    DEFAULT_CLASSIFIER.warmup()
+
+    gc.collect()
+    gc.freeze()
+
+    memory = process_memory()
+    kind = 'rss' if 'rss' in memory else 'max_rss'
+    _log.info(f"Loaded model in master {os.getpid()}, {kind} {memory[kind] / 2**20:.0f} MiB")
+
+    return app
+
+
+def post_fork(server, worker) -> None:
+    ResourceScheduler.apply(thread_budget)
+
+
+def post_worker_init(worker) -> None:
+    memory = process_memory()
+    _log.info(
+        f"Worker {worker.pid} ready with thread budget {thread_budget.to_dict()}, "
+        f"pss {memory.get('pss', 0) / 2**20:.0f} MiB, private {memory.get('private', 0) / 2**20:.0f} MiB"
+    )
@@ -0,0 +1,113 @@
+import logging
+import os
+import resource
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+
+_log = logging.getLogger(__name__)
+
+# Set by the pre-fork master before it forks, so workers can find their siblings
+PREFORK_MASTER_PID_ENV = 'CLASSIFIER_PREFORK_MASTER_PID'
+
+_PROC_DIR = Path('/proc')
+
+# smaps_rollup fields, in kB, summed into each reported kind
+_SMAPS_FIELDS: Dict[str, List[str]] = {
+    'rss': ['Rss'],
+    'pss': ['Pss'],
+    'shared': ['Shared_Clean', 'Shared_Dirty'],
+    'private': ['Private_Clean', 'Private_Dirty'],
+}
+
+
+def process_memory(pid: Union[int, str] = 'self') -> Dict[str, int]:
+    """Returns a process's resident memory in bytes, split by how much of it is shared.
+
+    `rss` counts every resident page, so it overstates forked workers: pages they
+    still share copy-on-write with the master are counted in full by each of them.
+    `pss` divides each shared page between the processes sharing it, so summing it
+    over the master and its workers gives their real footprint. `private` is what a
+    worker has copied or allocated for itself.
+
+    Where /proc/<pid>/smaps_rollup is not available (non-Linux hosts and kernels
+    older than 4.14), only the calling process can be measured, and only its peak
+    resident memory, reported as `max_rss`.
+
+    Args:
+        pid (Union[int, str]): Process id, or 'self' for the calling process.
+
+    Returns:
+        Dict[str, int]: Bytes per kind: rss, pss, shared and private, or only max_rss.
+    """
+
+    try:
+        rollup = (_PROC_DIR / str(pid) / 'smaps_rollup').read_text()
+    except OSError:
+        if pid not in ('self', os.getpid()):
+            raise
+
+        # ru_maxrss is the peak, in kB on Linux and bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {'max_rss': max_rss if sys.platform == 'darwin' else max_rss * 1024}
+
+    kilobytes: Dict[str, int] = {}
+    for line in rollup.splitlines():
+        field, _, value = line.partition(':')
+        if value.strip().endswith('kB'):
+            kilobytes[field] = int(value.split()[0])
+
+    return {kind: sum(kilobytes.get(field, 0) for field in fields) * 1024 for kind, fields in _SMAPS_FIELDS.items()}
+
+
+def child_pids(parent_pid: int) -> List[int]:
+    """Returns the ids of a process's direct children, read from /proc."""
+
+    pids: List[int] = []
+    for stat_path in _PROC_DIR.glob('[0-9]*/stat'):
+        try:
+            stat = stat_path.read_text()
+        except OSError:
+            # The process exited while we were scanning
+            continue
+
+        # The command name is in parentheses and may contain spaces, so split after it
+        fields = stat[stat.rfind(')') + 2:].split()
+        if int(fields[1]) == parent_pid:
+            pids.append(int(stat_path.parent.name))
+
+    return sorted(pids)
+
+
+def serving_memory() -> Dict[str, Any]:
+    """Reports the memory of every process serving requests.
+
+    Under the pre-fork server this is the master and each of its workers, plus the
+    sum of their proportional set sizes. Otherwise it is just the calling process.
+
+    Returns:
+        Dict[str, Any]: The master's and workers' pid and memory, and their total PSS.
+    """
+
+    master_pid: Optional[str] = os.environ.get(PREFORK_MASTER_PID_ENV)
+    if master_pid is None:
+        return {
+            'master': None,
+            'workers': [{'pid': os.getpid(), 'memory': process_memory()}],
+        }
+
+    master = {'pid': int(master_pid), 'memory': process_memory(master_pid)}
+    workers = []
+    for pid in child_pids(int(master_pid)):
+        try:
+            workers.append({'pid': pid, 'memory': process_memory(pid)})
+        except OSError:
+            # A worker that is being replaced
+            _log.debug(f"Worker {pid} exited before its memory was read")
+
+    return {
+        'master': master,
+        'workers': workers,
+        'total_pss': sum(process['memory'].get('pss', 0) for process in [master, *workers]),
+    }
@@ -0,0 +1,188 @@
+import cProfile
+import io
+import logging
+import pstats
+import re
+import shutil
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_MAX_PROFILES = 20
+
+PYTHON_PROFILE = 'python.prof'
+PYTHON_SUMMARY = 'python.txt'
+TORCH_TRACE = 'torch_trace.json'
+ARTIFACTS = (PYTHON_PROFILE, PYTHON_SUMMARY, TORCH_TRACE)
+# Says why a profile has no torch trace; read back by `skipped_artifacts`, not served
+_TORCH_TRACE_SKIPPED = 'torch_trace.skipped'
+
+_PROFILE_ID = re.compile(r'[0-9a-f]{32}')
+# Functions listed in the text summary, by cumulative time
+_SUMMARY_FUNCTIONS = 40
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a request asks to be profiled while another one is."""
+
+
+class RequestProfiler:
+    """Profiles single requests and keeps their profiles on disk for download.
+
+    `profile` wraps the work of one request in cProfile and the torch profiler,
+    then writes under `profile_dir/<profile id>/`:
+
+    - `python.prof`: cProfile stats, for `python -m pstats` or snakeviz.
+    - `python.txt`: the slowest functions by cumulative time.
+    - `torch_trace.json`: the model's ops, for chrome://tracing or Perfetto.
+
+    cProfile only sees the thread it was enabled on, so the work must run there,
+    e.g. with `ClassifierInput.inline`. Only one request is profiled at a time:
+    cProfile and the torch profiler are both process-wide, so a second profile
+    would fail to start or mix its calls into the first. Only the newest
+    `max_profiles` profiles are kept.
+
+    With `torch_trace`, torch is imported before the first profile starts, so a
+    lazily loaded model is traced from its first request. Without it, torch is
+    only traced once something else has imported it. A profile without a torch
+    trace says why in `python.txt` and `skipped_artifacts`.
+
+    Args:
+        profile_dir (Path): Directory the profiles are written to.
+        max_profiles (int): Profiles to keep before the oldest are deleted.
+        torch_trace (bool): Whether to import torch to trace it, for servers whose model runs on torch.
+    """
+
+    def __init__(self, profile_dir: Path, max_profiles: int = DEFAULT_MAX_PROFILES, torch_trace: bool = False):
+        if max_profiles < 1:
+            raise ValueError(f"max_profiles must be positive, got {max_profiles}")
+
+        self._profile_dir = profile_dir
+        self._max_profiles = max_profiles
+        self._torch_trace = torch_trace
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def profile(self) -> Iterator[str]:
+        """Profiles the block it wraps.
+
+        Yields:
+            str: Id of the profile, which is written when the block exits.
+
+        Raises:
+            ProfilerBusyError: If another request is being profiled.
+        """
+
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("Another request is being profiled")
+
+        try:
+            profile_id = uuid.uuid4().hex
+            # Imported before cProfile starts, so the import is not counted as the request's work
+            torch_skipped = self._import_torch()
+            python_profiler = cProfile.Profile()
+
+            try:
+                python_profiler.enable()
+            except ValueError as error:
+                # Another profiling tool, e.g. a debugger, already holds the interpreter's profiling hook
+                raise ProfilerBusyError(str(error)) from error
+
+            torch_profiler = self._start_torch_profiler() if torch_skipped is None else None
+            try:
+                yield profile_id
+            finally:
+                python_profiler.disable()
+                self._save(profile_id, python_profiler, torch_profiler, torch_skipped)
+        finally:
+            self._lock.release()
+
+    def artifact_path(self, profile_id: str, name: str) -> Optional[Path]:
+        """Returns the path of a profile's artifact, or None if there is no such artifact."""
+
+        if not _PROFILE_ID.fullmatch(profile_id) or name not in ARTIFACTS:
+            return None
+
+        path = self._profile_dir / profile_id / name
+        return path if path.is_file() else None
+
+    def skipped_artifacts(self, profile_id: str) -> Dict[str, str]:
+        """Returns why each artifact a profile lacks was skipped, by artifact name."""
+
+        if not _PROFILE_ID.fullmatch(profile_id):
+            return {}
+
+        path = self._profile_dir / profile_id / _TORCH_TRACE_SKIPPED
+        return {TORCH_TRACE: path.read_text()} if path.is_file() else {}
+
+    def _import_torch(self) -> Optional[str]:
+        """Imports torch if it should be traced, returning why it will not be otherwise."""
+
+        if sys.modules.get('torch') is not None:
+            return None
+
+        # Importing torch would cost seconds, and an ONNX-only server never needs it
+        if not self._torch_trace:
+            return "torch was not loaded"
+
+        try:
+            import torch
+        except ImportError:
+            _log.warning("torch is not installed, profiles will have no torch trace")
+            return "torch is not installed"
+
+        return None
+
+    @staticmethod
+    def _start_torch_profiler() -> Any:
+        from torch.profiler import ProfilerActivity, profile
+
+        torch_profiler = profile(activities=[ProfilerActivity.CPU], record_shapes=True)
+        torch_profiler.__enter__()
+        return torch_profiler
+
+    def _save(
+        self,
+        profile_id: str,
+        python_profiler: cProfile.Profile,
+        torch_profiler: Optional[Any],
+        torch_skipped: Optional[str],
+    ) -> None:
+        profile_path = self._profile_dir / profile_id
+        profile_path.mkdir(parents=True, exist_ok=True)
+
+        python_profiler.dump_stats(str(profile_path / PYTHON_PROFILE))
+
+        if torch_profiler is not None:
+            # A failed trace should not fail the request it was profiling
+            try:
+                torch_profiler.__exit__(None, None, None)
+                torch_profiler.export_chrome_trace(str(profile_path / TORCH_TRACE))
+            except Exception:
+                _log.exception(f"Failed to save torch trace of profile {profile_id}")
+                torch_skipped = "saving the trace failed"
+
+        summary = io.StringIO()
+        if torch_skipped is not None:
+            summary.write(f"No {TORCH_TRACE}: {torch_skipped}\n\n")
+            (profile_path / _TORCH_TRACE_SKIPPED).write_text(torch_skipped)
+        pstats.Stats(python_profiler, stream=summary).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(_SUMMARY_FUNCTIONS)
+        (profile_path / PYTHON_SUMMARY).write_text(summary.getvalue())
+
+        _log.info(f"Saved profile {profile_id} to {profile_path}")
+        self._prune()
+
+    def _prune(self) -> None:
+        profiles: List[Path] = sorted(
+            (path for path in self._profile_dir.iterdir() if path.is_dir()),
+            key=lambda path: path.stat().st_mtime,
+        )
+
+        for path in profiles[:-self._max_profiles]:
+            shutil.rmtree(path, ignore_errors=True)
@@ -1,9 +1,26 @@
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Optional
 
+from src.types.in_memory_document import InMemoryDocument
+from src.types.pdf_profile import PdfProfile
+
 
 @dataclass
 class ClassifierInput:
     files: Optional[List[Path]]
     dir_path: Optional[Path] = None
+    documents: Optional[List[InMemoryDocument]] = None
+    # Overrides the classifier's PDF extraction profile for this request
+    pdf_profile: Optional[PdfProfile] = None
+    # Seconds the whole request may take. Files not classified in time are UNKNOWN
+    time_budget_s: Optional[float] = None
+    # Runs all of the request's work on the calling thread, bypassing worker pools,
+    # caches and the inference scheduler, so a profiler on that thread sees all of it
+    inline: bool = False
+
+    def deadline(self) -> Optional[float]:
+        """Returns the `time.monotonic()` time at which the budget runs out, counted from now."""
+
+        return None if self.time_budget_s is None else time.monotonic() + self.time_budget_s
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict
 
@@ -8,3 +8,5 @@ from src.types.document_type import DocumentType
 @dataclass
 class ClassifierOutput:
     output_per_file: Dict[Path, DocumentType]
+    # Why a file was classified as UNKNOWN without a real prediction, e.g. an OCR timeout
+    errors_per_file: Dict[Path, str] = field(default_factory=dict)
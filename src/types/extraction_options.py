@@ -0,0 +1,75 @@
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from src.types.pdf_profile import PdfProfile
+
+
+DEFAULT_MAX_PDF_PAGES = 3
+
+# A letter page scanned at 300 DPI is about 2550x3300, so this keeps small print legible
+DEFAULT_IMAGE_MAX_DIMENSION = 3300
+DEFAULT_IMAGE_TARGET_DPI = 300
+
+
+@dataclass(frozen=True)
+class ExtractionOptions:
+    """Settings that change the text extracted from a document.
+
+    Every field except `ocr_timeout_s` and `ocr_deadline` is part of the OCR cache
+    key, so documents extracted with different options never share a cache entry.
+    The time limits only decide whether text is produced at all, not what it is.
+    """
+
+    pdf_profile: PdfProfile = PdfProfile.RICH
+    # Only read by the fast profile
+    max_pdf_pages: int = DEFAULT_MAX_PDF_PAGES
+
+    # Images are downscaled until they fit both limits. None disables a limit
+    image_max_dimension: Optional[int] = DEFAULT_IMAGE_MAX_DIMENSION
+    image_target_dpi: Optional[int] = DEFAULT_IMAGE_TARGET_DPI
+    image_grayscale: bool = True
+    # Crops images to the bounding box of their dark content, for scans with wide margins
+    image_autocrop: bool = False
+
+    # Tesseract page segmentation mode, e.g. 6 for a single uniform block of text
+    tesseract_psm: Optional[int] = None
+    # Extra command line flags passed to tesseract as is
+    tesseract_config: str = ""
+
+    # Seconds tesseract may spend on one image or PDF page before its process is killed.
+    # None disables the limit
+    ocr_timeout_s: Optional[float] = None
+    # `time.monotonic()` time by which the whole file must be extracted; tesseract and
+    # PDF pages are cut off there. The monotonic clock is system-wide on Linux, so it
+    # holds in OCR worker processes too. None disables the limit
+    ocr_deadline: Optional[float] = None
+
+    def with_pdf_profile(self, pdf_profile: Optional[PdfProfile]) -> 'ExtractionOptions':
+        """Returns these options with the PDF profile overridden, if one is given."""
+
+        return self if pdf_profile is None else replace(self, pdf_profile=pdf_profile)
+
+    def with_ocr_deadline(self, deadline: Optional[float]) -> 'ExtractionOptions':
+        """Returns these options with the OCR deadline moved up to `deadline`, if that is sooner."""
+
+        if deadline is None or (self.ocr_deadline is not None and self.ocr_deadline <= deadline):
+            return self
+        return replace(self, ocr_deadline=deadline)
+
+    def tesseract_args(self) -> str:
+        """Returns the `config` string passed to pytesseract."""
+
+        args = [] if self.tesseract_psm is None else [f"--psm {self.tesseract_psm}"]
+        if self.tesseract_config:
+            args.append(self.tesseract_config)
+
+        return " ".join(args)
+
+    def image_settings_id(self) -> str:
+        """Identifies every setting that affects image OCR, for use in cache keys."""
+
+        return (
+            f"max{self.image_max_dimension}-dpi{self.image_target_dpi}"
+            f"-gray{int(self.image_grayscale)}-crop{int(self.image_autocrop)}"
+            f"-args[{self.tesseract_args()}]"
+        )
@@ -0,0 +1,18 @@
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from src.types.document_type import DocumentType
+
+
+class FilePrediction(NamedTuple):
+    """A single file's classification, as yielded by `Classifier.classify_iter`.
+
+    `score` is the model's confidence in the predicted type, or None for
+    classifiers that do not produce one. `error` says why a file is UNKNOWN without
+    a real prediction, e.g. an OCR timeout.
+    """
+
+    path: Path
+    document_type: DocumentType
+    score: Optional[float] = None
+    error: Optional[str] = None
@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Union
+
+
+@dataclass
+class InMemoryDocument:
+    """A document held in memory instead of on disk.
+
+    The name is used as the output key and its suffix selects the extractor.
+    """
+
+    name: Path
+    data: Union[bytes, BinaryIO]
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class InferenceBackend(Enum):
+    TORCH = "torch"
+    TORCH_INT8 = "torch_int8"
+    ONNX = "onnx"
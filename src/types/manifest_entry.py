@@ -0,0 +1,36 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.types.document_type import DocumentType
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """One labeled file in a dataset manifest."""
+
+    path: Path
+    size: int
+    # SHA-256 of the file contents, the same hash the OCR cache is keyed on
+    content_hash: str
+    label: DocumentType
+    mime_type: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'path': str(self.path),
+            'size': self.size,
+            'content_hash': self.content_hash,
+            'label': self.label.value,
+            'mime_type': self.mime_type,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ManifestEntry':
+        return cls(
+            path=Path(data['path']),
+            size=int(data['size']),
+            content_hash=data['content_hash'],
+            label=DocumentType(data['label']),
+            mime_type=data.get('mime_type'),
+        )
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class ModelState(Enum):
+    NOT_LOADED = "not_loaded"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
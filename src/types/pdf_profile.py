@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class PdfProfile(Enum):
+    # Native text layer of the first pages, with OCR only for pages that have none
+    FAST = "fast"
+    # Markdown with layout and table reconstruction over every page
+    RICH = "rich"
@@ -0,0 +1,41 @@
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict
+
+
+@dataclass(frozen=True)
+class ThreadBudget:
+    """How the CPU cores are split between OCR and model inference.
+
+    OCR runs in `ocr_workers` processes, each allowed `tesseract_threads` OpenMP
+    threads. The model gets `model_threads` intra-op threads, in torch or ONNX
+    Runtime, and `model_interop_threads` threads for running independent ops in
+    parallel.
+    """
+
+    ocr_workers: int = 1
+    tesseract_threads: int = 1
+    model_threads: int = 1
+    model_interop_threads: int = 1
+
+    def __post_init__(self):
+        for field in fields(self):
+            if getattr(self, field.name) < 1:
+                raise ValueError(f"{field.name} must be positive, got {getattr(self, field.name)}")
+
+    @classmethod
+    def split(cls, cpu_count: int, ocr_workers: int) -> 'ThreadBudget':
+        """Gives OCR `ocr_workers` single-threaded workers and the model the remaining cores."""
+
+        return cls(ocr_workers=ocr_workers, model_threads=max(1, cpu_count - ocr_workers))
+
+    def cores(self) -> int:
+        """Returns the cores this budget keeps busy when both stages run at once."""
+
+        return self.ocr_workers * self.tesseract_threads + self.model_threads
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ThreadBudget':
+        return cls(**{field.name: int(data[field.name]) for field in fields(cls) if field.name in data})
@@ -0,0 +1,29 @@
+from unittest import TestCase
+
+from src.cache.classification_cache import ClassificationCache
+from src.types.document_type import DocumentType
+
+
+class TestClassificationCache(TestCase):
+    def test_get_and_put(self):
+        cache = ClassificationCache(max_entries=1)
+        key = ClassificationCache.make_key("text", "model", ["invoice", "other"], 0.6)
+        cache.put(key, DocumentType.INVOICE)
+
+        self.assertEqual(cache.get(key), DocumentType.INVOICE)
+
+    def test_key_depends_on_inputs(self):
+        key = ClassificationCache.make_key("text", "model", ["invoice", "other"], 0.6)
+
+        self.assertNotEqual(key, ClassificationCache.make_key("other text", "model", ["invoice", "other"], 0.6))
+        self.assertNotEqual(key, ClassificationCache.make_key("text", "other-model", ["invoice", "other"], 0.6))
+        self.assertNotEqual(key, ClassificationCache.make_key("text", "model", ["invoice"], 0.6))
+        self.assertNotEqual(key, ClassificationCache.make_key("text", "model", ["invoice", "other"], 0.7))
+
+    def test_get_scored(self):
+        cache = ClassificationCache()
+        cache.put("key", DocumentType.INVOICE, 0.9)
+
+        self.assertEqual(cache.get("key"), DocumentType.INVOICE)
+        self.assertEqual(cache.get_scored("key"), (DocumentType.INVOICE, 0.9))
+        self.assertIsNone(cache.get_scored("missing"))
@@ -0,0 +1,29 @@
+from unittest import TestCase
+
+from src.cache.lru_cache import LRUCache
+
+
+class TestLRUCache(TestCase):
+    def test_get_and_put(self):
+        cache: LRUCache[str, int] = LRUCache(max_entries=2)
+        cache.put("a", 1)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats(), {'entries': 1, 'hits': 1, 'misses': 1, 'evictions': 0})
+
+    def test_evicts_least_recently_used(self):
+        cache: LRUCache[str, int] = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            LRUCache(max_entries=0)
@@ -0,0 +1,55 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from src.cache.ocr_cache import OCRCache
+
+
+class TestOCRCache(TestCase):
+    def test_memory_only(self):
+        cache = OCRCache()
+        cache.put("key", "text")
+
+        self.assertEqual(cache.get("key"), "text")
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual(cache.stats()['memory_hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_disk_tier_survives_restart(self):
+        with TemporaryDirectory() as temp_dir:
+            OCRCache(cache_dir=Path(temp_dir)).put("key", "text")
+
+            cache = OCRCache(cache_dir=Path(temp_dir))
+
+            self.assertEqual(cache.get("key"), "text")
+            self.assertEqual(cache.stats()['disk_hits'], 1)
+            self.assertEqual(cache.stats()['misses'], 0)
+
+    def test_disk_eviction(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = OCRCache(cache_dir=Path(temp_dir), max_memory_entries=1, max_disk_bytes=10)
+            cache.put("first", "12345")
+            cache.put("second", "67890")
+            cache.put("third", "abcde")
+
+            stats = cache.stats()
+            self.assertEqual(stats['disk_entries'], 2)
+            self.assertEqual(stats['disk_bytes'], 10)
+            self.assertEqual(stats['disk_evictions'], 1)
+            self.assertIsNone(cache.get("first"))
+            self.assertEqual(cache.get("second"), "67890")
+
+    def test_key_depends_on_backend(self):
+        self.assertNotEqual(
+            OCRCache.make_key("hash", "tesseract-5.3.0"),
+            OCRCache.make_key("hash", "tesseract-5.4.0"),
+        )
+
+    def test_hash_file(self):
+        with TemporaryDirectory() as temp_dir:
+            first = Path(temp_dir, 'first.pdf')
+            second = Path(temp_dir, 'second.pdf')
+            first.write_bytes(b"same content")
+            second.write_bytes(b"same content")
+
+            self.assertEqual(OCRCache.hash_file(first), OCRCache.hash_file(second))
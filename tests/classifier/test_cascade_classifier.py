@@ -0,0 +1,118 @@
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from src.classifier.cascade_classifier import CascadeClassifier
+from src.feature_extraction.ocr_extractor import DEADLINE_EXCEEDED
+from src.types.classifier_input import ClassifierInput
+from src.types.document_type import DocumentType
+
+
+INVOICE_TEXT = "INVOICE\nInvoice number: 0001\nBill to: Acme\nTotal due: $100.00"
+STATEMENT_TEXT = "Statement of Account\nOpening balance 10.00\nClosing balance 20.00"
+AMBIGUOUS_TEXT = "Thank you for your business"
+
+
+class TestCascadeClassifier(TestCase):
+    def setUp(self):
+        self.mock_fallback = MagicMock()
+        self.mock_fallback.classify_texts.side_effect = lambda texts, **_: {file_path: DocumentType.DRIVERS_LICENSE for file_path in texts}
+
+        self.mock_linear_model = MagicMock()
+
+    @patch('src.classifier.cascade_classifier.OCRExtractor')
+    def test_rules_skip_fallback(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.return_value = {
+            Path("a.pdf"): INVOICE_TEXT,
+            Path("b.pdf"): STATEMENT_TEXT,
+        }
+
+        classifier = CascadeClassifier(fallback=self.mock_fallback)
+        actual = classifier.classify(ClassifierInput(files=[Path("a.pdf"), Path("b.pdf")]))
+
+        self.assertEqual(actual.output_per_file, {
+            Path("a.pdf"): DocumentType.INVOICE,
+            Path("b.pdf"): DocumentType.BANK_STATEMENT,
+        })
+        self.mock_fallback.classify_texts.assert_not_called()
+        self.assertEqual(classifier.stats()['rules'], 2)
+        self.assertEqual(classifier.stats()['rules_rate'], 1.0)
+
+    @patch('src.classifier.cascade_classifier.OCRExtractor')
+    def test_linear_model_stage(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.return_value = {
+            Path("a.pdf"): AMBIGUOUS_TEXT,
+            Path("b.pdf"): "something else",
+        }
+        self.mock_linear_model.predict.return_value = [(DocumentType.INVOICE, 0.95), (DocumentType.INVOICE, 0.5)]
+
+        classifier = CascadeClassifier(linear_model=self.mock_linear_model, fallback=self.mock_fallback)
+        actual = classifier.classify(ClassifierInput(files=[Path("a.pdf"), Path("b.pdf")]))
+
+        self.assertEqual(list(actual.output_per_file.items()), [
+            (Path("a.pdf"), DocumentType.INVOICE),
+            (Path("b.pdf"), DocumentType.DRIVERS_LICENSE),
+        ])
+        self.mock_fallback.classify_texts.assert_called_once_with({Path("b.pdf"): "something else"}, deadline=None, errors={})
+
+        stats = classifier.stats()
+        self.assertEqual((stats['linear'], stats['fallback'], stats['total']), (1, 1, 2))
+        self.assertEqual(stats['fallback_rate'], 0.5)
+
+    @patch('src.classifier.cascade_classifier.OCRExtractor')
+    def test_conflicting_rules_escalate(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.return_value = {Path("a.pdf"): INVOICE_TEXT + "\n" + STATEMENT_TEXT}
+
+        classifier = CascadeClassifier(fallback=self.mock_fallback)
+        actual = classifier.classify(ClassifierInput(files=[Path("a.pdf")]))
+
+        self.assertEqual(actual.output_per_file, {Path("a.pdf"): DocumentType.DRIVERS_LICENSE})
+        self.assertEqual(classifier.stats()['fallback'], 1)
+
+    @patch('src.classifier.cascade_classifier.OCRExtractor')
+    def test_fallback_deadline_and_errors(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.return_value = {Path("a.pdf"): AMBIGUOUS_TEXT}
+
+        def classify_texts(texts, deadline=None, errors=None):
+            errors.update((file_path, DEADLINE_EXCEEDED) for file_path in texts)
+            return {file_path: DocumentType.UNKNOWN for file_path in texts}
+
+        self.mock_fallback.classify_texts.side_effect = classify_texts
+
+        classifier = CascadeClassifier(fallback=self.mock_fallback)
+        actual = classifier.classify(ClassifierInput(files=[Path("a.pdf")], time_budget_s=10.0))
+
+        self.assertEqual(actual.output_per_file, {Path("a.pdf"): DocumentType.UNKNOWN})
+        self.assertEqual(actual.errors_per_file, {Path("a.pdf"): DEADLINE_EXCEEDED})
+
+        # The fallback gets the same deadline as extraction
+        extraction_deadline = mock_ocr_extractor.extract_all_documents.call_args.kwargs['deadline']
+        self.assertIsNotNone(extraction_deadline)
+        self.assertEqual(self.mock_fallback.classify_texts.call_args.kwargs['deadline'], extraction_deadline)
+
+    @patch('src.classifier.cascade_classifier.OCRExtractor')
+    def test_empty_text(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.return_value = {Path("a.pdf"): ""}
+
+        classifier = CascadeClassifier(linear_model=self.mock_linear_model, fallback=self.mock_fallback)
+        actual = classifier.classify(ClassifierInput(files=[Path("a.pdf")]))
+
+        self.assertEqual(actual.output_per_file, {Path("a.pdf"): DocumentType.UNKNOWN})
+        self.mock_linear_model.predict.assert_not_called()
+        self.mock_fallback.classify_texts.assert_not_called()
+        self.assertEqual(classifier.stats()['empty'], 1)
+
+    @patch('src.classifier.cascade_classifier.OCRExtractor')
+    def test_ocr_exception(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.side_effect = Exception("test exception")
+
+        classifier = CascadeClassifier(fallback=self.mock_fallback)
+        actual = classifier.classify(ClassifierInput(files=[Path("a.pdf")]))
+
+        self.assertEqual(actual.output_per_file, {Path("a.pdf"): DocumentType.UNKNOWN})
+
+    @patch('src.classifier.zero_shot_classifier.pipeline')
+    def test_default_fallback_is_lazy(self, mock_pipeline):
+        CascadeClassifier()
+
+        mock_pipeline.assert_not_called()
@@ -0,0 +1,147 @@
+from pathlib import Path
+from typing import List
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src.classifier.embedding_classifier import EmbeddingClassifier
+from src.feature_extraction.ocr_extractor import DEADLINE_EXCEEDED
+from src.types.classifier_input import ClassifierInput
+from src.types.classifier_output import ClassifierOutput
+from src.types.document_type import DocumentType
+from src.types.model_state import ModelState
+
+
+def fake_encode(texts: List[str]) -> np.ndarray:
+    # One axis per label, keyed on words in the label descriptions and test texts
+    keywords = ["license", "bank", "invoice"]
+    embeddings = []
+    for text in texts:
+        vector = np.array([1.0 if keyword in text.lower() else 0.0 for keyword in keywords])
+        if not vector.any():
+            vector = np.array([-1.0, -1.0, -1.0])
+        embeddings.append(vector / np.linalg.norm(vector))
+    return np.array(embeddings)
+
+
+class TestEmbeddingClassifier(TestCase):
+    @patch('src.classifier.embedding_classifier.load_encoder')
+    def setUp(self, mock_load_encoder):
+        self.mock_encoder = MagicMock(side_effect=fake_encode)
+        mock_load_encoder.return_value = self.mock_encoder
+
+        self.classifier = EmbeddingClassifier()
+
+    @patch('src.classifier.embedding_classifier.OCRExtractor')
+    def test_classify(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.return_value = {
+            Path("a.pdf"): "Invoice #42",
+            Path("b.pdf"): "First National Bank",
+            Path("c.png"): "Driver license",
+        }
+
+        expected = ClassifierOutput(output_per_file={
+            Path("a.pdf"): DocumentType.INVOICE,
+            Path("b.pdf"): DocumentType.BANK_STATEMENT,
+            Path("c.png"): DocumentType.DRIVERS_LICENSE,
+        })
+        actual = self.classifier.classify(ClassifierInput(files=[Path("a.pdf"), Path("b.pdf"), Path("c.png")]))
+
+        self.assertEqual(expected, actual)
+
+        # Label prototypes are embedded once at load, then documents in a single call
+        self.assertEqual(self.mock_encoder.call_count, 4)
+
+    def test_duplicate_texts_embedded_once(self):
+        actual = self.classifier.classify_texts({Path("a.pdf"): "Invoice #42", Path("b.pdf"): "Invoice #42"})
+
+        self.assertEqual(actual, {Path("a.pdf"): DocumentType.INVOICE, Path("b.pdf"): DocumentType.INVOICE})
+        self.assertEqual(self.mock_encoder.call_args[0][0], ["Invoice #42"])
+
+    @patch('src.classifier.embedding_classifier.time')
+    @patch('src.classifier.embedding_classifier.load_encoder')
+    def test_deadline_between_batches(self, mock_load_encoder, mock_time):
+        mock_load_encoder.return_value = self.mock_encoder
+        classifier = EmbeddingClassifier(batch_size=1)
+        self.mock_encoder.reset_mock()
+        # The deadline passes after the first batch is embedded
+        mock_time.monotonic.side_effect = [0.0, 2.0]
+
+        errors = {}
+        actual = classifier.classify_texts(
+            {Path("a.pdf"): "Invoice #42", Path("b.pdf"): "First National Bank", Path("c.pdf"): "First National Bank"},
+            deadline=1.0,
+            errors=errors,
+        )
+
+        self.assertEqual(actual, {
+            Path("a.pdf"): DocumentType.INVOICE,
+            Path("b.pdf"): DocumentType.UNKNOWN,
+            Path("c.pdf"): DocumentType.UNKNOWN,
+        })
+        self.assertEqual(errors, {Path("b.pdf"): DEADLINE_EXCEEDED, Path("c.pdf"): DEADLINE_EXCEEDED})
+        self.mock_encoder.assert_called_once_with(["Invoice #42"])
+
+    @patch('src.classifier.embedding_classifier.OCRExtractor')
+    def test_below_threshold(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.return_value = {Path("a.pdf"): "a recipe for soup"}
+
+        actual = self.classifier.classify(ClassifierInput(files=[Path("a.pdf")]))
+
+        self.assertEqual(actual.output_per_file, {Path("a.pdf"): DocumentType.UNKNOWN})
+
+    @patch('src.classifier.embedding_classifier.OCRExtractor')
+    def test_empty_text_skips_encoder(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.return_value = {Path("a.pdf"): ""}
+        self.mock_encoder.reset_mock()
+
+        actual = self.classifier.classify(ClassifierInput(files=[Path("a.pdf")]))
+
+        self.assertEqual(actual.output_per_file, {Path("a.pdf"): DocumentType.UNKNOWN})
+        self.mock_encoder.assert_not_called()
+
+    @patch('src.classifier.embedding_classifier.OCRExtractor')
+    def test_ocr_exception(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.side_effect = Exception("test exception")
+
+        actual = self.classifier.classify(ClassifierInput(files=[Path("a.pdf")]))
+
+        self.assertEqual(actual.output_per_file, {Path("a.pdf"): DocumentType.UNKNOWN})
+
+    @patch('src.classifier.embedding_classifier.load_encoder')
+    def test_prototype_texts(self, mock_load_encoder):
+        mock_encoder = MagicMock(side_effect=fake_encode)
+        mock_load_encoder.return_value = mock_encoder
+
+        EmbeddingClassifier(prototype_texts={DocumentType.INVOICE: ["Invoice 1", "Invoice 2"]})
+
+        invoice_call = [call.args[0] for call in mock_encoder.call_args_list if "Invoice 1" in call.args[0]]
+        self.assertEqual(len(invoice_call), 1)
+        self.assertEqual(len(invoice_call[0]), 3)
+
+    @patch('src.classifier.embedding_classifier.load_encoder')
+    def test_lazy_load(self, mock_load_encoder):
+        mock_load_encoder.return_value = MagicMock(side_effect=fake_encode)
+
+        classifier = EmbeddingClassifier(lazy=True)
+        self.assertEqual(classifier.state, ModelState.NOT_LOADED)
+        mock_load_encoder.assert_not_called()
+
+        classifier.warmup()
+        self.assertEqual(classifier.state, ModelState.READY)
+        mock_load_encoder.assert_called_once()
+
+    @patch('src.classifier.embedding_classifier.load_encoder')
+    def test_failed_load(self, mock_load_encoder):
+        mock_load_encoder.side_effect = OSError("no network")
+
+        classifier = EmbeddingClassifier(lazy=True)
+        with self.assertRaises(OSError):
+            classifier.load()
+
+        self.assertEqual(classifier.state, ModelState.FAILED)
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            EmbeddingClassifier(batch_size=0, lazy=True)
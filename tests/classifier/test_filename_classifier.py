@@ -3,6 +3,7 @@ from unittest import TestCase
 from src.classifier.filename_classifier import FilenameClassifier
 from src.types.document_type import DocumentType
 from src.types.classifier_input import ClassifierInput
+from src.types.in_memory_document import InMemoryDocument
 
 
 class TestFilenameClassifier(TestCase):
@@ -15,3 +16,15 @@ class TestFilenameClassifier(TestCase):
         actual = classifier.classify(test_input)
 
         self.assertEqual(actual.output_per_file, expected)
+
+    def test_classify_in_memory_documents(self):
+        test_input = ClassifierInput(
+            files=None,
+            documents=[InMemoryDocument(name=Path('invoice_1.pdf'), data=b"")],
+        )
+
+        classifier = FilenameClassifier()
+        expected = {Path('invoice_1.pdf'): DocumentType.INVOICE}
+        actual = classifier.classify(test_input)
+
+        self.assertEqual(actual.output_per_file, expected)
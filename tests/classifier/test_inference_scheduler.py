@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from src.classifier.inference_scheduler import InferenceScheduler, SchedulerShutdownError
+
+
+class TestInferenceScheduler(TestCase):
+    def test_results_routed_to_callers(self):
+        scheduler = InferenceScheduler(lambda texts: [text.upper() for text in texts], max_batch_size=4, max_wait_ms=5)
+
+        self.assertEqual(scheduler.run(["bb", "a", "ccc"]), ["BB", "A", "CCC"])
+
+        scheduler.shutdown()
+
+    def test_coalesces_concurrent_callers(self):
+        batch_sizes = []
+        release = threading.Event()
+
+        def run_batch(texts):
+            # Hold the first batch so the other callers queue up behind it
+            release.wait()
+            batch_sizes.append(len(texts))
+            return [len(text) for text in texts]
+
+        scheduler = InferenceScheduler(run_batch, max_batch_size=8, max_wait_ms=50)
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(scheduler.run, ["x" * (i + 1)]) for i in range(5)]
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(results, [[1], [2], [3], [4], [5]])
+        self.assertLess(len(batch_sizes), 5)
+        self.assertEqual(sum(batch_sizes), 5)
+        self.assertEqual(scheduler.stats()['texts'], 5)
+
+        scheduler.shutdown()
+
+    def test_max_batch_size(self):
+        run_batch = MagicMock(side_effect=lambda texts: texts)
+        scheduler = InferenceScheduler(run_batch, max_batch_size=2, max_wait_ms=50)
+
+        scheduler.run(["a", "b", "c", "d", "e"])
+
+        for call in run_batch.call_args_list:
+            self.assertLessEqual(len(call.args[0]), 2)
+
+        scheduler.shutdown()
+
+    def test_batch_exception_fails_its_futures(self):
+        scheduler = InferenceScheduler(MagicMock(side_effect=RuntimeError("model error")), max_wait_ms=0)
+
+        with self.assertRaises(RuntimeError):
+            scheduler.run(["a"])
+
+        scheduler.shutdown()
+
+    def test_wrong_result_count(self):
+        scheduler = InferenceScheduler(lambda texts: [], max_wait_ms=0)
+
+        with self.assertRaises(RuntimeError):
+            scheduler.run(["a"])
+
+        scheduler.shutdown()
+
+    def test_run_timeout(self):
+        release = threading.Event()
+
+        def run_batch(texts):
+            release.wait()
+            return texts
+
+        scheduler = InferenceScheduler(run_batch, max_wait_ms=0)
+
+        with self.assertRaises(TimeoutError):
+            scheduler.run(["a"], timeout_s=0.05)
+
+        release.set()
+        scheduler.shutdown()
+
+    def test_submit_after_shutdown(self):
+        scheduler = InferenceScheduler(lambda texts: texts)
+        scheduler.shutdown()
+
+        with self.assertRaises(SchedulerShutdownError):
+            scheduler.submit(["a"])
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            InferenceScheduler(lambda texts: texts, max_batch_size=0)
+        with self.assertRaises(ValueError):
+            InferenceScheduler(lambda texts: texts, max_wait_ms=-1)
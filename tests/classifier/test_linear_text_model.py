@@ -0,0 +1,50 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from src.classifier.linear_text_model import LinearTextModel
+from src.types.document_type import DocumentType
+
+
+TRAINING_TEXTS = {
+    DocumentType.INVOICE: ["invoice number 12 total due", "invoice bill to acme amount due", "tax invoice payment terms net 30"],
+    DocumentType.BANK_STATEMENT: ["opening balance closing balance deposits", "account statement withdrawals", "statement period ending balance"],
+}
+
+
+class TestLinearTextModel(TestCase):
+    def test_train_and_predict(self):
+        model = LinearTextModel.train(TRAINING_TEXTS)
+
+        predictions = model.predict(["invoice total due", "closing balance and deposits"])
+
+        self.assertEqual([document_type for document_type, _ in predictions], [DocumentType.INVOICE, DocumentType.BANK_STATEMENT])
+        for _, confidence in predictions:
+            self.assertGreater(confidence, 0.5)
+            self.assertLessEqual(confidence, 1.0)
+
+    def test_save_and_load(self):
+        model = LinearTextModel.train(TRAINING_TEXTS)
+
+        with TemporaryDirectory() as temp_dir:
+            model_path = Path(temp_dir, 'model.joblib')
+            model.save(model_path)
+            loaded = LinearTextModel.load(model_path)
+
+        self.assertEqual(loaded.predict(["invoice total due"]), model.predict(["invoice total due"]))
+
+    def test_out_of_domain_text(self):
+        model = LinearTextModel.train(TRAINING_TEXTS)
+
+        self.assertEqual(model.predict(["banana bread recipe with flour and sugar"]), [(DocumentType.UNKNOWN, 0.0)])
+
+    def test_train_needs_two_types(self):
+        with self.assertRaises(ValueError):
+            LinearTextModel.train({DocumentType.INVOICE: ["invoice"]})
+
+    def test_predict_untrained(self):
+        with self.assertRaises(ValueError):
+            LinearTextModel().predict(["invoice"])
+
+    def test_predict_empty(self):
+        self.assertEqual(LinearTextModel.train(TRAINING_TEXTS).predict([]), [])
@@ -0,0 +1,46 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from src.classifier.onnx_backend import HYPOTHESIS_TEMPLATE, OnnxZeroShotPipeline
+
+
+class TestOnnxZeroShotPipeline(TestCase):
+    def setUp(self):
+        self.mock_tokenizer = MagicMock()
+        self.mock_tokenizer.side_effect = lambda premises, hypotheses, **kwargs: {
+            'input_ids': np.ones((len(premises), 4)),
+            'attention_mask': np.ones((len(premises), 4)),
+        }
+
+        self.mock_session = MagicMock()
+        self.mock_session.get_inputs.return_value = [MagicMock(), MagicMock()]
+        self.mock_session.get_inputs.return_value[0].name = 'input_ids'
+        self.mock_session.get_inputs.return_value[1].name = 'attention_mask'
+
+        self.onnx_pipeline = OnnxZeroShotPipeline(self.mock_session, self.mock_tokenizer, entailment_id=0)
+
+    def test_scores_match_pipeline_format(self):
+        # Entailment logits in column 0: label "b" is the most likely
+        self.mock_session.run.return_value = [np.array([[0.0, 1.0], [2.0, 0.0], [1.0, 0.0]])]
+
+        result = self.onnx_pipeline("some text", candidate_labels=['a', 'b', 'c'])
+
+        self.assertEqual(result['sequence'], "some text")
+        self.assertEqual(result['labels'], ['b', 'c', 'a'])
+        self.assertAlmostEqual(sum(result['scores']), 1.0)
+        self.assertEqual(result['scores'], sorted(result['scores'], reverse=True))
+
+        premises, hypotheses = self.mock_tokenizer.call_args.args
+        self.assertEqual(premises, ["some text"] * 3)
+        self.assertEqual(hypotheses, [HYPOTHESIS_TEMPLATE.format(label) for label in ['a', 'b', 'c']])
+
+    def test_batches_whole_texts(self):
+        self.mock_session.run.side_effect = lambda _, feed: [np.zeros((len(feed['input_ids']), 2))]
+
+        results = self.onnx_pipeline(["one", "two", "three"], candidate_labels=['a', 'b'], batch_size=2)
+
+        self.assertEqual([result['sequence'] for result in results], ["one", "two", "three"])
+        self.assertEqual(self.mock_session.run.call_count, 2)
+        self.assertEqual(len(self.mock_session.run.call_args_list[0].args[1]['input_ids']), 4)
@@ -0,0 +1,65 @@
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+from unittest import TestCase
+
+from src.classifier.staged_pipeline import StagedPipeline
+from src.types.document_type import DocumentType
+
+
+class TestStagedPipeline(TestCase):
+    def test_run(self):
+        file_paths = [Path(f"{i}.pdf") for i in range(5)]
+        batch_sizes: List[int] = []
+
+        def extract_stage() -> Iterator[Tuple[Path, str]]:
+            for file_path in file_paths:
+                yield file_path, "text"
+
+        def classify_stage(batch: Dict[Path, str]) -> Dict[Path, DocumentType]:
+            batch_sizes.append(len(batch))
+            return {file_path: DocumentType.INVOICE for file_path in batch}
+
+        staged_pipeline = StagedPipeline(extract_stage, classify_stage, micro_batch_size=2, queue_size=1)
+        actual = dict(staged_pipeline.run())
+
+        self.assertEqual(actual, {file_path: DocumentType.INVOICE for file_path in file_paths})
+        self.assertEqual(sum(batch_sizes), 5)
+        self.assertTrue(all(size <= 2 for size in batch_sizes))
+
+    def test_backpressure(self):
+        produced: List[Path] = []
+
+        def extract_stage() -> Iterator[Tuple[Path, str]]:
+            for i in range(100):
+                produced.append(Path(f"{i}.pdf"))
+                yield Path(f"{i}.pdf"), "text"
+
+        def classify_stage(batch: Dict[Path, str]) -> Dict[Path, DocumentType]:
+            return {file_path: DocumentType.INVOICE for file_path in batch}
+
+        staged_pipeline = StagedPipeline(extract_stage, classify_stage, micro_batch_size=1, queue_size=2)
+        results = staged_pipeline.run()
+        next(results)
+        results.close()
+
+        # Extraction stops once the bounded queue is full instead of running ahead
+        self.assertLess(len(produced), 10)
+
+    def test_extract_stage_error(self):
+        def extract_stage() -> Iterator[Tuple[Path, str]]:
+            yield Path("good.pdf"), "text"
+            raise RuntimeError("test exception")
+
+        def classify_stage(batch: Dict[Path, str]) -> Dict[Path, DocumentType]:
+            return {file_path: DocumentType.INVOICE for file_path in batch}
+
+        staged_pipeline = StagedPipeline(extract_stage, classify_stage, micro_batch_size=4)
+
+        with self.assertRaises(RuntimeError):
+            list(staged_pipeline.run())
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            StagedPipeline(iter, dict, micro_batch_size=0)
+        with self.assertRaises(ValueError):
+            StagedPipeline(iter, dict, micro_batch_size=1, queue_size=0)
@@ -1,11 +1,20 @@
+import threading
+import time
 from pathlib import Path
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
+from src.cache.classification_cache import ClassificationCache
 from src.classifier.zero_shot_classifier import ZeroShotClassifier
+from src.resource_scheduler import ResourceScheduler
 from src.types.classifier_input import ClassifierInput
 from src.types.classifier_output import ClassifierOutput
 from src.types.document_type import DocumentType
+from src.types.file_prediction import FilePrediction
+from src.types.in_memory_document import InMemoryDocument
+from src.types.inference_backend import InferenceBackend
+from src.types.model_state import ModelState
+from src.types.thread_budget import ThreadBudget
 
 
 class TestZeroShotClassifier(TestCase):
@@ -76,7 +85,10 @@ class TestZeroShotClassifier(TestCase):
         expected = ClassifierOutput(
             output_per_file={
                 Path("test.pdf"): DocumentType.UNKNOWN
-            }
+            },
+            errors_per_file={
+                Path("test.pdf"): "extraction failed: Exception: test exception"
+            },
         )
 
         actual: ClassifierOutput = self.classifier.classify(input)
@@ -119,9 +131,300 @@ class TestZeroShotClassifier(TestCase):
         expected = ClassifierOutput(
             output_per_file={
                 Path("test.pdf"): DocumentType.UNKNOWN
+            },
+            errors_per_file={
+                Path("test.pdf"): "inference failed"
+            },
+        )
+
+        actual: ClassifierOutput = self.classifier.classify(input)
+
+        self.assertEqual(expected, actual)
+
+    @patch('src.classifier.zero_shot_classifier.OCRExtractor')
+    def test_batched_inference(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.return_value = {
+            Path("long.pdf"): "a much longer test text",
+            Path("empty.pdf"): "",
+            Path("short.pdf"): "short",
+        }
+
+        self.mock_model.return_value = [
+            {'scores': [0.9, 0.1], 'labels': ['invoice', 'other']},
+            {'scores': [0.8, 0.2], 'labels': ['drivers_license', 'other']},
+        ]
+
+        expected = ClassifierOutput(
+            output_per_file={
+                Path("long.pdf"): DocumentType.DRIVERS_LICENSE,
+                Path("empty.pdf"): DocumentType.UNKNOWN,
+                Path("short.pdf"): DocumentType.INVOICE,
             }
         )
 
+        input = ClassifierInput(
+            files=[Path("long.pdf"), Path("empty.pdf"), Path("short.pdf")]
+        )
         actual: ClassifierOutput = self.classifier.classify(input)
 
-        self.assertEqual(expected, actual)
\ No newline at end of file
+        self.assertEqual(expected, actual)
+
+        # All non-empty texts go through a single, length-sorted pipeline call
+        self.mock_model.assert_called_once()
+        args, kwargs = self.mock_model.call_args
+        self.assertEqual(args[0], ["short", "a much longer test text"])
+        # The HF pipeline counts premise/hypothesis pairs, one per label
+        self.assertEqual(kwargs['batch_size'], 8 * len(DocumentType))
+
+    @patch('src.classifier.zero_shot_classifier.pipeline')
+    def test_invalid_batch_size(self, mock_pipeline):
+        with self.assertRaises(ValueError):
+            ZeroShotClassifier(batch_size=0)
+
+    @patch('src.classifier.zero_shot_classifier.OCRExtractor')
+    @patch('src.classifier.zero_shot_classifier.pipeline')
+    def test_result_cache(self, mock_pipeline, mock_ocr_extractor):
+        mock_pipeline.return_value = self.mock_model
+        classifier = ZeroShotClassifier(result_cache=ClassificationCache())
+
+        mock_ocr_extractor.extract_all_documents.return_value = {
+            Path("first.pdf"): "same text",
+            Path("copy.pdf"): "same text",
+        }
+        self.mock_model.return_value = [{'scores': [0.9, 0.1], 'labels': ['invoice', 'other']}]
+
+        input = ClassifierInput(files=[Path("first.pdf"), Path("copy.pdf")])
+        first: ClassifierOutput = classifier.classify(input)
+        second: ClassifierOutput = classifier.classify(input)
+
+        expected = ClassifierOutput(
+            output_per_file={
+                Path("first.pdf"): DocumentType.INVOICE,
+                Path("copy.pdf"): DocumentType.INVOICE,
+            }
+        )
+        self.assertEqual(expected, first)
+        self.assertEqual(expected, second)
+
+        # Duplicate text is classified once, and the second request is served from cache
+        self.mock_model.assert_called_once()
+        self.assertEqual(self.mock_model.call_args[0][0], ["same text"])
+
+    @patch('src.classifier.zero_shot_classifier.OCRExtractor')
+    @patch('src.classifier.zero_shot_classifier.pipeline')
+    def test_result_cache_skips_model_errors(self, mock_pipeline, mock_ocr_extractor):
+        mock_pipeline.return_value = self.mock_model
+        classifier = ZeroShotClassifier(result_cache=ClassificationCache())
+
+        mock_ocr_extractor.extract_all_documents.return_value = {Path("test.pdf"): "test text"}
+        self.mock_model.return_value = {'scores': [0.4, 0.6]}
+
+        input = ClassifierInput(files=[Path("test.pdf")])
+        classifier.classify(input)
+        classifier.classify(input)
+
+        self.assertEqual(self.mock_model.call_count, 2)
+
+    @patch('src.classifier.zero_shot_classifier.OCRExtractor')
+    @patch('src.classifier.zero_shot_classifier.pipeline')
+    def test_pipelined(self, mock_pipeline, mock_ocr_extractor):
+        mock_pipeline.return_value = self.mock_model
+        classifier = ZeroShotClassifier(pipelined=True, batch_size=1)
+
+        file_paths = [Path("first.pdf"), Path("second.pdf")]
+        mock_ocr_extractor.list_documents.return_value = file_paths
+        mock_ocr_extractor.iter_documents.return_value = iter([
+            (Path("second.pdf"), "second text"),
+            (Path("first.pdf"), "first text"),
+        ])
+        self.mock_model.return_value = [{'scores': [0.9, 0.1], 'labels': ['invoice', 'other']}]
+
+        expected = ClassifierOutput(
+            output_per_file={
+                Path("first.pdf"): DocumentType.INVOICE,
+                Path("second.pdf"): DocumentType.INVOICE,
+            }
+        )
+
+        actual: ClassifierOutput = classifier.classify(ClassifierInput(files=file_paths))
+
+        self.assertEqual(expected, actual)
+        self.assertEqual(list(actual.output_per_file.keys()), file_paths)
+        self.assertEqual(self.mock_model.call_count, 2)
+
+    @patch('src.classifier.zero_shot_classifier.OCRExtractor')
+    def test_classify_iter(self, mock_ocr_extractor):
+        mock_ocr_extractor.iter_documents.return_value = iter([
+            (Path("second.pdf"), "second text"),
+            (Path("empty.pdf"), ""),
+        ])
+        self.mock_model.return_value = [{'scores': [0.8, 0.2], 'labels': ['invoice', 'other']}]
+
+        actual = list(self.classifier.classify_iter(ClassifierInput(files=[Path("empty.pdf"), Path("second.pdf")])))
+
+        self.assertEqual(sorted(actual), [
+            FilePrediction(Path("empty.pdf"), DocumentType.UNKNOWN, 0.0),
+            FilePrediction(Path("second.pdf"), DocumentType.INVOICE, 0.8),
+        ])
+
+    @patch('src.classifier.zero_shot_classifier.OCRExtractor')
+    def test_classify_iter_extraction_error(self, mock_ocr_extractor):
+        def iter_documents(*args, **kwargs):
+            yield Path("first.pdf"), "first text"
+            raise RuntimeError("test exception")
+
+        mock_ocr_extractor.iter_documents.side_effect = iter_documents
+        self.mock_model.return_value = [{'scores': [0.8, 0.2], 'labels': ['invoice', 'other']}]
+
+        classifier_input = ClassifierInput(files=[Path("first.pdf"), Path("second.pdf")])
+        actual = {prediction.path: prediction.document_type for prediction in self.classifier.classify_iter(classifier_input)}
+
+        self.assertEqual(actual[Path("second.pdf")], DocumentType.UNKNOWN)
+        self.assertEqual(len(actual), 2)
+
+    @patch('src.classifier.zero_shot_classifier.OCRExtractor')
+    def test_ocr_exception_in_memory_documents(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.side_effect = Exception("test exception")
+
+        input = ClassifierInput(
+            files=None,
+            documents=[InMemoryDocument(name=Path("test.pdf"), data=b"")],
+        )
+
+        expected = ClassifierOutput(
+            output_per_file={
+                Path("test.pdf"): DocumentType.UNKNOWN
+            },
+            errors_per_file={
+                Path("test.pdf"): "extraction failed: Exception: test exception"
+            },
+        )
+
+        actual: ClassifierOutput = self.classifier.classify(input)
+
+        self.assertEqual(expected, actual)
+
+    @patch('src.classifier.zero_shot_classifier.pipeline')
+    def test_lazy_load(self, mock_pipeline):
+        mock_pipeline.return_value = self.mock_model
+        classifier = ZeroShotClassifier(lazy=True)
+
+        mock_pipeline.assert_not_called()
+        self.assertEqual(classifier.state, ModelState.NOT_LOADED)
+
+        self.mock_model.return_value = {'scores': [0.9, 0.1], 'labels': ['invoice', 'other']}
+        classifier.warmup()
+        classifier.warmup()
+
+        mock_pipeline.assert_called_once()
+        self.assertEqual(classifier.state, ModelState.READY)
+        self.assertEqual(self.mock_model.call_count, 2)
+
+    @patch('src.classifier.zero_shot_classifier.pipeline')
+    def test_failed_load(self, mock_pipeline):
+        mock_pipeline.side_effect = OSError("test exception")
+        classifier = ZeroShotClassifier(lazy=True)
+
+        with self.assertRaises(OSError):
+            classifier.load()
+
+        self.assertEqual(classifier.state, ModelState.FAILED)
+
+    @patch('src.classifier.zero_shot_classifier.quantize_dynamic_int8')
+    @patch('src.classifier.zero_shot_classifier.pipeline')
+    def test_torch_int8_backend(self, mock_pipeline, mock_quantize):
+        fp32_model = mock_pipeline.return_value.model
+        quantized_model = MagicMock()
+        mock_quantize.return_value = quantized_model
+
+        classifier = ZeroShotClassifier(backend=InferenceBackend.TORCH_INT8)
+
+        mock_quantize.assert_called_once_with(fp32_model)
+        self.assertIs(classifier._model_pipeline.model, quantized_model)
+
+    @patch('src.classifier.zero_shot_classifier.OnnxZeroShotPipeline')
+    @patch('src.classifier.zero_shot_classifier.pipeline')
+    def test_onnx_backend(self, mock_pipeline, mock_onnx_pipeline):
+        ZeroShotClassifier(backend=InferenceBackend.ONNX, onnx_dir=Path("onnx_model"))
+
+        mock_onnx_pipeline.load.assert_called_once_with(Path("onnx_model"))
+        mock_pipeline.assert_not_called()
+
+    @patch('src.classifier.zero_shot_classifier.OCRExtractor')
+    @patch('src.classifier.zero_shot_classifier.pipeline')
+    def test_scheduled(self, mock_pipeline, mock_ocr_extractor):
+        mock_model = MagicMock()
+        mock_model.return_value = [{'scores': [0.9, 0.1], 'labels': ['invoice', 'other']}]
+        mock_pipeline.return_value = mock_model
+        mock_ocr_extractor.extract_all_documents.return_value = {Path("a.pdf"): "text"}
+
+        classifier = ZeroShotClassifier(scheduled=True, max_wait_ms=0)
+        actual = classifier.classify(ClassifierInput(files=[Path("a.pdf")]))
+
+        self.assertEqual(actual.output_per_file, {Path("a.pdf"): DocumentType.INVOICE})
+        self.assertEqual(classifier.scheduler.stats()['batches'], 1)
+
+        classifier.scheduler.shutdown()
+
+    @patch('src.classifier.zero_shot_classifier.OCRExtractor')
+    @patch('src.classifier.zero_shot_classifier.pipeline')
+    def test_scheduled_inference_timeout(self, mock_pipeline, mock_ocr_extractor):
+        release = threading.Event()
+
+        def slow_model(texts, *args, **kwargs):
+            release.wait()
+            return [{'scores': [0.9, 0.1], 'labels': ['invoice', 'other']}] * len(texts)
+
+        mock_pipeline.return_value = MagicMock(side_effect=slow_model)
+        mock_ocr_extractor.extract_all_documents.return_value = {Path("a.pdf"): "text"}
+
+        classifier = ZeroShotClassifier(scheduled=True, max_wait_ms=0, inference_timeout_s=0.05)
+        actual = classifier.classify(ClassifierInput(files=[Path("a.pdf")]))
+
+        self.assertEqual(actual.output_per_file, {Path("a.pdf"): DocumentType.UNKNOWN})
+        self.assertEqual(actual.errors_per_file, {Path("a.pdf"): "inference timed out"})
+
+        release.set()
+        classifier.scheduler.shutdown()
+
+    @patch('src.classifier.zero_shot_classifier.OCRExtractor')
+    def test_deadline_passed_before_inference(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.return_value = {Path("a.pdf"): "text"}
+
+        with patch.object(ClassifierInput, 'deadline', return_value=time.monotonic() - 1):
+            actual = self.classifier.classify(ClassifierInput(files=[Path("a.pdf")], time_budget_s=1))
+
+        self.mock_model.assert_not_called()
+        self.assertEqual(actual.output_per_file, {Path("a.pdf"): DocumentType.UNKNOWN})
+        self.assertEqual(actual.errors_per_file, {Path("a.pdf"): "deadline exceeded"})
+
+    @patch('src.classifier.zero_shot_classifier.OCRExtractor')
+    def test_ocr_workers_from_thread_budget(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.return_value = {}
+
+        with patch.object(ResourceScheduler, 'budget', return_value=ThreadBudget(ocr_workers=3)):
+            self.classifier.classify(ClassifierInput(files=[Path("a.pdf")]))
+
+        self.assertEqual(mock_ocr_extractor.extract_all_documents.call_args.kwargs['num_workers'], 3)
+
+    @patch('src.classifier.zero_shot_classifier.OCRExtractor')
+    @patch('src.classifier.zero_shot_classifier.pipeline')
+    def test_inline(self, mock_pipeline, mock_ocr_extractor):
+        mock_model = MagicMock()
+        mock_model.return_value = [{'scores': [0.9, 0.1], 'labels': ['invoice', 'other']}]
+        mock_pipeline.return_value = mock_model
+        mock_ocr_extractor.extract_all_documents.return_value = {Path("a.pdf"): "text"}
+
+        result_cache = MagicMock()
+        classifier = ZeroShotClassifier(ocr_workers=4, ocr_cache=MagicMock(), result_cache=result_cache, scheduled=True, max_wait_ms=0)
+        actual = classifier.classify(ClassifierInput(files=[Path("a.pdf")], inline=True))
+
+        self.assertEqual(actual.output_per_file, {Path("a.pdf"): DocumentType.INVOICE})
+        extract_kwargs = mock_ocr_extractor.extract_all_documents.call_args.kwargs
+        self.assertEqual(extract_kwargs['num_workers'], 1)
+        self.assertIsNone(extract_kwargs['cache'])
+        self.assertEqual(classifier.scheduler.stats()['batches'], 0)
+        result_cache.get_scored.assert_not_called()
+        result_cache.put.assert_not_called()
+
+        classifier.scheduler.shutdown()
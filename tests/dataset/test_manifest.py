@@ -0,0 +1,83 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from src.cache.ocr_cache import OCRCache
+from src.dataset.manifest import DatasetManifest
+from src.types.document_type import DocumentType
+from src.types.manifest_entry import ManifestEntry
+
+
+def make_entries(count_per_type: int):
+    return [
+        ManifestEntry(path=Path(doc_type.value, f"{index}.pdf"), size=index, content_hash=str(index), label=doc_type)
+        for doc_type in (DocumentType.INVOICE, DocumentType.BANK_STATEMENT)
+        for index in range(count_per_type)
+    ]
+
+
+class TestDatasetManifest(TestCase):
+    def test_build_and_load(self):
+        with TemporaryDirectory() as temp_dir:
+            invoice_dir = Path(temp_dir, 'invoices')
+            (invoice_dir / 'nested').mkdir(parents=True)
+            (invoice_dir / 'a.pdf').write_bytes(b"pdf")
+            (invoice_dir / 'nested' / 'b.jpg').write_bytes(b"image")
+            (invoice_dir / '.DS_Store').write_bytes(b"")
+
+            manifest = DatasetManifest.build({DocumentType.INVOICE: invoice_dir})
+            manifest.save(Path(temp_dir, 'manifest.jsonl'))
+            loaded = DatasetManifest.load(Path(temp_dir, 'manifest.jsonl'))
+
+        self.assertEqual(loaded.entries, manifest.entries)
+        self.assertEqual([entry.path.name for entry in loaded.entries], ['a.pdf', 'b.jpg'])
+        self.assertEqual(loaded.entries[0].content_hash, OCRCache.hash_bytes(b"pdf"))
+        self.assertEqual(loaded.entries[1].mime_type, 'image/jpeg')
+        self.assertEqual(loaded.entries[1].size, 5)
+        self.assertEqual(loaded.counts(), {DocumentType.INVOICE: 2})
+
+    def test_stratified_sample_without_replacement(self):
+        manifest = DatasetManifest(make_entries(10))
+
+        sample = manifest.sample(4, seed=0)
+
+        self.assertEqual(len(sample), 8)
+        self.assertEqual(len(set(sample)), 8)
+        self.assertEqual(sum(1 for entry in sample if entry.label == DocumentType.INVOICE), 4)
+        self.assertEqual(sample, manifest.sample(4, seed=0))
+        self.assertEqual(len(manifest.sample(50, seed=0)), 20)
+        self.assertEqual({entry.label for entry in manifest.sample(2, seed=0, labels=[DocumentType.INVOICE])}, {DocumentType.INVOICE})
+
+    def test_shards_are_disjoint(self):
+        manifest = DatasetManifest(make_entries(10))
+
+        shards = [manifest.sample(5, seed=1, shard_index=index, num_shards=3) for index in range(3)]
+
+        self.assertEqual(sorted(len(shard) for shard in shards), [3, 3, 4])
+        self.assertEqual(set().union(*shards), set(manifest.sample(5, seed=1)))
+
+    def test_sharding_requires_seed(self):
+        manifest = DatasetManifest(make_entries(2))
+
+        with self.assertRaises(ValueError):
+            manifest.sample(num_shards=2, shard_index=0)
+        with self.assertRaises(ValueError):
+            manifest.sample(seed=0, num_shards=2, shard_index=2)
+
+    def test_under(self):
+        manifest = DatasetManifest(make_entries(3))
+
+        self.assertEqual({entry.label for entry in manifest.under(Path('invoice')).entries}, {DocumentType.INVOICE})
+
+    def test_split(self):
+        manifest = DatasetManifest(make_entries(10))
+
+        train, held_out = manifest.split(holdout_fraction=0.3, seed=0)
+
+        self.assertEqual(held_out.counts(), {DocumentType.INVOICE: 3, DocumentType.BANK_STATEMENT: 3})
+        self.assertFalse(set(train.entries) & set(held_out.entries))
+        self.assertEqual(len(train) + len(held_out), len(manifest))
+        self.assertEqual(held_out.entries, manifest.split(holdout_fraction=0.3, seed=0)[1].entries)
+
+        with self.assertRaises(ValueError):
+            manifest.split(holdout_fraction=1)
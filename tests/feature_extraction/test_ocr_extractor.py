@@ -1,8 +1,27 @@
+import shutil
+import threading
+import time
+from io import BytesIO
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 from unittest.mock import patch
 
-from src.feature_extraction.ocr_extractor import OCRExtractor
+import pymupdf
+from PIL import Image
+
+from src.cache.ocr_cache import OCRCache
+from src.feature_extraction import ocr_extractor
+from src.feature_extraction.ocr_extractor import DEADLINE_EXCEEDED, OCR_TIMED_OUT, OCRExtractor
+from src.types.extraction_options import ExtractionOptions
+from src.types.in_memory_document import InMemoryDocument
+from src.types.pdf_profile import PdfProfile
+
+
+def _slow_worker(source, options):
+    # Stands in for a pool worker busy with a slow file
+    time.sleep(1.5)
+    return "slow text", 1.5
 
 
 class TestOCRExtractor(TestCase):
@@ -51,4 +70,421 @@ class TestOCRExtractor(TestCase):
         
         comparison = "Account Number: XXXX-XXXX-XXXX-6781"
 
-        self.assertTrue(comparison in text_md)
\ No newline at end of file
+        self.assertTrue(comparison in text_md)
+
+    def test_extract_all_documents_parallel(self):
+        paths_list = [
+            Path('files/bank_statement_2.pdf'),
+            Path('files/bank_statement_1.pdf'),
+            Path('files/invoice_1.pdf'),
+        ]
+
+        try:
+            result = OCRExtractor.extract_all_documents(paths_list=paths_list, num_workers=2)
+        finally:
+            OCRExtractor.shutdown_workers()
+
+        self.assertEqual(list(result.keys()), paths_list)
+        self.assertTrue("Account Number: XXXX-XXXX-XXXX-6781" in result[Path('files/bank_statement_1.pdf')])
+
+    def test_extract_all_documents_isolates_bad_file(self):
+        with TemporaryDirectory() as temp_dir:
+            good_path = Path(temp_dir, 'a_good.pdf')
+            bad_path = Path(temp_dir, 'b_bad.pdf')
+            shutil.copy('files/bank_statement_1.pdf', good_path)
+            bad_path.write_bytes(b"not a pdf")
+
+            try:
+                result = OCRExtractor.extract_all_documents(Path(temp_dir), num_workers=2)
+            finally:
+                OCRExtractor.shutdown_workers()
+
+        self.assertEqual(list(result.keys()), [good_path, bad_path])
+        self.assertTrue(result[good_path])
+        self.assertEqual(result[bad_path], "")
+
+    def test_extract_all_documents_invalid_workers(self):
+        with self.assertRaises(ValueError):
+            OCRExtractor.extract_all_documents(Path('files'), num_workers=0)
+
+    def test_extract_all_documents_uses_cache(self):
+        cache = OCRCache()
+        paths_list = [Path('files/bank_statement_1.pdf')]
+
+        first = OCRExtractor.extract_all_documents(paths_list=paths_list, cache=cache)
+
+        with patch.object(OCRExtractor, '_run_pdf_ocr_single_file') as mock_pdf_ocr:
+            second = OCRExtractor.extract_all_documents(paths_list=paths_list, cache=cache)
+            mock_pdf_ocr.assert_not_called()
+
+        self.assertEqual(first, second)
+        self.assertEqual(cache.stats()['memory_hits'], 1)
+
+    def test_iter_documents(self):
+        paths_list = [Path('files/bank_statement_1.pdf'), Path('files/invoice_1.pdf'), Path('files/invoice_2.pdf')]
+
+        try:
+            result = dict(OCRExtractor.iter_documents(paths_list, num_workers=2, max_in_flight=1))
+        finally:
+            OCRExtractor.shutdown_workers()
+
+        self.assertEqual(set(result.keys()), set(paths_list))
+        self.assertTrue(all(result.values()))
+
+    def test_extract_document_from_bytes(self):
+        file_path = Path('files/bank_statement_1.pdf')
+        document = InMemoryDocument(name=Path('statement.pdf'), data=file_path.read_bytes())
+
+        text_md = OCRExtractor.extract_document(document)
+
+        self.assertTrue("Account Number: XXXX-XXXX-XXXX-6781" in text_md)
+
+    def test_extract_document_from_stream(self):
+        file_path = Path('files/bank_statement_1.pdf')
+
+        with open(file_path, 'rb') as stream:
+            text_md = OCRExtractor.extract_document(InMemoryDocument(name=Path('statement.pdf'), data=stream))
+
+        self.assertTrue("Account Number: XXXX-XXXX-XXXX-6781" in text_md)
+
+    @patch('src.feature_extraction.ocr_extractor.MAX_IN_MEMORY_DOCUMENT_BYTES', 16)
+    def test_extract_document_spools_large_stream(self):
+        file_path = Path('files/bank_statement_1.pdf')
+
+        with open(file_path, 'rb') as stream:
+            with patch.object(OCRExtractor, '_run_pdf_ocr_single_file', return_value="text") as mock_pdf_ocr:
+                OCRExtractor.extract_document(InMemoryDocument(name=Path('statement.pdf'), data=stream))
+
+        payload, name = mock_pdf_ocr.call_args[0]
+        self.assertIsInstance(payload, Path)
+        self.assertEqual(name, Path('statement.pdf'))
+
+    def test_extract_document_unsupported_file_type(self):
+        with self.assertRaises(ValueError):
+            OCRExtractor.extract_document(InMemoryDocument(name=Path('notes.txt'), data=b"text"))
+
+    def test_extract_all_documents_in_memory_parallel(self):
+        documents = [
+            InMemoryDocument(name=Path('first.pdf'), data=Path('files/bank_statement_1.pdf').read_bytes()),
+            InMemoryDocument(name=Path('second.pdf'), data=open('files/invoice_1.pdf', 'rb')),
+        ]
+
+        try:
+            result = OCRExtractor.extract_all_documents(documents=documents, num_workers=2)
+        finally:
+            OCRExtractor.shutdown_workers()
+            documents[1].data.close()
+
+        self.assertEqual(list(result.keys()), [Path('first.pdf'), Path('second.pdf')])
+        self.assertTrue(all(result.values()))
+
+    def test_cache_key_matches_for_file_and_bytes(self):
+        file_path = Path('files/bank_statement_1.pdf')
+        document = InMemoryDocument(name=Path('upload.pdf'), data=file_path.read_bytes())
+
+        self.assertEqual(OCRExtractor.cache_key(file_path), OCRExtractor.cache_key(document))
+
+    def test_fast_pdf_profile_reads_first_pages(self):
+        with pymupdf.open() as doc:
+            for page_number in range(4):
+                doc.new_page().insert_text((72, 72), f"page {page_number + 1} text")
+            pdf_bytes = doc.tobytes()
+
+        document = InMemoryDocument(name=Path('long.pdf'), data=pdf_bytes)
+        options = ExtractionOptions(pdf_profile=PdfProfile.FAST, max_pdf_pages=2)
+
+        with patch('src.feature_extraction.ocr_extractor.pytesseract.image_to_string') as mock_ocr:
+            text = OCRExtractor.extract_document(document, options=options)
+
+        self.assertIn("page 1 text", text)
+        self.assertIn("page 2 text", text)
+        self.assertNotIn("page 3 text", text)
+        mock_ocr.assert_not_called()
+
+    def test_fast_pdf_profile_ocrs_pages_without_text(self):
+        with pymupdf.open() as doc:
+            doc.new_page()
+            pdf_bytes = doc.tobytes()
+
+        document = InMemoryDocument(name=Path('scan.pdf'), data=pdf_bytes)
+        options = ExtractionOptions(pdf_profile=PdfProfile.FAST)
+
+        with patch('src.feature_extraction.ocr_extractor.pytesseract.image_to_string', return_value="scanned text") as mock_ocr:
+            text = OCRExtractor.extract_document(document, options=options)
+
+        self.assertEqual(text, "scanned text")
+        mock_ocr.assert_called_once()
+
+    def test_cache_key_depends_on_pdf_profile(self):
+        file_path = Path('files/bank_statement_1.pdf')
+
+        rich_key = OCRExtractor.cache_key(file_path)
+        fast_key = OCRExtractor.cache_key(file_path, ExtractionOptions(pdf_profile=PdfProfile.FAST))
+        fast_key_more_pages = OCRExtractor.cache_key(file_path, ExtractionOptions(pdf_profile=PdfProfile.FAST, max_pdf_pages=5))
+
+        self.assertEqual(len({rich_key, fast_key, fast_key_more_pages}), 3)
+
+    @staticmethod
+    def _encode_image(image: Image.Image, format: str, **kwargs) -> bytes:
+        buffer = BytesIO()
+        image.save(buffer, format=format, **kwargs)
+        return buffer.getvalue()
+
+    def test_preprocess_downscales_large_jpeg(self):
+        jpeg = self._encode_image(Image.new('RGB', (4000, 3000), 'white'), 'JPEG')
+        options = ExtractionOptions(image_max_dimension=1000)
+
+        with Image.open(BytesIO(jpeg)) as image:
+            processed = OCRExtractor._preprocess_image(image, options)
+
+        self.assertEqual(processed.mode, 'L')
+        self.assertLessEqual(max(processed.size), 1000)
+        self.assertEqual(processed.size, (1000, 750))
+
+    def test_preprocess_downscales_to_target_dpi(self):
+        png = self._encode_image(Image.new('RGB', (1200, 1000), 'white'), 'PNG', dpi=(600, 600))
+        options = ExtractionOptions(image_target_dpi=300, image_grayscale=False)
+
+        with Image.open(BytesIO(png)) as image:
+            processed = OCRExtractor._preprocess_image(image, options)
+
+        self.assertEqual(processed.mode, 'RGB')
+        self.assertEqual(processed.size, (600, 500))
+
+    def test_preprocess_autocrop(self):
+        image = Image.new('L', (500, 500), 255)
+        image.paste(0, (200, 200, 300, 250))
+
+        processed = OCRExtractor._preprocess_image(image, ExtractionOptions(image_autocrop=True))
+
+        self.assertEqual(processed.size, (120, 70))
+
+    def test_image_ocr_passes_tesseract_config(self):
+        png = self._encode_image(Image.new('RGB', (100, 100), 'white'), 'PNG')
+        document = InMemoryDocument(name=Path('scan.png'), data=png)
+        options = ExtractionOptions(tesseract_psm=6, tesseract_config="-c preserve_interword_spaces=1")
+
+        with patch('src.feature_extraction.ocr_extractor.pytesseract.image_to_string', return_value="text") as mock_ocr:
+            OCRExtractor.extract_document(document, options=options)
+
+        self.assertEqual(mock_ocr.call_args.kwargs['config'], "--psm 6 -c preserve_interword_spaces=1")
+        self.assertEqual(mock_ocr.call_args.args[0].mode, 'L')
+
+    def test_cache_key_depends_on_image_settings(self):
+        file_path = Path('files/drivers_license_1.jpg')
+
+        default_key = OCRExtractor.cache_key(file_path)
+        psm_key = OCRExtractor.cache_key(file_path, ExtractionOptions(tesseract_psm=6))
+        crop_key = OCRExtractor.cache_key(file_path, ExtractionOptions(image_autocrop=True))
+
+        self.assertEqual(len({default_key, psm_key, crop_key}), 3)
+
+    def test_extract_all_documents_timings(self):
+        timings = {}
+        with patch.object(OCRExtractor, '_run_pdf_ocr_single_file', return_value="text"):
+            OCRExtractor.extract_all_documents(paths_list=[Path('files/bank_statement_1.pdf')], timings=timings)
+
+        self.assertEqual(list(timings), [Path('files/bank_statement_1.pdf')])
+        self.assertGreaterEqual(timings[Path('files/bank_statement_1.pdf')], 0.0)
+
+    def test_iter_sources_walks_lazily(self):
+        with TemporaryDirectory() as temp_dir:
+            (Path(temp_dir) / 'b').mkdir()
+            for name in ('b/2.pdf', 'b/1.pdf', 'a.pdf'):
+                (Path(temp_dir) / name).write_bytes(b"")
+
+            sources = OCRExtractor.iter_sources(dir_path=Path(temp_dir))
+            first = next(sources)
+
+            self.assertEqual(first, Path(temp_dir, 'a.pdf'))
+            self.assertEqual(list(sources), [Path(temp_dir, 'b', '1.pdf'), Path(temp_dir, 'b', '2.pdf')])
+
+    def test_iter_sources_missing_directory(self):
+        with self.assertRaises(FileNotFoundError):
+            OCRExtractor.iter_sources(dir_path=Path('some/path'))
+
+    def test_ocr_timeout_is_reported(self):
+        png = self._encode_image(Image.new('RGB', (100, 100), 'white'), 'PNG')
+        good = InMemoryDocument(name=Path('good.png'), data=png)
+        slow = InMemoryDocument(name=Path('slow.png'), data=png)
+        errors = {}
+
+        def image_to_string(image, config, timeout):
+            if timeout == 5:
+                raise RuntimeError("Tesseract process timeout")
+            return "text"
+
+        with patch('src.feature_extraction.ocr_extractor.pytesseract.image_to_string', side_effect=image_to_string):
+            fast_text = OCRExtractor.extract_all_documents(documents=[good])
+            result = OCRExtractor.extract_all_documents(documents=[slow], options=ExtractionOptions(ocr_timeout_s=5), errors=errors)
+
+        self.assertEqual(fast_text, {Path('good.png'): "text"})
+        self.assertEqual(result, {Path('slow.png'): ""})
+        self.assertEqual(errors, {Path('slow.png'): OCR_TIMED_OUT})
+
+    def test_failed_file_has_error_reason(self):
+        errors = {}
+        documents = [InMemoryDocument(name=Path('bad.pdf'), data=b"not a pdf")]
+
+        OCRExtractor.extract_all_documents(documents=documents, errors=errors)
+
+        self.assertTrue(errors[Path('bad.pdf')].startswith("extraction failed"))
+
+    def test_deadline_skips_remaining_files(self):
+        errors = {}
+
+        with patch.object(OCRExtractor, '_run_pdf_ocr_single_file') as mock_extract:
+            result = OCRExtractor.extract_all_documents(
+                paths_list=[Path('files/bank_statement_1.pdf')],
+                errors=errors,
+                deadline=time.monotonic() - 1,
+            )
+
+        mock_extract.assert_not_called()
+        self.assertEqual(result, {Path('files/bank_statement_1.pdf'): ""})
+        self.assertEqual(errors, {Path('files/bank_statement_1.pdf'): DEADLINE_EXCEEDED})
+
+    def test_deadline_caps_ocr_timeout(self):
+        now = time.monotonic()
+        options = ExtractionOptions(ocr_timeout_s=30)
+
+        self.assertEqual(options.with_ocr_deadline(now + 5).ocr_deadline, now + 5)
+        self.assertIs(options.with_ocr_deadline(None), options)
+        self.assertEqual(options.with_ocr_deadline(now + 5).with_ocr_deadline(now + 60).ocr_deadline, now + 5)
+
+        self.assertLessEqual(OCRExtractor._ocr_timeout_s(options.with_ocr_deadline(now + 5)), 5)
+        self.assertEqual(OCRExtractor._ocr_timeout_s(options.with_ocr_deadline(now + 60)), 30)
+        self.assertEqual(OCRExtractor._ocr_timeout_s(options), 30)
+        with self.assertRaises(ocr_extractor.OCRTimeoutError):
+            OCRExtractor._ocr_timeout_s(options.with_ocr_deadline(now - 1))
+
+    @staticmethod
+    def _blank_pdf(page_count: int) -> bytes:
+        with pymupdf.open() as doc:
+            for _ in range(page_count):
+                doc.new_page(width=200, height=200)
+            return doc.tobytes()
+
+    def test_deadline_rechecked_between_scanned_pages(self):
+        timeouts = []
+
+        def image_to_string(image, config, timeout):
+            timeouts.append(timeout)
+            if timeout < 0.4:
+                time.sleep(timeout)
+                raise RuntimeError("Tesseract process timeout")
+            time.sleep(0.4)
+            return "page"
+
+        start = time.monotonic()
+        options = ExtractionOptions(pdf_profile=PdfProfile.FAST, ocr_timeout_s=30).with_ocr_deadline(start + 1.0)
+        with patch('src.feature_extraction.ocr_extractor.pytesseract.image_to_string', side_effect=image_to_string):
+            with self.assertRaises(ocr_extractor.OCRTimeoutError):
+                OCRExtractor._run_pdf_ocr_single_file(self._blank_pdf(5), Path('scan.pdf'), options)
+
+        # Each page only gets the time left, so the file stops at the deadline
+        self.assertLess(time.monotonic() - start, 1.2)
+        self.assertEqual(len(timeouts), 3)
+        self.assertEqual(timeouts, sorted(timeouts, reverse=True))
+        self.assertLessEqual(timeouts[0], 1.0)
+
+    def test_deadline_checked_between_markdown_pages(self):
+        def to_markdown(doc, **kwargs):
+            time.sleep(0.3)
+            return "page"
+
+        options = ExtractionOptions().with_ocr_deadline(time.monotonic() + 0.5)
+        with patch('pymupdf4llm.to_markdown', side_effect=to_markdown) as mock_to_markdown:
+            with self.assertRaises(ocr_extractor.OCRTimeoutError):
+                OCRExtractor._run_pdf_ocr_single_file(self._blank_pdf(5), Path('report.pdf'), options)
+
+        self.assertEqual(mock_to_markdown.call_count, 2)
+        self.assertEqual(mock_to_markdown.call_args.kwargs['pages'], [1])
+
+    def test_deadline_abandons_single_worker(self):
+        OCRExtractor.shutdown_workers()
+        errors = {}
+
+        with patch.object(ocr_extractor, '_extract_text_timed_worker', _slow_worker):
+            start = time.monotonic()
+            result = OCRExtractor.extract_all_documents(
+                paths_list=[Path('files/invoice_2.pdf')], errors=errors, deadline=start + 0.3,
+            )
+            elapsed_s = time.monotonic() - start
+
+        # One worker runs files in-process, unless there is a deadline it must return by
+        self.assertLess(elapsed_s, 1.2)
+        self.assertEqual(result, {Path('files/invoice_2.pdf'): ""})
+        self.assertEqual(errors, {Path('files/invoice_2.pdf'): DEADLINE_EXCEEDED})
+
+        OCRExtractor.shutdown_workers()
+
+    def test_in_process_with_deadline(self):
+        with patch.object(OCRExtractor, '_run_pdf_ocr_single_file', return_value="text") as mock_extract:
+            result = OCRExtractor.extract_all_documents(
+                paths_list=[Path('files/invoice_2.pdf')], deadline=time.monotonic() + 60, in_process=True,
+            )
+
+        self.assertEqual(result, {Path('files/invoice_2.pdf'): "text"})
+        self.assertIsNotNone(mock_extract.call_args.kwargs['options'].ocr_deadline)
+
+    def test_deadline_leaves_shared_pool_running(self):
+        OCRExtractor.shutdown_workers()
+        slow_path, late_path = Path('files/bank_statement_1.pdf'), Path('files/invoice_2.pdf')
+        slow_errors, late_errors = {}, {}
+        slow_result = {}
+
+        with patch.object(ocr_extractor, '_extract_text_timed_worker', _slow_worker):
+            # Start both workers before any thread does, as forking a multi-threaded process is unsafe
+            pool = OCRExtractor._get_executor(2)
+            for future in [pool.submit(time.sleep, 0.2) for _ in range(2)]:
+                future.result()
+
+            # Another request, without a deadline, is extracting on the same pool
+            slow_request = threading.Thread(target=lambda: slow_result.update(
+                OCRExtractor.extract_all_documents(paths_list=[slow_path], num_workers=2, errors=slow_errors)
+            ))
+            slow_request.start()
+
+            start = time.monotonic()
+            late_result = OCRExtractor.extract_all_documents(
+                paths_list=[late_path], num_workers=2, errors=late_errors, deadline=start + 0.3,
+            )
+            late_elapsed_s = time.monotonic() - start
+            executor = OCRExtractor._executor
+            slow_request.join()
+
+        self.assertLess(late_elapsed_s, 1.2)
+        self.assertEqual(late_result, {late_path: ""})
+        self.assertEqual(late_errors, {late_path: DEADLINE_EXCEEDED})
+        self.assertEqual(slow_result, {slow_path: "slow text"})
+        self.assertEqual(slow_errors, {})
+        self.assertIs(OCRExtractor._executor, executor)
+
+        OCRExtractor.shutdown_workers()
+
+    def test_duplicates_extracted_once(self):
+        png = self._encode_image(Image.new('RGB', (100, 100), 'white'), 'PNG')
+        documents = [
+            InMemoryDocument(name=Path('a.png'), data=png),
+            InMemoryDocument(name=Path('b.png'), data=self._encode_image(Image.new('RGB', (100, 100), 'black'), 'PNG')),
+            InMemoryDocument(name=Path('copy of a.png'), data=png),
+        ]
+
+        with patch.object(OCRExtractor, '_run_image_ocr_single_file', return_value="text") as mock_ocr:
+            result = OCRExtractor.extract_all_documents(documents=documents)
+
+        self.assertEqual(mock_ocr.call_count, 2)
+        self.assertEqual(list(result), [Path('a.png'), Path('b.png'), Path('copy of a.png')])
+        self.assertEqual(result[Path('copy of a.png')], "text")
+
+    def test_duplicates_share_errors(self):
+        errors = {}
+        documents = [InMemoryDocument(name=Path(name), data=b"not a pdf") for name in ('a.pdf', 'b.pdf')]
+
+        with patch.object(OCRExtractor, '_run_pdf_ocr_single_file', side_effect=RuntimeError("bad pdf")) as mock_ocr:
+            result = OCRExtractor.extract_all_documents(documents=documents, errors=errors)
+
+        mock_ocr.assert_called_once()
+        self.assertEqual(result, {Path('a.pdf'): "", Path('b.pdf'): ""})
+        self.assertEqual(errors[Path('b.pdf')], errors[Path('a.pdf')])
@@ -0,0 +1,97 @@
+import time
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from src.jobs.job_manager import JobManager, JobQueueFullError
+from src.types.classifier_input import ClassifierInput
+from src.types.classifier_output import ClassifierOutput
+from src.types.document_type import DocumentType
+from src.types.job_status import JobStatus
+from src.types.pdf_profile import PdfProfile
+
+
+def _wait_for(job_manager: JobManager, job_id: str, timeout_s: float = 5.0) -> dict:
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        job = job_manager.describe(job_id)
+        if job["status"] in (JobStatus.COMPLETED.value, JobStatus.FAILED.value):
+            return job
+        time.sleep(0.01)
+    raise TimeoutError(f"Job {job_id} did not finish")
+
+
+class TestJobManager(TestCase):
+    def setUp(self):
+        self.classifier = MagicMock()
+        self.classifier.classify.side_effect = lambda input: ClassifierOutput(
+            output_per_file={file: DocumentType.INVOICE for file in input.files}
+        )
+
+    def test_submit_and_complete(self):
+        job_manager = JobManager(self.classifier, chunk_size=2)
+        on_finished = MagicMock()
+
+        job = job_manager.submit([Path("a.pdf"), Path("b.pdf"), Path("c.pdf")], on_finished=on_finished)
+        result = _wait_for(job_manager, job.job_id)
+
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(result["completed_files"], 3)
+        self.assertEqual(result["file_classes"], {"a.pdf": "invoice", "b.pdf": "invoice", "c.pdf": "invoice"})
+        self.assertEqual(self.classifier.classify.call_count, 2)
+        self.classifier.classify.assert_any_call(ClassifierInput(files=[Path("c.pdf")]))
+        on_finished.assert_called_once()
+
+    def test_pdf_profile(self):
+        job_manager = JobManager(self.classifier)
+
+        job = job_manager.submit([Path("a.pdf")], pdf_profile=PdfProfile.FAST)
+        _wait_for(job_manager, job.job_id)
+
+        self.classifier.classify.assert_called_once_with(ClassifierInput(files=[Path("a.pdf")], pdf_profile=PdfProfile.FAST))
+
+    def test_failed_job(self):
+        self.classifier.classify.side_effect = RuntimeError("test exception")
+        job_manager = JobManager(self.classifier)
+
+        job = job_manager.submit([Path("a.pdf")])
+        result = _wait_for(job_manager, job.job_id)
+
+        self.assertEqual(result["status"], "failed")
+        self.assertEqual(result["error"], "test exception")
+
+    def test_file_errors(self):
+        self.classifier.classify.side_effect = lambda input: ClassifierOutput(
+            output_per_file={file: DocumentType.UNKNOWN for file in input.files},
+            errors_per_file={file: "ocr timed out" for file in input.files},
+        )
+        job_manager = JobManager(self.classifier)
+
+        job = job_manager.submit([Path("a.pdf")])
+        result = _wait_for(job_manager, job.job_id)
+
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(result["file_errors"], {"a.pdf": "ocr timed out"})
+
+    def test_queue_full(self):
+        self.classifier.classify.side_effect = lambda input: time.sleep(0.5) or ClassifierOutput(output_per_file={})
+        job_manager = JobManager(self.classifier, max_workers=1, max_pending_jobs=1)
+
+        job_manager.submit([Path("a.pdf")])
+
+        with self.assertRaises(JobQueueFullError):
+            job_manager.submit([Path("b.pdf")])
+
+    def test_finished_jobs_expire(self):
+        job_manager = JobManager(self.classifier, ttl_s=0.2)
+
+        job = job_manager.submit([Path("a.pdf")])
+        _wait_for(job_manager, job.job_id)
+        time.sleep(0.3)
+
+        self.assertIsNone(job_manager.describe(job.job_id))
+
+    def test_unknown_job(self):
+        job_manager = JobManager(self.classifier)
+
+        self.assertIsNone(job_manager.describe("missing"))
@@ -0,0 +1,34 @@
+import os
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from src.serving import gunicorn_config
+from src.serving.memory import PREFORK_MASTER_PID_ENV
+
+
+class TestGunicornConfig(TestCase):
+    def test_preloads_app(self):
+        self.assertTrue(gunicorn_config.preload_app)
+        self.assertGreaterEqual(gunicorn_config.workers, 1)
+        self.assertGreater(gunicorn_config.timeout, gunicorn_config.graceful_timeout)
+
+    @patch('src.serving.gunicorn_config.gc.freeze')
+    @patch('src.serving.gunicorn_config.ResourceScheduler.apply')
+    @patch('src.serving.gunicorn_config.DEFAULT_CLASSIFIER')
+    def test_load_application_warms_up_before_fork(self, mock_classifier, mock_apply, mock_freeze):
+        with patch.dict(os.environ):
+            app = gunicorn_config.load_application()
+
+            self.assertEqual(os.environ[PREFORK_MASTER_PID_ENV], str(os.getpid()))
+
+        self.assertIs(app, gunicorn_config.app)
+        # Warm-up runs on one thread, so no OpenMP pool is running at fork
+        self.assertEqual(mock_apply.call_args[0][0].model_threads, 1)
+        mock_classifier.warmup.assert_called_once()
+        mock_freeze.assert_called_once()
+
+    @patch('src.serving.gunicorn_config.ResourceScheduler.apply')
+    def test_post_fork_applies_thread_budget(self, mock_apply):
+        gunicorn_config.post_fork(MagicMock(), MagicMock())
+
+        mock_apply.assert_called_once_with(gunicorn_config.thread_budget)
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.serving.memory import PREFORK_MASTER_PID_ENV, child_pids, process_memory, serving_memory
+
+
+class TestMemory(TestCase):
+    def test_process_memory(self):
+        memory = process_memory()
+
+        self.assertGreater(memory['rss'], 0)
+        if 'pss' in memory:
+            self.assertLessEqual(memory['pss'], memory['rss'])
+            self.assertEqual(memory['shared'] + memory['private'], memory['rss'])
+
+    @patch('src.serving.memory._PROC_DIR', Path('/nonexistent'))
+    def test_process_memory_without_smaps(self):
+        memory = process_memory()
+
+        # Only the peak is known, so it must not pass for the current resident size
+        self.assertEqual(list(memory), ['max_rss'])
+        self.assertGreater(memory['max_rss'], 0)
+
+        with self.assertRaises(OSError):
+            process_memory(os.getpid() + 1)
+
+    def test_child_pids(self):
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        try:
+            self.assertIn(child.pid, child_pids(os.getpid()))
+        finally:
+            child.kill()
+            child.wait()
+
+    def test_serving_memory_without_master(self):
+        with patch.dict(os.environ):
+            os.environ.pop(PREFORK_MASTER_PID_ENV, None)
+            report = serving_memory()
+
+        self.assertIsNone(report['master'])
+        self.assertEqual([worker['pid'] for worker in report['workers']], [os.getpid()])
+
+    def test_serving_memory_lists_workers(self):
+        worker = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        try:
+            with patch.dict(os.environ, {PREFORK_MASTER_PID_ENV: str(os.getpid())}):
+                report = serving_memory()
+        finally:
+            worker.kill()
+            worker.wait()
+
+        self.assertEqual(report['master']['pid'], os.getpid())
+        self.assertIn(worker.pid, [process['pid'] for process in report['workers']])
+        self.assertGreater(report['total_pss'], 0)
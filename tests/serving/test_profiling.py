@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.serving.profiling import PYTHON_PROFILE, PYTHON_SUMMARY, TORCH_TRACE, ProfilerBusyError, RequestProfiler
+
+
+def _slow_function():
+    time.sleep(0.01)
+
+
+class TestRequestProfiler(TestCase):
+    def setUp(self):
+        self._tmp_dir = TemporaryDirectory()
+        self.profile_dir = Path(self._tmp_dir.name)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_profile(self):
+        profiler = RequestProfiler(self.profile_dir)
+
+        with patch.dict(sys.modules, {'torch': None}):
+            with profiler.profile() as profile_id:
+                _slow_function()
+
+        self.assertIsNotNone(profiler.artifact_path(profile_id, PYTHON_PROFILE))
+        summary = profiler.artifact_path(profile_id, PYTHON_SUMMARY).read_text()
+        self.assertIn('_slow_function', summary)
+        # Torch was never imported, so it is not profiled, and the profile says so
+        self.assertIsNone(profiler.artifact_path(profile_id, TORCH_TRACE))
+        self.assertEqual(profiler.skipped_artifacts(profile_id), {TORCH_TRACE: "torch was not loaded"})
+        self.assertIn("No torch_trace.json: torch was not loaded", summary)
+
+    def test_torch_trace_without_torch(self):
+        profiler = RequestProfiler(self.profile_dir, torch_trace=True)
+
+        with patch.dict(sys.modules, {'torch': None}):
+            with profiler.profile() as profile_id:
+                pass
+
+        self.assertIsNone(profiler.artifact_path(profile_id, TORCH_TRACE))
+        self.assertEqual(profiler.skipped_artifacts(profile_id), {TORCH_TRACE: "torch is not installed"})
+
+    def test_one_profile_at_a_time(self):
+        profiler = RequestProfiler(self.profile_dir)
+
+        with profiler.profile():
+            with self.assertRaises(ProfilerBusyError):
+                with profiler.profile():
+                    pass
+
+        # The lock is released once the first profile is saved
+        with profiler.profile():
+            pass
+
+    def test_artifact_path_rejects_unknown_names(self):
+        profiler = RequestProfiler(self.profile_dir)
+        with profiler.profile() as profile_id:
+            pass
+
+        self.assertIsNone(profiler.artifact_path(profile_id, 'secrets.txt'))
+        self.assertIsNone(profiler.artifact_path('..', PYTHON_PROFILE))
+        self.assertIsNone(profiler.artifact_path('0' * 32, PYTHON_PROFILE))
+
+    def test_oldest_profiles_deleted(self):
+        profiler = RequestProfiler(self.profile_dir, max_profiles=2)
+
+        profile_ids = []
+        for mtime in range(3):
+            with profiler.profile() as profile_id:
+                pass
+            # Space the profiles out in time, as the file system may not tell them apart
+            os.utime(self.profile_dir / profile_id, (mtime, mtime))
+            profile_ids.append(profile_id)
+
+        self.assertEqual(sorted(path.name for path in self.profile_dir.iterdir()), sorted(profile_ids[1:]))
@@ -1,12 +1,19 @@
+import json
+import sys
+import time
 from io import BytesIO
 from pathlib import Path
 from unittest.mock import MagicMock
 
 import pytest
-from src.app import app, allowed_file
+from src.app import MAX_REQUEST_TIME_BUDGET_S, app, allowed_file
 from src.classifier.filename_classifier import FilenameClassifier
+from src.serving.profiling import RequestProfiler
 from src.types.document_type import DocumentType
+from src.types.file_prediction import FilePrediction
 from src.types.classifier_output import ClassifierOutput
+from src.types.model_state import ModelState
+from src.types.pdf_profile import PdfProfile
 
 @pytest.fixture
 def client():
@@ -35,7 +42,7 @@ def test_no_selected_file(client):
     assert response.status_code == 400
 
 def test_success(client, mocker):
-    mocker.patch(
+    mock_classify = mocker.patch(
         'src.app.DEFAULT_CLASSIFIER.classify',
         return_value=ClassifierOutput(
             output_per_file={Path('file.pdf'): DocumentType.DRIVERS_LICENSE}
@@ -48,6 +55,27 @@ def test_success(client, mocker):
     assert response.status_code == 200
     assert response.get_json() == {"file_classes": {'file.pdf': 'drivers_license'}}
 
+    # Uploads are passed to the classifier in memory rather than through a temp dir
+    input = mock_classify.call_args[0][0]
+    assert input.dir_path is None
+    assert [document.name for document in input.documents] == [Path('file.pdf')]
+
+def test_pdf_profile(client, mocker):
+    mock_classify = mocker.patch(
+        'src.app.DEFAULT_CLASSIFIER.classify',
+        return_value=ClassifierOutput(output_per_file={Path('file.pdf'): DocumentType.INVOICE})
+    )
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post('/classify_file?pdf_profile=fast', data=data, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert mock_classify.call_args[0][0].pdf_profile == PdfProfile.FAST
+
+def test_unknown_pdf_profile(client):
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf'), 'pdf_profile': 'slow'}
+    response = client.post('/classify_file', data=data, content_type='multipart/form-data')
+    assert response.status_code == 400
+
 def test_multiple_files(client, mocker):
     mocker.patch(
         'src.app.DEFAULT_CLASSIFIER.classify',
@@ -63,4 +91,237 @@ def test_multiple_files(client, mocker):
     data = {'file': (BytesIO(b"dummy content"), 'file1.pdf'), 'file': (BytesIO(b"dummy content"), 'file2.pdf')}
     response = client.post('/classify_file', data=data, content_type='multipart/form-data')
     assert response.status_code == 200
-    assert response.get_json() == {"file_classes": {'file1.pdf': 'drivers_license', 'file2.pdf': 'bank_statement'}}
\ No newline at end of file
+    assert response.get_json() == {"file_classes": {'file1.pdf': 'drivers_license', 'file2.pdf': 'bank_statement'}}
+def test_stream(client, mocker):
+    mocker.patch(
+        'src.app.DEFAULT_CLASSIFIER.classify_iter',
+        return_value=iter([
+            FilePrediction(Path('file2.pdf'), DocumentType.INVOICE, 0.9),
+            FilePrediction(Path('file1.pdf'), DocumentType.UNKNOWN, 0.3),
+        ])
+    )
+
+    data = {'file': [(BytesIO(b"dummy content"), 'file1.pdf'), (BytesIO(b"dummy content"), 'file2.pdf')]}
+    response = client.post('/classify_file?stream=true', data=data, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == [
+        {"file": "file2.pdf", "file_class": "invoice", "score": 0.9},
+        {"file": "file1.pdf", "file_class": "other", "score": 0.3},
+    ]
+
+def test_stream_accept_header(client, mocker):
+    mocker.patch(
+        'src.app.DEFAULT_CLASSIFIER.classify_iter',
+        return_value=iter([FilePrediction(Path('file.pdf'), DocumentType.INVOICE, 0.9)])
+    )
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post('/classify_file', data=data, content_type='multipart/form-data', headers={'Accept': 'application/x-ndjson'})
+    assert response.mimetype == 'application/x-ndjson'
+    assert json.loads(response.get_data(as_text=True)) == {"file": "file.pdf", "file_class": "invoice", "score": 0.9}
+
+def test_stream_error(client, mocker):
+    def classify_iter(input):
+        yield FilePrediction(Path('file.pdf'), DocumentType.INVOICE, 0.9)
+        raise RuntimeError("test exception")
+
+    mocker.patch('src.app.DEFAULT_CLASSIFIER.classify_iter', side_effect=classify_iter)
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post('/classify_file?stream=1', data=data, content_type='multipart/form-data')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[0]["file_class"] == "invoice"
+    assert "error" in lines[-1]
+
+def test_file_errors(client, mocker):
+    mocker.patch(
+        'src.app.DEFAULT_CLASSIFIER.classify',
+        return_value=ClassifierOutput(
+            output_per_file={Path('file.pdf'): DocumentType.UNKNOWN},
+            errors_per_file={Path('file.pdf'): "ocr timed out"},
+        )
+    )
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post('/classify_file', data=data, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.get_json() == {"file_classes": {'file.pdf': 'other'}, "errors": {'file.pdf': "ocr timed out"}}
+
+def test_stream_file_error(client, mocker):
+    mocker.patch(
+        'src.app.DEFAULT_CLASSIFIER.classify_iter',
+        return_value=iter([FilePrediction(Path('file.pdf'), DocumentType.UNKNOWN, error="deadline exceeded")]),
+    )
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post('/classify_file?stream=1', data=data, content_type='multipart/form-data')
+    assert json.loads(response.get_data(as_text=True))["error"] == "deadline exceeded"
+
+def test_time_budget(client, mocker):
+    mock_classify = mocker.patch(
+        'src.app.DEFAULT_CLASSIFIER.classify',
+        return_value=ClassifierOutput(output_per_file={Path('file.pdf'): DocumentType.INVOICE})
+    )
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post('/classify_file?timeout_s=5', data=data, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert mock_classify.call_args[0][0].time_budget_s == 5.0
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    client.post('/classify_file?timeout_s=100000', data=data, content_type='multipart/form-data')
+    assert mock_classify.call_args[0][0].time_budget_s == MAX_REQUEST_TIME_BUDGET_S
+
+@pytest.mark.parametrize("timeout_s", ["abc", "0", "-1", "inf"])
+def test_invalid_time_budget(client, timeout_s):
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post(f'/classify_file?timeout_s={timeout_s}', data=data, content_type='multipart/form-data')
+    assert response.status_code == 400
+
+@pytest.fixture
+def profiling(tmp_path, mocker):
+    mocker.patch.dict(app.config, {'PROFILING_ENABLED': True, 'PROFILING_TOKEN': None})
+    mocker.patch('src.app.PROFILER', RequestProfiler(tmp_path))
+
+def test_profile(client, mocker, profiling):
+    mock_classify = mocker.patch(
+        'src.app.DEFAULT_CLASSIFIER.classify',
+        return_value=ClassifierOutput(output_per_file={Path('file.pdf'): DocumentType.INVOICE})
+    )
+
+    mocker.patch.dict(sys.modules, {'torch': None})
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post('/classify_file', data=data, content_type='multipart/form-data', headers={'X-Profile': 'true'})
+    assert response.status_code == 200
+    assert mock_classify.call_args[0][0].inline
+
+    profile = response.get_json()["profile"]
+    assert set(profile["artifacts"]) == {'python.prof', 'python.txt'}
+    assert profile["skipped"] == {'torch_trace.json': "torch was not loaded"}
+
+    download = client.get(profile["artifacts"]["python.txt"])
+    assert download.status_code == 200
+    assert b'function calls' in download.data
+
+def test_unprofiled_request_runs_normally(client, mocker, profiling):
+    mock_classify = mocker.patch(
+        'src.app.DEFAULT_CLASSIFIER.classify',
+        return_value=ClassifierOutput(output_per_file={Path('file.pdf'): DocumentType.INVOICE})
+    )
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post('/classify_file', data=data, content_type='multipart/form-data')
+    assert "profile" not in response.get_json()
+    assert not mock_classify.call_args[0][0].inline
+
+def test_profile_disabled(client):
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post('/classify_file?profile=true', data=data, content_type='multipart/form-data')
+    assert response.status_code == 403
+
+    response = client.get(f'/profiles/{"0" * 32}/python.prof')
+    assert response.status_code == 403
+
+def test_profile_token(client, mocker, profiling):
+    mocker.patch.dict(app.config, {'PROFILING_TOKEN': 'secret'})
+    mocker.patch(
+        'src.app.DEFAULT_CLASSIFIER.classify',
+        return_value=ClassifierOutput(output_per_file={Path('file.pdf'): DocumentType.INVOICE})
+    )
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post('/classify_file?profile=true', data=data, content_type='multipart/form-data')
+    assert response.status_code == 403
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post(
+        '/classify_file?profile=true', data=data, content_type='multipart/form-data', headers={'X-Profile-Token': 'secret'}
+    )
+    assert response.status_code == 200
+
+def test_profile_stream_rejected(client, profiling):
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post('/classify_file?profile=true&stream=true', data=data, content_type='multipart/form-data')
+    assert response.status_code == 400
+
+def test_unknown_profile(client, profiling):
+    response = client.get(f'/profiles/{"0" * 32}/python.prof')
+    assert response.status_code == 404
+
+def test_submit_job(client, mocker):
+    mocker.patch(
+        'src.app.DEFAULT_CLASSIFIER.classify',
+        side_effect=lambda input: ClassifierOutput(
+            output_per_file={file: DocumentType.INVOICE for file in input.files}
+        )
+    )
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    response = client.post('/jobs', data=data, content_type='multipart/form-data')
+    assert response.status_code == 202
+
+    job_id = response.get_json()["job_id"]
+    for _ in range(100):
+        response = client.get(f'/jobs/{job_id}')
+        if response.get_json()["status"] == "completed":
+            break
+        time.sleep(0.01)
+
+    assert response.status_code == 200
+    assert response.get_json()["file_classes"] == {'file.pdf': 'invoice'}
+
+def test_submit_job_invalid_file(client):
+    data = {'file': (BytesIO(b"dummy content"), 'file.txt')}
+    response = client.post('/jobs', data=data, content_type='multipart/form-data')
+    assert response.status_code == 400
+
+def test_unknown_job(client):
+    response = client.get('/jobs/missing')
+    assert response.status_code == 404
+
+def test_metrics(client, mocker):
+    mocker.patch(
+        'src.app.DEFAULT_CLASSIFIER.classify',
+        return_value=ClassifierOutput(
+            output_per_file={Path('file.pdf'): DocumentType.UNKNOWN}
+        )
+    )
+
+    data = {'file': (BytesIO(b"dummy content"), 'file.pdf')}
+    client.post('/classify_file', data=data, content_type='multipart/form-data')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+
+    body = response.get_data(as_text=True)
+    assert 'classifier_upload_seconds_count' in body
+    assert 'classifier_response_serialization_seconds_count' in body
+    assert 'classifier_files_total{kind="pdf"}' in body
+    assert 'classifier_predictions_total{document_type="other"}' in body
+
+def test_memz(client):
+    response = client.get('/memz')
+    assert response.status_code == 200
+    assert response.get_json()["workers"][0]["memory"]["rss"] > 0
+
+def test_metrics_process_memory(client):
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'classifier_process_memory_bytes{kind="rss"}' in body
+
+def test_healthz(client):
+    response = client.get('/healthz')
+    assert response.status_code == 200
+
+def test_readyz_not_loaded(client):
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.get_json() == {"status": "not_loaded"}
+
+def test_readyz_ready(client, mocker):
+    mocker.patch('src.app.DEFAULT_CLASSIFIER._state', ModelState.READY)
+
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ready"}
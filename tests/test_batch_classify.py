@@ -0,0 +1,113 @@
+import json
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.batch_classify import BatchCheckpoint, classify_directory
+from src.classifier.filename_classifier import FilenameClassifier
+from src.types.document_type import DocumentType
+from src.types.file_prediction import FilePrediction
+
+
+class TestBatchClassify(TestCase):
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.dir_path = Path(self._temp_dir.name, 'files')
+        (self.dir_path / 'nested').mkdir(parents=True)
+        (self.dir_path / 'invoice_1.pdf').write_bytes(b"invoice")
+        (self.dir_path / 'nested' / 'bank_statement_1.pdf').write_bytes(b"statement")
+        self.output_path = Path(self._temp_dir.name, 'results.jsonl')
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def run_batch(self, classifier=None):
+        checkpoint = BatchCheckpoint(self.output_path, checkpoint_every=1)
+        try:
+            return classify_directory(classifier or FilenameClassifier(), self.dir_path, checkpoint, chunk_size=1)
+        finally:
+            checkpoint.close()
+
+    def read_results(self):
+        return [json.loads(line) for line in self.output_path.read_text().splitlines()]
+
+    def test_classify_directory(self):
+        summary = self.run_batch()
+
+        self.assertEqual((summary.files, summary.classified, summary.skipped), (2, 2, 0))
+        self.assertEqual(summary.per_type, {'invoice': 1, 'bank_statement': 1})
+        results = {Path(result['path']).name: result for result in self.read_results()}
+        self.assertEqual(results['invoice_1.pdf']['document_type'], 'invoice')
+        self.assertEqual(results['bank_statement_1.pdf']['size'], len(b"statement"))
+
+    def test_resume_skips_finished_files(self):
+        self.run_batch()
+
+        with patch.object(FilenameClassifier, 'classify_iter') as mock_classify_iter:
+            summary = self.run_batch()
+
+        mock_classify_iter.assert_not_called()
+        self.assertEqual((summary.files, summary.skipped, summary.classified), (2, 2, 0))
+        self.assertEqual(len(self.read_results()), 2)
+
+    def test_changed_file_is_classified_again(self):
+        self.run_batch()
+
+        changed_path = self.dir_path / 'invoice_1.pdf'
+        changed_path.write_bytes(b"new invoice")
+        os.utime(changed_path, ns=(0, 0))
+
+        summary = self.run_batch()
+
+        self.assertEqual((summary.skipped, summary.classified), (1, 1))
+
+    def test_duplicate_content_reuses_result(self):
+        self.run_batch()
+        (self.dir_path / 'copy.pdf').write_bytes(b"invoice")
+
+        summary = self.run_batch()
+
+        self.assertEqual((summary.reused, summary.classified), (1, 0))
+        self.assertEqual(self.read_results()[-1]['document_type'], 'invoice')
+
+    def test_failed_file_is_retried(self):
+        classify_iter = FilenameClassifier.classify_iter
+
+        def fail_invoices(classifier, input):
+            for prediction in classify_iter(classifier, input):
+                if prediction.document_type == DocumentType.INVOICE:
+                    prediction = FilePrediction(prediction.path, DocumentType.UNKNOWN, 0.0, "ocr timed out")
+                yield prediction
+
+        with patch.object(FilenameClassifier, 'classify_iter', fail_invoices):
+            summary = self.run_batch()
+        self.assertEqual((summary.classified, summary.failed), (2, 1))
+        results = {Path(result['path']).name: result for result in self.read_results()}
+        self.assertEqual(results['invoice_1.pdf']['error'], "ocr timed out")
+
+        # The failed file is classified again, and a new copy of it reuses the fresh result
+        (self.dir_path / 'invoice_copy.pdf').write_bytes(b"invoice")
+        summary = self.run_batch()
+
+        self.assertEqual((summary.skipped, summary.classified, summary.reused, summary.failed), (1, 1, 1, 0))
+        results = {Path(result['path']).name: result for result in self.read_results()}
+        self.assertEqual(results['invoice_1.pdf']['document_type'], 'invoice')
+        self.assertIsNone(results['invoice_1.pdf']['error'])
+        self.assertIsNone(results['invoice_copy.pdf']['error'])
+
+    def test_torn_line_is_ignored(self):
+        self.run_batch()
+        with open(self.output_path, 'a') as output:
+            output.write('{"path": "trunc')
+
+        (self.dir_path / 'invoice_2.pdf').write_bytes(b"another invoice")
+        summary = self.run_batch()
+
+        self.assertEqual((summary.skipped, summary.classified), (2, 1))
+        self.assertEqual(Path(self.read_results_after_torn_line()[-1]['path']).name, 'invoice_2.pdf')
+
+    def read_results_after_torn_line(self):
+        lines = self.output_path.read_text().splitlines()
+        return [json.loads(line) for line in lines if not line.startswith('{"path": "trunc')]
@@ -0,0 +1,39 @@
+import sys
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.benchmark import _torch_version, percentile, summarize_stage
+from src.types.inference_backend import InferenceBackend
+
+
+class TestBenchmark(TestCase):
+    def test_percentile(self):
+        values = [4.0, 1.0, 3.0, 2.0, 5.0]
+
+        self.assertEqual(percentile(values, 50), 3.0)
+        self.assertEqual(percentile(values, 0), 1.0)
+        self.assertEqual(percentile(values, 100), 5.0)
+        self.assertAlmostEqual(percentile(values, 95), 4.8)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_summarize_stage(self):
+        summary = summarize_stage([0.1, 0.2, 0.3], wall_time_s=0.6, peak_rss_bytes=10 * 1024 * 1024)
+
+        self.assertEqual(summary['files'], 3)
+        self.assertEqual(summary['files_per_sec'], 5.0)
+        self.assertEqual(summary['latency_ms']['p50'], 200.0)
+        self.assertEqual(summary['peak_rss_mb'], 10.0)
+
+    def test_summarize_stage_per_batch(self):
+        summary = summarize_stage([0.2, 0.4], wall_time_s=0.6, peak_rss_bytes=0, files=6)
+
+        self.assertEqual(summary['files'], 6)
+        self.assertEqual(summary['files_per_sec'], 10.0)
+        self.assertEqual(summary['latency_ms']['p50'], 300.0)
+
+    def test_torch_version_without_torch(self):
+        with patch.dict(sys.modules, {'torch': None}):
+            self.assertEqual(_torch_version(InferenceBackend.ONNX), "not installed")
+
+            with self.assertRaises(ImportError):
+                _torch_version(InferenceBackend.TORCH)
@@ -0,0 +1,69 @@
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from src.cache.ocr_cache import OCRCache
+from src.local_eval import confusion_matrix, extract_features, format_confusion_matrix, run_inference, summarize
+from src.types.document_type import DocumentType
+from src.types.extraction_options import ExtractionOptions
+
+
+SAMPLES = [
+    (Path("invoice.pdf"), DocumentType.INVOICE),
+    (Path("statement.pdf"), DocumentType.BANK_STATEMENT),
+    (Path("license.jpg"), DocumentType.DRIVERS_LICENSE),
+    (Path("invoice_2.pdf"), DocumentType.INVOICE),
+]
+
+PREDICTIONS = {
+    Path("invoice.pdf"): DocumentType.INVOICE,
+    Path("statement.pdf"): DocumentType.BANK_STATEMENT,
+    Path("license.jpg"): DocumentType.UNKNOWN,
+    Path("invoice_2.pdf"): DocumentType.INVOICE,
+}
+
+
+class TestLocalEval(TestCase):
+    def test_confusion_matrix(self):
+        matrix = confusion_matrix(SAMPLES, PREDICTIONS)
+
+        self.assertEqual(matrix[DocumentType.INVOICE][DocumentType.INVOICE], 2)
+        self.assertEqual(matrix[DocumentType.DRIVERS_LICENSE][DocumentType.UNKNOWN], 1)
+        self.assertEqual(sum(sum(row.values()) for row in matrix.values()), len(SAMPLES))
+        self.assertIn("drivers_license", format_confusion_matrix(matrix))
+
+    def test_summarize(self):
+        ocr_seconds = {Path("invoice.pdf"): 1.0, Path("invoice_2.pdf"): 3.0}
+        model_seconds = {file_path: 0.5 for file_path, _ in SAMPLES}
+
+        report = summarize(SAMPLES, PREDICTIONS, ocr_seconds, model_seconds)
+
+        self.assertEqual(report['accuracy'], 0.75)
+        self.assertEqual(report['confusion_matrix']['drivers_license']['other'], 1)
+        self.assertEqual(report['per_class']['invoice'], {'files': 2, 'accuracy': 1.0, 'mean_ocr_ms': 2000.0, 'mean_model_ms': 500.0})
+        self.assertIsNone(report['per_class']['bank_statement']['mean_ocr_ms'])
+        self.assertNotIn('other', report['per_class'])
+
+    def test_run_inference_batches(self):
+        classifier = MagicMock()
+        classifier.classify_texts.side_effect = lambda texts: {file_path: DocumentType.INVOICE for file_path in texts}
+        text_per_file = {file_path: "text" for file_path, _ in SAMPLES}
+
+        predictions, model_seconds = run_inference(classifier, text_per_file, batch_size=3)
+
+        self.assertEqual(classifier.classify_texts.call_count, 2)
+        self.assertEqual(list(predictions), list(text_per_file))
+        self.assertEqual(set(model_seconds), set(text_per_file))
+
+    @patch('src.local_eval.OCRExtractor')
+    def test_extract_features_uses_store(self, mock_ocr_extractor):
+        mock_ocr_extractor.extract_all_documents.return_value = {Path("invoice.pdf"): "text"}
+        feature_store = OCRCache()
+
+        text_per_file, ocr_seconds = extract_features(SAMPLES[:1], feature_store, num_workers=4, options=ExtractionOptions())
+
+        self.assertEqual(text_per_file, {Path("invoice.pdf"): "text"})
+        kwargs = mock_ocr_extractor.extract_all_documents.call_args.kwargs
+        self.assertIs(kwargs['cache'], feature_store)
+        self.assertEqual(kwargs['num_workers'], 4)
+        self.assertIs(kwargs['timings'], ocr_seconds)
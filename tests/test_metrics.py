@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from prometheus_client import CollectorRegistry, Histogram
+
+from src.metrics import file_kind, timed, timed_function, timed_generator
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        self.registry = CollectorRegistry()
+        self.histogram = Histogram('test_seconds', "Test histogram", registry=self.registry)
+
+    def _count(self) -> float:
+        return self.registry.get_sample_value('test_seconds_count')
+
+    def test_timed(self):
+        with timed(self.histogram):
+            pass
+
+        self.assertEqual(self._count(), 1)
+
+    def test_timed_function(self):
+        wrapped = timed_function(lambda x: x + 1, self.histogram)
+
+        self.assertEqual(wrapped(1), 2)
+        self.assertEqual(self._count(), 1)
+
+    def test_timed_generator(self):
+        wrapped = timed_generator(lambda n: (i for i in range(n)), self.histogram)
+
+        self.assertEqual(list(wrapped(3)), [0, 1, 2])
+        self.assertEqual(self._count(), 1)
+
+    def test_file_kind(self):
+        self.assertEqual(file_kind('.PDF'), 'pdf')
+        self.assertEqual(file_kind('.jpg'), 'image')
+        self.assertEqual(file_kind('.txt'), 'other')
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from src.resource_scheduler import ResourceScheduler
+from src.types.file_prediction import FilePrediction
+from src.types.document_type import DocumentType
+from src.types.inference_backend import InferenceBackend
+from src.types.thread_budget import ThreadBudget
+
+
+@patch('src.resource_scheduler.ResourceScheduler._set_torch_threads')
+class TestResourceScheduler(TestCase):
+    def setUp(self):
+        self._environ = patch.dict(os.environ)
+        self._environ.start()
+        ResourceScheduler.reset()
+
+    def tearDown(self):
+        ResourceScheduler.reset()
+        self._environ.stop()
+
+    def test_apply(self, mock_set_torch_threads):
+        budget = ThreadBudget(ocr_workers=3, tesseract_threads=2, model_threads=4)
+
+        self.assertEqual(ResourceScheduler.ocr_workers(), 1)
+        ResourceScheduler.apply(budget)
+
+        mock_set_torch_threads.assert_called_once_with(budget)
+        self.assertEqual(os.environ['OMP_THREAD_LIMIT'], '2')
+        self.assertEqual(ResourceScheduler.budget(), budget)
+        self.assertEqual(ResourceScheduler.ocr_workers(), 3)
+        self.assertEqual(ResourceScheduler.ocr_workers(5), 5)
+
+    def test_onnx_backend_leaves_torch_alone(self, mock_set_torch_threads):
+        ResourceScheduler.apply(ThreadBudget(tesseract_threads=2), InferenceBackend.ONNX)
+
+        mock_set_torch_threads.assert_not_called()
+        self.assertEqual(os.environ['OMP_THREAD_LIMIT'], '2')
+
+    @patch('src.resource_scheduler.OCRExtractor.shutdown_workers')
+    def test_tesseract_change_restarts_ocr_pool(self, mock_shutdown_workers, mock_set_torch_threads):
+        ResourceScheduler.apply(ThreadBudget(ocr_workers=2))
+        ResourceScheduler.apply(ThreadBudget(ocr_workers=4))
+        mock_shutdown_workers.assert_not_called()
+
+        ResourceScheduler.apply(ThreadBudget(ocr_workers=4, tesseract_threads=2))
+        mock_shutdown_workers.assert_called_once()
+
+    def test_candidate_budgets(self, mock_set_torch_threads):
+        candidates = ResourceScheduler.candidate_budgets(8)
+
+        self.assertEqual([budget.ocr_workers for budget in candidates], [1, 2, 4, 7])
+        self.assertTrue(all(budget.cores() == 8 for budget in candidates))
+        self.assertEqual(ResourceScheduler.candidate_budgets(1), [ThreadBudget()])
+
+    def test_autotune_picks_fastest(self, mock_set_torch_threads):
+        files = [Path("a.pdf"), Path("b.pdf")]
+
+        def classify_iter(input):
+            # Two OCR workers is the sweet spot of this fake machine
+            time.sleep(0.01 if ResourceScheduler.ocr_workers() == 2 else 0.05)
+            return [FilePrediction(file, DocumentType.INVOICE) for file in input.files]
+
+        classifier = MagicMock()
+        classifier.classify_iter.side_effect = classify_iter
+        candidates = ResourceScheduler.candidate_budgets(4)
+
+        best, results = ResourceScheduler.autotune(classifier, files, candidates)
+
+        self.assertEqual(best, ThreadBudget(ocr_workers=2, model_threads=2))
+        self.assertEqual(ResourceScheduler.budget(), best)
+        self.assertEqual([result['budget'] for result in results], [budget.to_dict() for budget in candidates])
+
+    def test_save_and_load(self, mock_set_torch_threads):
+        budget = ThreadBudget(ocr_workers=2, model_threads=6, model_interop_threads=2)
+
+        with TemporaryDirectory() as tmp_dir:
+            budget_path = Path(tmp_dir, 'thread_budget.json')
+            ResourceScheduler.save(budget, budget_path, [{'files_per_sec': 1.0}])
+
+            self.assertEqual(ResourceScheduler.load(budget_path), budget)
+
+    def test_invalid_budget(self, mock_set_torch_threads):
+        with self.assertRaises(ValueError):
+            ThreadBudget(model_threads=0)
+
+
+class TestTorchThreads(TestCase):
+    def test_without_torch(self):
+        # A None entry makes `import torch` raise ImportError
+        with patch.dict(sys.modules, {'torch': None}):
+            with self.assertLogs('src.resource_scheduler', level='WARNING'):
+                ResourceScheduler._set_torch_threads(ThreadBudget(model_threads=2))